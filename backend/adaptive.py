@@ -0,0 +1,145 @@
+# adaptive.py
+# Adaptive processing rate for /process-frame and /ws/session (opt-in, ADAPTIVE_SKIP=1):
+# - Motion gate: a 32x24 grayscale thumbnail (JPEG decoded at 1/8 scale) is
+#   compared with the session's last processed frame; if the picture and the
+#   smoothed landmarks are both still, the last result is reused instead of
+#   running pose again (at most ADAPTIVE_MAX_SKIPS frames in a row)
+# - Load shedding: when inference is nearly full (in-flight frames /
+#   INFER_MAX_QUEUE, or with BATCHING=1 the micro-batcher's pending frames /
+#   its queue size, >= ADAPTIVE_LOAD_START), each session is decimated to
+#   every 2nd/4th/8th frame
+# - Never for the default session ("latest"): several clients may share it,
+#   so a reused result could be another client's
+# - Counters show how many frames were skipped and the compute that saved
+
+import os
+import threading
+
+import numpy as np
+
+import metrics
+from geometry import F_L_SH_Y
+from session_store import DEFAULT_SESSION
+
+ADAPTIVE_SKIP = os.getenv("ADAPTIVE_SKIP", "0") == "1"
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "2.0"))  # mean abs pixel diff, 0..255
+LANDMARK_SPEED_THRESHOLD = float(os.getenv("LANDMARK_SPEED_THRESHOLD", "20"))  # deg/s
+ADAPTIVE_MAX_SKIPS = int(os.getenv("ADAPTIVE_MAX_SKIPS", "10"))
+ADAPTIVE_LOAD_START = float(os.getenv("ADAPTIVE_LOAD_START", "0.75"))
+
+THUMB_SIZE = (32, 24)
+
+# executor occupancy -> process 1 of every N frames per session
+DECIMATION_STEPS = (
+    (ADAPTIVE_LOAD_START, 1),
+    (ADAPTIVE_LOAD_START + (1 - ADAPTIVE_LOAD_START) / 2, 2),
+    (1.0, 4),
+    (float("inf"), 8),
+)
+
+SKIPPED_STILL = metrics.Counter(
+    "posture_skipped_still_frames_total", "Frames answered from the last result (no motion)"
+)
+SKIPPED_LOAD = metrics.Counter(
+    "posture_skipped_load_frames_total", "Frames answered from the last result (server saturated)"
+)
+COMPUTE_SAVED = metrics.Counter(
+    "posture_compute_saved_seconds_total", "Estimated decode+pose+rules time not spent on skipped frames"
+)
+
+
+def thumbnail(gray):
+    """Tiny float thumbnail of a small grayscale frame (result_cache.small_gray)."""
+    if gray is None:
+        return None
+    import cv2
+    return cv2.resize(gray, THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+def landmark_speed(tracker):
+    """Fastest angle change (deg/s) over the tracker's last two frames, or None."""
+    if tracker is None or len(tracker.history) < 2:
+        return None
+    (t0, f0), (t1, f1) = tracker.history[-2], tracker.history[-1]
+    dt = max(t1 - t0, 1e-3)
+    return float(np.max(np.abs(f1[:F_L_SH_Y] - f0[:F_L_SH_Y]))) / dt
+
+
+class AdaptiveScheduler:
+    def __init__(self, load_fn):
+        # load_fn() -> 0..1+ (how saturated inference is right now)
+        self.load_fn = load_fn
+        self._lock = threading.Lock()
+        self._state = {}  # session_id -> {"thumb", "result", "skips", "seen"}
+        self._avg_cost_s = 0.0
+
+    def load(self):
+        # Executor occupancy only: host loadavg ignores cgroup CPU limits and
+        # counts other tenants' work, so it shed load on idle containers
+        return self.load_fn()
+
+    def decimation(self):
+        load = self.load()
+        for limit, every in DECIMATION_STEPS:
+            if load < limit:
+                return every
+        return DECIMATION_STEPS[-1][1]
+
+    def check(self, session_id, thumb, tracker=None):
+        """
+        Decide before inference. Returns (cached_result, reason) to reuse the
+        last result, or (None, None) to run the full pipeline.
+        """
+        if session_id == DEFAULT_SESSION:
+            return None, None
+        with self._lock:
+            st = self._state.get(session_id)
+            if st is None or st["result"] is None:
+                return None, None
+            st["seen"] += 1
+            if st["skips"] >= ADAPTIVE_MAX_SKIPS:
+                return None, None
+
+            reason = None
+            every = self.decimation()
+            if every > 1 and st["seen"] % every:
+                reason = "load"
+            elif thumb is not None and st["thumb"] is not None:
+                diff = float(np.mean(np.abs(thumb - st["thumb"])))
+                speed = landmark_speed(tracker)
+                if diff < MOTION_THRESHOLD and (speed is None or speed < LANDMARK_SPEED_THRESHOLD):
+                    reason = "still"
+
+            if reason is None:
+                return None, None
+            st["skips"] += 1
+            cached = dict(st["result"])
+
+        (SKIPPED_LOAD if reason == "load" else SKIPPED_STILL).inc()
+        COMPUTE_SAVED.inc(self._avg_cost_s)
+        return cached, reason
+
+    def record(self, session_id, thumb, result, timings=None):
+        """Remember a fully processed frame as the reference for the next ones."""
+        if session_id == DEFAULT_SESSION:
+            return
+        if timings:
+            cost = sum(timings.get(k, 0.0) for k in ("decode", "pose", "rules")) / 1000.0
+            self._avg_cost_s = cost if not self._avg_cost_s else 0.9 * self._avg_cost_s + 0.1 * cost
+        with self._lock:
+            st = self._state.setdefault(session_id, {"seen": 0})
+            st.update(thumb=thumb, result=dict(result), skips=0)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._state.pop(session_id, None)
+
+    def stats(self):
+        return {
+            "enabled": ADAPTIVE_SKIP,
+            "load": round(self.load(), 3),
+            "decimation": self.decimation(),
+            "skipped_still": SKIPPED_STILL.value,
+            "skipped_load": SKIPPED_LOAD.value,
+            "compute_saved_s": round(COMPUTE_SAVED.value, 3),
+            "avg_frame_cost_ms": round(self._avg_cost_s * 1000, 3),
+        }
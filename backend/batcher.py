@@ -0,0 +1,138 @@
+# batcher.py
+# Optional micro-batching in front of the pose stage (BATCHING=1):
+# - /process-frame requests queue their frame and await a future
+# - A collector groups frames for up to BATCH_MAX_WAIT_MS or BATCH_MAX_SIZE frames
+# - Each batch is one executor call (inference.run_batch); results fan back out
+# - At most one batch per worker is in flight, so frames pile up (and batches
+#   fill) exactly when the workers are saturated
+# - stats(): batch size histogram / fill ratio and per-frame queue wait
+# - load(): frames not answered yet / queue capacity, for adaptive skipping
+#   (the executor's own in-flight count stays <= workers behind the batcher)
+
+import asyncio
+import os
+import time
+from collections import Counter, deque
+
+from inference import InferenceBusy, run_batch
+from pose_pool import POSE_MODEL_TIER
+
+BATCHING = os.getenv("BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+
+class MicroBatcher:
+    def __init__(self, executor, max_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.executor = executor
+        self.max_size = max(1, int(max_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = None
+        self._slots = None
+        self._task = None
+
+        self._pending = 0  # submitted frames still waiting for their result
+        self._batches = 0
+        self._frames = 0
+        self._sizes = Counter()
+        self._waits_ms = deque(maxlen=1024)
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.executor.max_queue * self.max_size)
+        self._slots = asyncio.Semaphore(self.executor.workers)
+        self._task = asyncio.create_task(self._collect())
+        print(f"✅ Micro-batching on (max {self.max_size} frames / {self.max_wait * 1000:.0f} ms)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, data, roi=None, tier=POSE_MODEL_TIER):
+        """Queue one frame and wait for its result dict (None if not an image)."""
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((time.perf_counter(), (data, roi, tier), fut))
+        except asyncio.QueueFull:
+            raise InferenceBusy(f"{self._queue.qsize()} frames already queued for batching")
+        self._pending += 1
+        try:
+            return await fut
+        finally:
+            self._pending -= 1
+
+    def capacity(self):
+        return self.executor.max_queue * self.max_size
+
+    def load(self):
+        """Frames queued or in a running batch / queue capacity (1.0 = next submit is refused)."""
+        return self._pending / self.capacity()
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+
+            # Frames that arrived while every worker was busy ride along for free
+            while len(batch) < self.max_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        now = time.perf_counter()
+        for enqueued, _, _ in batch:
+            self._waits_ms.append((now - enqueued) * 1000)
+        self._batches += 1
+        self._frames += len(batch)
+        self._sizes[len(batch)] += 1
+
+        try:
+            results = await self.executor.run(run_batch, [item for _, item, _ in batch])
+        except Exception as e:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for (_, _, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        waits = sorted(self._waits_ms)
+        avg_size = self._frames / self._batches if self._batches else 0.0
+        return {
+            "max_size": self.max_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pending": self._pending,
+            "load": round(self.load(), 3),
+            "batches": self._batches,
+            "frames": self._frames,
+            "avg_batch_size": round(avg_size, 2),
+            "avg_fill_ratio": round(avg_size / self.max_size, 3),
+            "batch_sizes": {str(k): v for k, v in sorted(self._sizes.items())},
+            "queue_wait_ms": {
+                "avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                "p95": round(waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0,
+                "max": round(waits[-1], 2) if waits else 0.0,
+            },
+        }
@@ -0,0 +1,491 @@
+# benchmark.py
+# Offline benchmark for the frame pipeline (no webcam, Firestore faked):
+#
+#   python benchmark.py replay workout.mp4            # or a folder of .jpg/.png frames
+#   python benchmark.py replay frames/ --repeat 3 --json bench.json
+#   python benchmark.py replay workout.mp4 --tiers lite,full,heavy [--labels labels.json]
+#   python benchmark.py load --clients 16 --requests 50 --image frame.jpg
+#   python benchmark.py load --clients 16 --url http://localhost:8000 --image frame.jpg
+#   python benchmark.py scale --workers 1,2,4 --clients 16 --image frame.jpg
+#
+# replay: each recorded frame is JPEG-encoded (like a browser upload) and pushed
+#   through decode -> pose -> classify_exercise -> check_form -> Firestore writer.
+#   Reports per-stage p50/p95/p99 latency, frames/sec per core and peak RSS.
+#   With --tiers, runs once per model tier and reports fps next to the accuracy
+#   of the check_form verdicts (vs --labels, else vs the heaviest tier).
+# load: N concurrent clients POST /process-frame, against a running server
+#   (--url) or the FastAPI app in-process; reports throughput, latency and status codes.
+#   Every request sends the same image, so the result cache, adaptive skipping
+#   and landmark logging are turned off in-process (BENCH_SERVER_ENV); with
+#   --url the report says whether the server has them on.
+# scale: the load test against `uvicorn --workers N` servers started here for
+#   each N, sharing session state through SESSION_STORE=sqlite (result cache
+#   and adaptive skipping off, so every request runs pose); reports throughput
+#   per worker count, speedup over the first run and scaling efficiency.
+#   Linear scaling needs at least as many free cores as the largest N.
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Server settings for load/scale runs: one repeated image must still run pose every time
+BENCH_SERVER_ENV = {
+    "FIRESTORE_FAKE": "1",
+    "RESULT_CACHE": "0",
+    "ADAPTIVE_SKIP": "0",
+    "LANDMARK_LOG": "0",
+}
+
+
+# -------------------- Fixtures --------------------
+def load_frames(path, max_frames=None, jpeg_quality=85):
+    """Video file or image folder -> list of JPEG bytes (what a client would upload)."""
+    frames = []
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTS))
+        for name in names[:max_frames]:
+            img = cv2.imread(os.path.join(path, name))
+            if img is not None:
+                frames.append(cv2.imencode(".jpg", img, params)[1].tobytes())
+        return frames
+
+    cap = cv2.VideoCapture(path)
+    while max_frames is None or len(frames) < max_frames:
+        ok, img = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.imencode(".jpg", img, params)[1].tobytes())
+    cap.release()
+    return frames
+
+# -------------------- Stats helpers --------------------
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"n": 0}
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "n": int(arr.size),
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def print_report(report):
+    print(json.dumps(report, indent=2))
+
+# -------------------- replay --------------------
+def replay_tier(frames, tier, repeat=1):
+    """
+    Replay frames on one model tier -> (report, verdicts), where verdicts is
+    the (status, issue) of each frame on the first pass.
+    """
+    from fake_firestore import FakeFirestore
+    from firestore_writer import FirestoreWriter
+    from frame_decode import decode_frame
+    from geometry import compute_features, landmarks_to_array
+    from pose_pool import create_pose
+    from posture import check_form, classify_exercise
+
+    db = FakeFirestore()
+    writer = FirestoreWriter(db, spool_path=":memory:")
+    pose = create_pose(tier=tier)
+    pose.process(np.zeros((256, 256, 3), dtype=np.uint8))  # warm-up
+
+    stages = {"decode": [], "pose": [], "classify": [], "check_form": [], "firestore": [], "total": []}
+    outcomes = {}
+    verdicts = []
+    no_pose = 0
+
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for rep in range(repeat):
+        for data in frames:
+            t0 = time.perf_counter()
+            frame_rgb = decode_frame(data)
+            t1 = time.perf_counter()
+            results = pose.process(frame_rgb)
+            t2 = time.perf_counter()
+
+            exercise, status, issue = "Squat", "correct", "—"
+            t3 = t4 = t2
+            if results.pose_landmarks:
+                feat = compute_features(landmarks_to_array(results.pose_landmarks.landmark))
+                exercise = classify_exercise(feat)
+                t3 = time.perf_counter()
+                status, issue = check_form(exercise, feat)
+                t4 = time.perf_counter()
+            else:
+                no_pose += 1
+
+            writer.submit(status, exercise, issue)
+            t5 = time.perf_counter()
+
+            stages["decode"].append((t1 - t0) * 1000)
+            stages["pose"].append((t2 - t1) * 1000)
+            if results.pose_landmarks:
+                stages["classify"].append((t3 - t2) * 1000)
+                stages["check_form"].append((t4 - t3) * 1000)
+            stages["firestore"].append((t5 - t4) * 1000)
+            stages["total"].append((t5 - t0) * 1000)
+            key = f"{exercise} / {status}"
+            outcomes[key] = outcomes.get(key, 0) + 1
+            if rep == 0:
+                verdicts.append((status, issue))
+
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    writer.flush()
+    pose.close()
+
+    n = len(stages["total"])
+    report = {
+        "tier": tier,
+        "frames": n,
+        "no_pose_frames": no_pose,
+        "wall_s": round(wall, 3),
+        "fps": round(n / wall, 2),
+        "fps_per_core": round(n / cpu, 2) if cpu else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages_ms": {name: percentiles(v) for name, v in stages.items()},
+        "outcomes": outcomes,
+        "firestore_writes": db.writes,
+    }
+    return report, verdicts
+
+def load_labels(path):
+    """
+    Expected verdicts, one JSON entry per frame in replay order:
+    {"status": "correct"|"wrong", "issue": "..."} (issue optional) or null to skip.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    return [None if e is None else (e["status"], e.get("issue")) for e in entries]
+
+def verdict_accuracy(verdicts, reference):
+    """Share of frames whose status (and, where the reference has one, issue) matches."""
+    status = [v[0] == r[0] for v, r in zip(verdicts, reference) if r is not None]
+    issue = [v[1] == r[1] for v, r in zip(verdicts, reference) if r is not None and r[1] is not None]
+    return {
+        "frames": len(status),
+        "status": round(sum(status) / len(status), 4) if status else None,
+        "issue": round(sum(issue) / len(issue), 4) if issue else None,
+    }
+
+def run_replay(args):
+    from pose_pool import MODEL_TIERS, POSE_MODEL_TIER, check_tier
+
+    try:
+        tiers = [check_tier(t.strip()) for t in args.tiers.split(",")] if args.tiers else [POSE_MODEL_TIER]
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    frames = load_frames(args.source, args.max_frames)
+    if not frames:
+        print(f"❌ No frames found in {args.source}")
+        return 1
+
+    results = {tier: replay_tier(frames, tier, args.repeat) for tier in tiers}
+
+    if len(tiers) == 1 and not args.labels:
+        report = {"mode": "replay", "source": args.source, **results[tiers[0]][0]}
+    else:
+        # Accuracy of check_form verdicts against labels, or else against the heaviest tier run
+        if args.labels:
+            reference_name, reference = args.labels, load_labels(args.labels)
+        else:
+            reference_name = max(tiers, key=MODEL_TIERS.get)
+            reference = results[reference_name][1]
+        summary = {}
+        for tier, (tier_report, verdicts) in results.items():
+            tier_report["accuracy"] = verdict_accuracy(verdicts, reference)
+            summary[tier] = {
+                "fps": tier_report["fps"],
+                "fps_per_core": tier_report["fps_per_core"],
+                "pose_p95_ms": tier_report["stages_ms"]["pose"].get("p95"),
+                "status_accuracy": tier_report["accuracy"]["status"],
+                "issue_accuracy": tier_report["accuracy"]["issue"],
+            }
+        report = {
+            "mode": "replay-tiers",
+            "source": args.source,
+            "reference": reference_name,
+            "summary": summary,
+            "tiers": {tier: r for tier, (r, _) in results.items()},
+        }
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+# -------------------- load --------------------
+async def _load(args, body):
+    import httpx
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            shortcuts = await _server_shortcuts(client)
+            if shortcuts:
+                print(f"⚠️ Server has {', '.join(shortcuts)} on: repeated frames are not all inferred")
+            report = await _drive(args, client, body, args.url)
+            report["server_shortcuts"] = shortcuts
+            return report
+
+    # In-process: run the app's startup/shutdown around the load, Firestore faked
+    for key, value in BENCH_SERVER_ENV.items():
+        os.environ.setdefault(key, value)
+    import control_server
+
+    app = control_server.app
+    async with app.router.lifespan_context(app):
+        await control_server.wait_ready()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            return await _drive(args, client, body, "in-process")
+
+async def _server_shortcuts(client):
+    """Features of a running server that answer a repeated frame without inference."""
+    try:
+        status = (await client.get("/status")).json()
+    except Exception:
+        return []
+    return [name for name, on in (
+        ("result cache", (status.get("result_cache") or {}).get("enabled")),
+        ("adaptive skipping", (status.get("adaptive") or {}).get("enabled")),
+    ) if on]
+
+async def _drive(args, client, body, target):
+    latencies, codes = [], {}
+
+    async def one_client(cid):
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(
+                    "/process-frame",
+                    files={"file": ("frame.jpg", body, "image/jpeg")},
+                    data={"session_id": f"bench-{cid}"},
+                )
+                code = r.status_code
+            except Exception as e:
+                code = type(e).__name__
+            latencies.append((time.perf_counter() - t0) * 1000)
+            codes[str(code)] = codes.get(str(code), 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one_client(c) for c in range(args.clients)))
+    wall = time.perf_counter() - t0
+
+    return {
+        "mode": "load",
+        "target": target,
+        "clients": args.clients,
+        "requests": len(latencies),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "ok_rps": round(codes.get("200", 0) / wall, 2),
+        "latency_ms": percentiles(latencies),
+        "status_codes": codes,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def _load_body(args):
+    """JPEG bytes of --image, or of the first frame of --source; None if neither gives one."""
+    if args.image:
+        img = cv2.imread(args.image)
+    else:
+        frames = load_frames(args.source, 1) if args.source else []
+        img = cv2.imdecode(np.frombuffer(frames[0], np.uint8), cv2.IMREAD_COLOR) if frames else None
+    return cv2.imencode(".jpg", img)[1].tobytes() if img is not None else None
+
+def run_load(args):
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        print("❌ load mode needs httpx: pip install httpx")
+        return 1
+
+    body = _load_body(args)
+    if body is None:
+        print("❌ Give --image or --source with at least one frame")
+        return 1
+
+    report = asyncio.run(_load(args, body))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+# -------------------- scale --------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workers, port, state_dir):
+    """`uvicorn control_server:app --workers N` with shared session state under state_dir."""
+    env = dict(os.environ)
+    for key, value in {
+        **BENCH_SERVER_ENV,
+        "SESSION_STORE": "sqlite",
+        "SESSION_STORE_URL": os.path.join(state_dir, "sessions.db"),
+        "HISTORY_INDEX": os.path.join(state_dir, "history_index.db"),
+        "FIRESTORE_SPOOL": os.path.join(state_dir, "firestore_spool.db"),
+        "INFER_WORKERS": "1",
+        "INFER_MAX_QUEUE": "64",  # queue under load instead of answering 503
+    }.items():
+        env.setdefault(key, value)
+    log = open(os.path.join(state_dir, f"server-{workers}.log"), "wb")
+    cmd = [sys.executable, "-m", "uvicorn", "control_server:app",
+           "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+async def wait_workers_ready(url, workers, timeout):
+    """
+    /readyz answers from whichever worker accepts the connection, so wait for
+    a run of 200s long enough that every worker has most likely warmed up.
+    """
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    streak = 0
+    async with httpx.AsyncClient(base_url=url, timeout=5) as client:
+        while streak < 4 * workers:
+            if time.monotonic() > deadline:
+                return False
+            try:
+                ok = (await client.get("/readyz")).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            streak = streak + 1 if ok else 0
+            await asyncio.sleep(0.05 if ok else 0.5)
+    return True
+
+def run_scale(args):
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        print("❌ scale mode needs httpx: pip install httpx")
+        return 1
+
+    body = _load_body(args)
+    if body is None:
+        print("❌ Give --image or --source with at least one frame")
+        return 1
+    counts = [int(n) for n in args.workers.split(",")]
+
+    runs = []
+    for workers in counts:
+        with tempfile.TemporaryDirectory() as state_dir:
+            port = _free_port()
+            url = f"http://127.0.0.1:{port}"
+            server = start_server(workers, port, state_dir)
+            try:
+                if not asyncio.run(wait_workers_ready(url, workers, args.startup_timeout)):
+                    print(f"❌ {workers} worker(s) not ready after {args.startup_timeout:.0f} s, "
+                          f"see server log:")
+                    with open(os.path.join(state_dir, f"server-{workers}.log"), errors="replace") as f:
+                        print(f.read()[-2000:])
+                    return 1
+                # A short unmeasured round first: first frames per worker/session pay for lazy setup
+                warm = argparse.Namespace(**{**vars(args), "url": url, "requests": max(1, args.requests // 5)})
+                asyncio.run(_load(warm, body))
+                report = asyncio.run(_load(argparse.Namespace(**{**vars(args), "url": url}), body))
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+        report["workers"] = workers
+        runs.append(report)
+        print(f"✅ {workers} worker(s): {report['ok_rps']} ok req/s, "
+              f"p95 {report['latency_ms'].get('p95')} ms")
+
+    base = runs[0]["ok_rps"] / counts[0]
+    report = {
+        "mode": "scale",
+        "cpu_count": os.cpu_count(),
+        "clients": args.clients,
+        "requests_per_client": args.requests,
+        "summary": {
+            str(r["workers"]): {
+                "ok_rps": r["ok_rps"],
+                "speedup": round(r["ok_rps"] / runs[0]["ok_rps"], 2) if base else None,
+                "efficiency": round(r["ok_rps"] / (base * r["workers"]), 2) if base else None,
+                "p95_ms": r["latency_ms"].get("p95"),
+                "status_codes": r["status_codes"],
+            }
+            for r in runs
+        },
+        "runs": runs,
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Frame pipeline benchmark")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("replay", help="replay recorded frames through the pipeline stages")
+    p.add_argument("source", help="video file or folder of images")
+    p.add_argument("--max-frames", type=int, default=None)
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--tiers", help="comma-separated model tiers to compare, e.g. lite,full,heavy")
+    p.add_argument("--labels", help="JSON list of expected verdicts per frame (default reference: heaviest tier)")
+    p.add_argument("--json", help="also write the report to this file")
+    p.set_defaults(func=run_replay)
+
+    p = sub.add_parser("load", help="N concurrent clients against /process-frame")
+    p.add_argument("--url", help="running server, e.g. http://localhost:8000 (default: in-process app)")
+    p.add_argument("--image", help="frame to upload")
+    p.add_argument("--source", help="video/folder; its first frame is uploaded")
+    p.add_argument("--clients", type=int, default=8)
+    p.add_argument("--requests", type=int, default=25, help="requests per client")
+    p.add_argument("--timeout", type=float, default=30.0)
+    p.add_argument("--json", help="also write the report to this file")
+    p.set_defaults(func=run_load)
+
+    p = sub.add_parser("scale", help="load test against 1..N uvicorn workers sharing session state")
+    p.add_argument("--workers", default="1,2,4", help="comma-separated worker counts, e.g. 1,2,4")
+    p.add_argument("--image", help="frame to upload")
+    p.add_argument("--source", help="video/folder; its first frame is uploaded")
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--requests", type=int, default=25, help="requests per client")
+    p.add_argument("--timeout", type=float, default=30.0)
+    p.add_argument("--startup-timeout", type=float, default=120.0)
+    p.add_argument("--json", help="also write the report to this file")
+    p.set_defaults(func=run_scale)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 import cv2
 import mediapipe as mp
 
+from pose_pool import MODEL_TIERS, POSE_MODEL_TIER
+
 mp_pose = mp.solutions.pose
 mp_draw = mp.solutions.drawing_utils
 
@@ -8,7 +10,7 @@ cap = cv2.VideoCapture(0)
 
 with mp_pose.Pose(
     static_image_mode=False,
-    model_complexity=1,
+    model_complexity=MODEL_TIERS[POSE_MODEL_TIER],  # POSE_MODEL_TIER=lite|full|heavy
     enable_segmentation=False,
     min_detection_confidence=0.5,
     min_tracking_confidence=0.5
@@ -2,21 +2,73 @@
 # Deploy-friendly FastAPI backend:
 # - DOES NOT open webcam on server (Render has no webcam)
 # - Frontend sends frames -> POST /process-frame
-# - MediaPipe Pose -> classify exercise + check form
-# - Writes live state to Firestore: postureLogs/latest
-# - Logs wrong events to postureHistory
-
-from fastapi import FastAPI, File, UploadFile
+#   or its own landmarks (client-side pose) -> POST /process-landmarks
+#   or streams them over WebSocket /ws/session (tracking mode, one Pose per session)
+# - MediaPipe Pose (warm pooled instances) -> classify exercise + check form,
+#   run on a thread/process pool (inference.py) so the event loop never blocks,
+#   optionally micro-batched across concurrent uploads (batcher.py, BATCHING=1)
+# - Pushes each session's state changes to dashboards: SSE GET /events or
+#   WebSocket /ws/state, fanned out in-process (state_bus.py)
+# - Writes live state to Firestore (optional sink, FIRESTORE_SINK=1): postureLogs/{session_id} (default "latest")
+# - Logs wrong events to postureHistory (or postureLogs/{session_id}/history)
+#   (both from a background writer that coalesces + batches, firestore_writer.py,
+#   through a SQLite spool so outages delay writes instead of dropping them)
+# - Keeps each session's latest state (session_store.py) for /status: in memory,
+#   or with SESSION_STORE=sqlite|redis in a store shared by every worker, so
+#   the server can run as several uvicorn workers / instances behind a load
+#   balancer (WEB_CONCURRENCY; what still needs sticky routing: session_store.py)
+# - Counts wrong events per (session, exercise, issue, hour) as they happen,
+#   queried with GET /history/summary (history_index.py)
+# - Smooths features per session, debounces the exercise label, counts reps (tracking.py);
+#   only for explicit session_ids, the shared default session gets per-frame verdicts
+# - Per-stage timings + counters on GET /metrics (Prometheus text format)
+# - Optionally reuses the last result for still frames and decimates under load
+#   (adaptive.py, ADAPTIVE_SKIP=1)
+# - Optionally answers a session's repeated / near-identical uploads from a
+#   dHash-keyed cache (result_cache.py, RESULT_CACHE=1)
+# - Pose model tier (lite/full/heavy) per request or session, or automatic:
+#   lighter when p95 latency exceeds LATENCY_BUDGET_MS, heavier with headroom (model_tier.py)
+# - Whole recorded videos: POST /video-jobs -> per-frame timeline (video_job.py)
+# - Shared camera, several athletes: POST /process-people scores every person
+#   under a stable per-person id (multi_person.py, MULTI_PERSON=1)
+# - Optionally appends each session's raw landmarks to a binary log for
+#   re-scoring (landmark_log.py, LANDMARK_LOG=1)
+# - Fast cold start: / and /healthz answer at once, Firebase + model load +
+#   a warm-up inference run in the background (lifespan), /readyz and /status report readiness
+
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Form, Header, Request, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
-import mediapipe as mp
-import numpy as np
-import math
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import hashlib
 import json
 import os
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+import numpy as np
+
+from adaptive import ADAPTIVE_SKIP, AdaptiveScheduler, thumbnail
+from batcher import BATCHING, MicroBatcher
+from fake_firestore import FakeFirestore
+from firestore_writer import FirestoreWriter
+from frame_decode import PREFERRED_INPUT_SIZE, parse_roi, roi_from_landmarks
+from geometry import compute_features
+from history_index import HISTORY_FLUSH_S, HistoryIndex
+from inference import InferenceBusy, InferenceExecutor, result_dict, run_tracked_frame
+import landmark_input
+from landmark_log import LANDMARK_LOG, LandmarkLogger
+import metrics
+import multi_person
+from model_tier import TIER_ORDER, TierPolicy
+from pose_pool import MODEL_TIERS, PosePoolExhausted, create_pose
+from result_cache import RESULT_CACHE, ResultCache, small_gray
+from session_store import DEFAULT_SESSION, SessionStore, open_kv, valid_session_id
+from state_bus import StateBus
+from tracking import TEMPORAL_TRACKING
+from video_job import VIDEO_MAX_BYTES, VideoJobs, job_id_for
 
 # -------------------- Firebase (SAFE for public repo) --------------------
 # Put your Firebase service account JSON into Render Environment variable:
@@ -24,12 +76,25 @@ from firebase_admin import credentials, firestore
 #
 # If you are testing locally and want to use serviceAccountKey.json,
 # set USE_LOCAL_FIREBASE_KEY=1 in your local env and keep the file in backend folder.
+#
+# FIRESTORE_FAKE=1 uses an in-memory Firestore (fake_firestore.py) for offline runs.
+#
+# Runs on a background thread at startup (see warm_up), not at import.
 
 db = None
 
 def init_firebase():
     global db
 
+    if os.getenv("FIRESTORE_FAKE", "0") == "1":
+        db = FakeFirestore()
+        print("✅ Using in-memory fake Firestore (FIRESTORE_FAKE=1)")
+        return
+
+    # Heavy import (~0.5 s), so it happens here instead of at module import
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     if firebase_admin._apps:
         db = firestore.client()
         return
@@ -59,10 +124,185 @@ def init_firebase():
         print("⚠️ Firebase init failed:", e)
         db = None
 
-init_firebase()
+# Request handlers only hand state to this writer; it talks to Firestore
+# from its own thread every FIRESTORE_FLUSH_INTERVAL seconds. It gets its
+# client and starts once init_firebase() has run (until then submits queue up).
+writer = FirestoreWriter(None)
+
+# FIRESTORE_SINK=0: never connect to Firestore; dashboards use /events only
+FIRESTORE_SINK = os.getenv("FIRESTORE_SINK", "1") == "1"
+
+# Latest state + temporal tracker per session, answered by /status without a
+# Firestore read; SESSION_STORE=sqlite|redis shares them between workers
+sessions = SessionStore(kv=open_kv())
+
+# Shared store: how often open /events and /ws/state streams check for state
+# changes made by frames that other workers handled
+SESSION_SYNC_S = float(os.getenv("SESSION_SYNC_S", "0.5"))
+
+# Session state changes -> open /events and /ws/state streams
+state_bus = StateBus()
+
+# Wrong-event counts per (session, exercise, issue, time bucket) for dashboards
+history_index = HistoryIndex()
+
+# Raw landmarks per session (LANDMARK_LOG=1), replayable with landmark_log.py
+landmark_logger = LandmarkLogger()
+
+# Uploaded workout videos, analysed one at a time on a process pool
+video_jobs = VideoJobs()
+
+# -------------------- MediaPipe inference --------------------
+# decode -> pose -> classify runs on INFER_EXECUTOR (thread|process) with
+# INFER_WORKERS warm Pose models and at most INFER_MAX_QUEUE frames in flight.
+executor = InferenceExecutor()
+
+# BATCHING=1: group concurrent uploads into batches of up to BATCH_MAX_SIZE
+# frames, waiting at most BATCH_MAX_WAIT_MS for a batch to fill.
+batcher = MicroBatcher(executor) if BATCHING else None
+
+# ADAPTIVE_SKIP=1 (off by default): answer still frames from the session's
+# last result, and only process every Nth frame per session while inference
+# is nearly full. Never for the shared default session.
+def inference_load():
+    # Behind the batcher the executor never has more than `workers` batches in
+    # flight, so occupancy is measured where frames actually wait
+    if batcher is not None:
+        return batcher.load()
+    return executor.stats()["in_flight"] / executor.max_queue
+
+adaptive = AdaptiveScheduler(inference_load)
+
+# Model tier per frame: request > session pin > automatic (p95 latency vs budget)
+tiers = TierPolicy()
+
+# RESULT_CACHE=1 (off by default): a session's uploads with the same
+# perceptual hash (+ roi, tier) within RESULT_CACHE_TTL seconds reuse the
+# earlier pose result
+result_cache = ResultCache()
+
+# MULTI_PERSON=1: camera session id -> PersonTracker (identities across frames)
+person_trackers = {}
+
+# -------------------- Startup / readiness --------------------
+startup = {
+    "ready": False, "firebase": "pending", "model": "pending", "error": None,
+    "import_ms": None, "firebase_ms": None, "model_ms": None, "warmup_ms": None,
+    "ready_ms": None, "first_inference_ms": None,
+}
+
+def _ms_since(t0):
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+async def warm_up():
+    """Firebase client and Pose models in parallel, then one full-pipeline inference."""
+    async def start_firebase():
+        t0 = time.perf_counter()
+        if not FIRESTORE_SINK:
+            startup["firebase"] = "disabled"
+            startup["firebase_ms"] = 0.0
+            return
+        await asyncio.to_thread(init_firebase)
+        writer.db = db
+        writer.start()
+        startup["firebase"] = "ok" if db is not None else "disabled"
+        startup["firebase_ms"] = _ms_since(t0)
+
+    async def start_model():
+        t0 = time.perf_counter()
+        await asyncio.to_thread(executor.start)
+        startup["model_ms"] = _ms_since(t0)
+
+        t0 = time.perf_counter()
+        import cv2  # ~0.1 s; loaded here with the model instead of at import
+        blank = cv2.imencode(".jpg", np.zeros((PREFERRED_INPUT_SIZE, PREFERRED_INPUT_SIZE, 3), np.uint8))[1]
+        await executor.process(blank.tobytes())
+        if multi_person.MULTI_PERSON:
+            await executor.run(multi_person.warm_up)
+        startup["warmup_ms"] = _ms_since(t0)
+        startup["model"] = "ok"
+
+    try:
+        await asyncio.gather(start_firebase(), start_model())
+    except Exception as e:
+        startup["error"] = repr(e)
+        print("❌ Startup failed:", e)
+        return
+    startup["ready"] = True
+    startup["ready_ms"] = _ms_since(IMPORT_STARTED)
+    print(f"✅ Ready {startup['ready_ms']:.0f} ms after import started "
+          f"(firebase {startup['firebase_ms']:.0f} ms, model {startup['model_ms']:.0f} ms, "
+          f"warm-up {startup['warmup_ms']:.0f} ms)")
+
+async def wait_ready(timeout=120):
+    """For in-process users (benchmark.py): block until warm_up() has finished."""
+    deadline = time.perf_counter() + timeout
+    while not startup["ready"]:
+        if startup["error"]:
+            raise RuntimeError(startup["error"])
+        if time.perf_counter() > deadline:
+            raise TimeoutError("server not ready")
+        await asyncio.sleep(0.05)
+
+def note_first_inference():
+    if startup["first_inference_ms"] is None:
+        startup["first_inference_ms"] = _ms_since(IMPORT_STARTED)
+        print(f"✅ First inference {startup['first_inference_ms']:.0f} ms after import started")
+
+async def evict_loop():
+    while True:
+        await asyncio.sleep(60)
+        for session_id in await asyncio.to_thread(sessions.evict_idle):
+            writer.forget(session_id)
+            state_bus.forget(session_id)
+            history_index.forget(session_id)
+            tiers.forget(session_id)
+            adaptive.forget(session_id)
+            landmark_logger.close(session_id)
+        cutoff = time.time() - sessions.ttl
+        for session_id in [s for s, t in person_trackers.items() if t.last_seen < cutoff]:
+            del person_trackers[session_id]
+
+def sync_states():
+    for session_id in state_bus.sessions():
+        publish_state(session_id)
+
+async def state_sync_loop():
+    while True:
+        await asyncio.sleep(SESSION_SYNC_S)
+        await asyncio.to_thread(sync_states)
+
+async def history_flush_loop():
+    while True:
+        await asyncio.sleep(HISTORY_FLUSH_S)
+        await asyncio.to_thread(history_index.flush)
+
+@asynccontextmanager
+async def lifespan(app):
+    if batcher is not None:
+        batcher.start()
+    tasks = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(evict_loop()),
+        asyncio.create_task(history_flush_loop()),
+    ]
+    if sessions.kv is not None:
+        print(f"✅ Session store: {sessions.backend} (shared across workers)")
+        tasks.append(asyncio.create_task(state_sync_loop()))
+    yield
+    for task in tasks:
+        task.cancel()
+    state_bus.close()
+    if batcher is not None:
+        await batcher.stop()
+    executor.shutdown()
+    writer.stop()
+    history_index.flush()
+    landmark_logger.close_all()
+    sessions.close()
 
 # -------------------- FastAPI --------------------
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS: allow all for now (easy deployment). Lock later to your frontend domain.
 app.add_middleware(
@@ -73,203 +313,659 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# -------------------- MediaPipe --------------------
-mp_pose = mp.solutions.pose
-
-# -------------------- Geometry helpers --------------------
-def angle3(a, b, c):
-    """Angle ABC in degrees using numpy vectors for (x,y)."""
-    a = np.array(a, dtype=np.float32)
-    b = np.array(b, dtype=np.float32)
-    c = np.array(c, dtype=np.float32)
-    ba = a - b
-    bc = c - b
-    cosine = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
-    cosine = np.clip(cosine, -1.0, 1.0)
-    return float(np.degrees(np.arccos(cosine)))
-
-def line_angle_deg(p1, p2):
+def warming_response():
+    return JSONResponse(
+        status_code=503,
+        content={"ok": False, "msg": "Server warming up, retry shortly"},
+        headers={"Retry-After": "2"},
+    )
+
+def busy_response():
+    return JSONResponse(
+        status_code=503,
+        content={"ok": False, "msg": "Server busy, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+# Each streaming session owns one tracking-mode Pose graph, so cap them
+MAX_STREAM_SESSIONS = int(os.getenv("MAX_STREAM_SESSIONS", "8"))
+active_stream_sessions = 0
+
+metrics.Gauge("posture_inference_in_flight", "Frames currently on the inference executor",
+              lambda: executor.stats()["in_flight"])
+metrics.Gauge("posture_batch_queue_depth", "Frames waiting to be batched",
+              lambda: batcher.stats()["queued"] if batcher is not None else 0)
+metrics.Gauge("posture_stream_sessions", "Open WebSocket sessions", lambda: active_stream_sessions)
+metrics.Gauge("posture_sessions", "Sessions this process has handled frames for", lambda: len(sessions))
+metrics.Gauge("posture_model_tier", "Automatic pose model tier (0 lite, 1 full, 2 heavy)",
+              lambda: MODEL_TIERS[tiers.current])
+metrics.Gauge("posture_tracked_people", "People tracked across multi-person sessions",
+              lambda: sum(len(t) for t in person_trackers.values()))
+metrics.Gauge("posture_state_subscribers", "Open /events and /ws/state streams", state_bus.subscribers)
+metrics.Gauge("posture_firestore_spool_depth", "Firestore writes waiting in the spool", writer.spool_depth)
+metrics.Gauge("posture_firestore_spool_lag_seconds", "Age of the oldest spooled Firestore write",
+              writer.spool_lag)
+
+# Idle /events streams re-send the current state this often: keeps proxies
+# from closing them and tells the dashboard the server is still live (it reads
+# Firestore after 10 s without a message, so keep this well below that)
+SSE_KEEPALIVE_S = float(os.getenv("SSE_KEEPALIVE_S", "5"))
+
+def take_timings(result):
+    """Pop worker timings off a result and feed them to the stage histograms."""
+    timings = result.pop("timings", None) or {}
+    metrics.observe_timings(timings)
+    if result.get("roi") is None:
+        metrics.NO_LANDMARKS.inc()
+    return timings
+
+def log_landmarks(session_id, result):
+    """Pop the raw landmarks off a result; append them to the session's log."""
+    arr = result.pop("landmarks", None)
+    if arr is not None and LANDMARK_LOG:
+        landmark_logger.append(session_id, time.time(), arr)
+
+def apply_tracking(session_id, result):
     """
-    Absolute angle of the line p1->p2 relative to horizontal.
-    Bigger value => more vertical-ish/steeper.
+    Replace the single-frame verdict with the session's smoothed one
+    (TEMPORAL_TRACKING=1): filtered features, debounced exercise, rep count.
+    Not for the default session: every client that sends no session_id shares
+    it, so one smoother/rep counter would mix their frames (per-frame verdicts).
     """
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(math.degrees(math.atan2((y2 - y1), (x2 - x1))))
-
-# -------------------- Exercise classification --------------------
-def classify_exercise(lm):
+    feat = result.pop("features", None)
+    if feat is None or not TEMPORAL_TRACKING or session_id == DEFAULT_SESSION:
+        return result
+    result.update(sessions.track(session_id, feat, time.time()))
+    return result
+
+def adaptive_check(session_id, gray):
+    """(thumb, cached_result) - cached_result is set when this frame can be skipped."""
+    if not ADAPTIVE_SKIP:
+        return None, None
+    thumb = thumbnail(gray)
+    tracker = sessions.tracker(session_id) if TEMPORAL_TRACKING else None
+    cached, reason = adaptive.check(session_id, thumb, tracker)
+    if cached is not None:
+        cached["skipped"] = reason
+    return thumb, cached
+
+# -------------------- State push + Firestore writer --------------------
+def send_to_firebase(status, exercise, issue, session_id=DEFAULT_SESSION, user_id=None, changed=None):
+    # Non-blocking: the background writer decides what actually gets written
+    if FIRESTORE_SINK:
+        writer.submit(status, exercise, issue, session_id, user_id, changed)
+
+def publish_state(session_id):
+    # The bus itself drops states that did not change
+    state = sessions.get(session_id)
+    if state is not None:
+        state_bus.publish(session_id, state)
+
+def track_state(session_id, user_id, result):
     """
-    Rule-based exercise guess (front camera works best).
-    Returns one of: "Squat", "Deadlift", "Bicep Curl", "Shoulder Press"
+    Bookkeeping for every frame: session state, pushed updates, history counts.
+    Returns whether (status, exercise, issue) changed, judged by the session
+    store, so it holds even when the previous frame went to another worker.
     """
-    l_sh = (lm[mp_pose.PoseLandmark.LEFT_SHOULDER].x, lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y)
-    r_sh = (lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].x, lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y)
-    l_el = (lm[mp_pose.PoseLandmark.LEFT_ELBOW].x, lm[mp_pose.PoseLandmark.LEFT_ELBOW].y)
-    r_el = (lm[mp_pose.PoseLandmark.RIGHT_ELBOW].x, lm[mp_pose.PoseLandmark.RIGHT_ELBOW].y)
-    l_wr = (lm[mp_pose.PoseLandmark.LEFT_WRIST].x, lm[mp_pose.PoseLandmark.LEFT_WRIST].y)
-    r_wr = (lm[mp_pose.PoseLandmark.RIGHT_WRIST].x, lm[mp_pose.PoseLandmark.RIGHT_WRIST].y)
-
-    l_hp = (lm[mp_pose.PoseLandmark.LEFT_HIP].x, lm[mp_pose.PoseLandmark.LEFT_HIP].y)
-    r_hp = (lm[mp_pose.PoseLandmark.RIGHT_HIP].x, lm[mp_pose.PoseLandmark.RIGHT_HIP].y)
-    l_kn = (lm[mp_pose.PoseLandmark.LEFT_KNEE].x, lm[mp_pose.PoseLandmark.LEFT_KNEE].y)
-    r_kn = (lm[mp_pose.PoseLandmark.RIGHT_KNEE].x, lm[mp_pose.PoseLandmark.RIGHT_KNEE].y)
-    l_an = (lm[mp_pose.PoseLandmark.LEFT_ANKLE].x, lm[mp_pose.PoseLandmark.LEFT_ANKLE].y)
-    r_an = (lm[mp_pose.PoseLandmark.RIGHT_ANKLE].x, lm[mp_pose.PoseLandmark.RIGHT_ANKLE].y)
-
-    l_elbow = angle3(l_sh, l_el, l_wr)
-    r_elbow = angle3(r_sh, r_el, r_wr)
-    l_knee = angle3(l_hp, l_kn, l_an)
-    r_knee = angle3(r_hp, r_kn, r_an)
-
-    # Shoulder press: wrists above shoulders (smaller y = higher)
-    wrists_above_shoulders = (l_wr[1] < l_sh[1] - 0.03) or (r_wr[1] < r_sh[1] - 0.03)
-    if wrists_above_shoulders:
-        return "Shoulder Press"
-
-    # Bicep curl: elbow flexed + wrists not overhead
-    elbow_flexed = (l_elbow < 110) or (r_elbow < 110)
-    wrists_not_overhead = (l_wr[1] > l_sh[1] - 0.01) and (r_wr[1] > r_sh[1] - 0.01)
-    if elbow_flexed and wrists_not_overhead:
-        return "Bicep Curl"
-
-    # Deadlift vs squat:
-    knees_straightish = (l_knee > 140) and (r_knee > 140)
-    mid_sh = ((l_sh[0] + r_sh[0]) / 2, (l_sh[1] + r_sh[1]) / 2)
-    mid_hp = ((l_hp[0] + r_hp[0]) / 2, (l_hp[1] + r_hp[1]) / 2)
-    torso_lean = line_angle_deg(mid_sh, mid_hp)
-
-    if knees_straightish and torso_lean > 25:
-        return "Deadlift"
-
-    return "Squat"
-
-# -------------------- Form checks --------------------
-def check_form(exercise, lm):
-    l_sh = (lm[mp_pose.PoseLandmark.LEFT_SHOULDER].x, lm[mp_pose.PoseLandmark.LEFT_SHOULDER].y)
-    r_sh = (lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].x, lm[mp_pose.PoseLandmark.RIGHT_SHOULDER].y)
-    l_hp = (lm[mp_pose.PoseLandmark.LEFT_HIP].x, lm[mp_pose.PoseLandmark.LEFT_HIP].y)
-    r_hp = (lm[mp_pose.PoseLandmark.RIGHT_HIP].x, lm[mp_pose.PoseLandmark.RIGHT_HIP].y)
-
-    l_el = (lm[mp_pose.PoseLandmark.LEFT_ELBOW].x, lm[mp_pose.PoseLandmark.LEFT_ELBOW].y)
-    r_el = (lm[mp_pose.PoseLandmark.RIGHT_ELBOW].x, lm[mp_pose.PoseLandmark.RIGHT_ELBOW].y)
-    l_wr = (lm[mp_pose.PoseLandmark.LEFT_WRIST].x, lm[mp_pose.PoseLandmark.LEFT_WRIST].y)
-    r_wr = (lm[mp_pose.PoseLandmark.RIGHT_WRIST].x, lm[mp_pose.PoseLandmark.RIGHT_WRIST].y)
-
-    l_kn = (lm[mp_pose.PoseLandmark.LEFT_KNEE].x, lm[mp_pose.PoseLandmark.LEFT_KNEE].y)
-    r_kn = (lm[mp_pose.PoseLandmark.RIGHT_KNEE].x, lm[mp_pose.PoseLandmark.RIGHT_KNEE].y)
-    l_an = (lm[mp_pose.PoseLandmark.LEFT_ANKLE].x, lm[mp_pose.PoseLandmark.LEFT_ANKLE].y)
-    r_an = (lm[mp_pose.PoseLandmark.RIGHT_ANKLE].x, lm[mp_pose.PoseLandmark.RIGHT_ANKLE].y)
-
-    l_knee = angle3(l_hp, l_kn, l_an)
-    r_knee = angle3(r_hp, r_kn, r_an)
-    l_elbow = angle3(l_sh, l_el, l_wr)
-    r_elbow = angle3(r_sh, r_el, r_wr)
-
-    mid_sh = ((l_sh[0] + r_sh[0]) / 2, (l_sh[1] + r_sh[1]) / 2)
-    mid_hp = ((l_hp[0] + r_hp[0]) / 2, (l_hp[1] + r_hp[1]) / 2)
-    torso_lean = line_angle_deg(mid_sh, mid_hp)
-
-    status = "correct"
-    issue = "—"
-
-    if exercise == "Squat":
-        if min(l_knee, r_knee) > 165:
-            status, issue = "wrong", "Not squatting (legs too straight)"
-        elif min(l_knee, r_knee) < 65:
-            status, issue = "wrong", "Too deep / knee overbend"
-        elif torso_lean > 55:
-            status, issue = "wrong", "Back leaning too much"
-
-    elif exercise == "Deadlift":
-        if min(l_knee, r_knee) < 120:
-            status, issue = "wrong", "Knees bending too much (looks like squat)"
-        elif torso_lean < 20:
-            status, issue = "wrong", "Not hinging (too upright)"
-        elif torso_lean > 70:
-            status, issue = "wrong", "Back angle too aggressive (risk)"
-
-    elif exercise == "Bicep Curl":
-        if (l_el[1] < l_sh[1] + 0.05) or (r_el[1] < r_sh[1] + 0.05):
-            status, issue = "wrong", "Elbow lifted too high (cheating)"
-        if (l_wr[1] < l_sh[1] - 0.03) or (r_wr[1] < r_sh[1] - 0.03):
-            status, issue = "wrong", "Wrist too high (not curl form)"
-        if max(l_elbow, r_elbow) > 175:
-            status, issue = "wrong", "Arms too straight (no curl)"
-
-    elif exercise == "Shoulder Press":
-        wrists_above = (l_wr[1] < l_sh[1] - 0.03) or (r_wr[1] < r_sh[1] - 0.03)
-        if not wrists_above:
-            status, issue = "wrong", "Press not overhead enough"
-        if torso_lean > 60:
-            status, issue = "wrong", "Leaning too much while pressing"
-
-    return status, issue
-
-# -------------------- Firestore writer --------------------
-def send_to_firebase(status, exercise, issue):
-    if db is None:
-        return  # Firebase not configured in environment
-
-    try:
-        db.collection("postureLogs").document("latest").set(
-            {
-                "status": status,
-                "exercise": exercise,
-                "issue": issue,
-                "timestamp": firestore.SERVER_TIMESTAMP,
-            },
-            merge=True,
-        )
-
-        if status == "wrong":
-            db.collection("postureHistory").add(
-                {
-                    "status": "wrong",
-                    "exercise": exercise,
-                    "issue": issue,
-                    "timestamp": firestore.SERVER_TIMESTAMP,
-                }
-            )
-    except Exception as e:
-        print("⚠️ Firestore write failed (continuing):", e)
+    exercise, status, issue = result["exercise"], result["status"], result["issue"]
+    previous = sessions.update(session_id, user_id, exercise, status, issue, result.get("reps"))
+    changed = previous != (status, exercise, issue)
+    publish_state(session_id)
+    history_index.record(session_id, exercise, status, issue, changed=changed)
+    return changed
+
+def record_result(session_id, user_id, result):
+    changed = track_state(session_id, user_id, result)
+    send_to_firebase(result["status"], result["exercise"], result["issue"], session_id, user_id, changed)
+
+def finish_frame(session_id, user_id, result):
+    """Session smoothing + state + Firebase (if configured) for a computed frame."""
+    apply_tracking(session_id, result)
+    record_result(session_id, user_id, result)
+    return result
+
+async def store_call(fn, *args):
+    """
+    Run bookkeeping that reads/writes the session store: inline for the
+    in-memory store, on a worker thread when SESSION_STORE does SQLite/Redis
+    I/O, so the event loop never waits on it.
+    """
+    if sessions.kv is None:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
 
 # -------------------- Simple health/status --------------------
 @app.get("/")
 def root():
     return {"ok": True, "msg": "Backend is running"}
 
+@app.get("/healthz")
+def healthz():
+    # Liveness: answers as soon as the process is up, even while models load
+    return {"ok": True}
+
+@app.get("/readyz")
+def readyz():
+    if startup["ready"]:
+        return {"ok": True, **startup}
+    return JSONResponse(status_code=503, content={"ok": False, **startup})
+
 @app.get("/status")
-def api_status():
+def api_status(session_id: str = None):
+    if session_id is not None:
+        state = sessions.get(session_id)
+        if state is None:
+            return {"ok": False, "msg": "Unknown session", "session_id": session_id}
+        return {"ok": True, **state, "tier": tiers.session_tier(session_id)}
+
     # No server webcam mode in deployment
-    return {"running": False, "mode": "frame-upload"}
+    return {
+        "running": False,
+        "mode": "frame-upload",
+        "startup": startup,
+        "inference": executor.stats(),
+        "batching": batcher.stats() if batcher is not None else None,
+        "stream_sessions": active_stream_sessions,
+        "sessions": len(sessions),
+        "session_store": sessions.stats(),
+        "state_bus": state_bus.stats(),
+        "history_index": history_index.stats(),
+        "adaptive": adaptive.stats(),
+        "model_tier": tiers.stats(),
+        "result_cache": result_cache.stats(),
+        "video_jobs": video_jobs.stats(),
+        "landmark_log": landmark_logger.stats() if LANDMARK_LOG else None,
+        "firestore": writer.stats() if db is not None else None,
+    }
+
+@app.get("/config")
+def api_config():
+    # Upload negotiation: clients should resize frames so the short side is
+    # about preferred_input_size, and send back the "roi" of the last response.
+    return {
+        "preferred_input_size": PREFERRED_INPUT_SIZE,
+        "roi_format": "x,y,w,h (normalized 0..1)",
+        "model_tiers": list(TIER_ORDER),
+        "model_tier": tiers.current,
+    }
+
+@app.post("/sessions/{session_id}/tier")
+def set_session_tier(session_id: str, tier: str = Form(...)):
+    """Pin a session to "lite" / "full" / "heavy", or "auto" to follow the automatic tier."""
+    if not valid_session_id(session_id):
+        return {"ok": False, "msg": "Invalid session_id"}
+    try:
+        tiers.set_session(session_id, tier)
+    except ValueError as e:
+        return {"ok": False, "msg": str(e)}
+    return {"ok": True, "session_id": session_id, "tier": tiers.session_tier(session_id)}
+
+@app.get("/metrics")
+def api_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # -------------------- Main endpoint: frontend sends frames --------------------
 @app.post("/process-frame")
-async def process_frame(file: UploadFile = File(...)):
-    data = await file.read()
-    npimg = np.frombuffer(data, np.uint8)
-    frame = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
+async def process_frame(
+    file: UploadFile = File(...),
+    session_id: str = Form(DEFAULT_SESSION),
+    user_id: str = Form(None),
+    roi: str = Form(None),
+    tier: str = Form(None),
+    x_debug_timings: str = Header(None),
+):
+    """
+    Optional roi="x,y,w,h" (normalized, usually the "roi" returned for the
+    previous frame): only that crop of the image is converted and run through pose.
+    Optional tier="lite"|"full"|"heavy" for this frame (default: the session's
+    pinned tier, else the automatic one); the response says which tier ran.
+    Send header "X-Debug-Timings: 1" to get per-stage "timings" (ms) in the response.
+    """
+    t_start = time.perf_counter()
+    metrics.FRAMES.inc()
 
-    if frame is None:
+    if not valid_session_id(session_id):
+        return {"ok": False, "msg": "Invalid session_id"}
+    try:
+        roi = parse_roi(roi)
+    except ValueError:
+        return {"ok": False, "msg": "Invalid roi"}
+    try:
+        tier = tiers.resolve(session_id, tier)
+    except ValueError as e:
+        return {"ok": False, "msg": str(e)}
+    if startup["model"] != "ok":
+        return warming_response()
+
+    with metrics.STAGE_SECONDS.time("upload"):
+        data = await file.read()
+
+    # One 1/8-scale grayscale decode feeds both the motion gate and the cache key
+    gray = await asyncio.to_thread(small_gray, data) if (ADAPTIVE_SKIP or RESULT_CACHE) else None
+    thumb, cached = await store_call(adaptive_check, session_id, gray)
+    if cached is not None:
+        await store_call(record_result, session_id, user_id, cached)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - t_start)
+        return {"ok": True, **cached}
+
+    cache_key = result_cache.key(session_id, gray, roi, tier) if RESULT_CACHE and gray is not None else None
+    result = result_cache.get(cache_key) if cache_key is not None else None
+    if result is None:
+        try:
+            if batcher is not None:
+                result = await batcher.submit(data, roi, tier)
+            else:
+                result = await executor.process(data, roi, tier)
+        except (InferenceBusy, PosePoolExhausted):
+            metrics.BUSY_REJECTIONS.inc()
+            return busy_response()
+
+        if result is None:
+            metrics.INVALID_IMAGES.inc()
+            return {"ok": False, "msg": "Invalid image"}
+        note_first_inference()
+        tiers.observe(tier, (time.perf_counter() - t_start) * 1000)
+        if cache_key is not None:
+            result_cache.put(cache_key, result)
+
+    timings = take_timings(result)
+    log_landmarks(session_id, result)
+
+    t0 = time.perf_counter()
+    await store_call(finish_frame, session_id, user_id, result)
+    timings["record"] = round((time.perf_counter() - t0) * 1000, 3)
+    if ADAPTIVE_SKIP:
+        adaptive.record(session_id, thumb, result, timings)
+    metrics.STAGE_SECONDS.observe(timings["record"] / 1000, "record")
+
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - t_start)
+    if x_debug_timings in ("1", "true", "yes"):
+        result["timings"] = timings
+    return {"ok": True, **result}
+
+# -------------------- Multi-person endpoint: shared camera --------------------
+@app.post("/process-people")
+async def process_people(
+    file: UploadFile = File(...),
+    session_id: str = Form(DEFAULT_SESSION),
+    user_id: str = Form(None),
+    x_debug_timings: str = Header(None),
+):
+    """
+    Like /process-frame for a camera that sees several people (MULTI_PERSON=1).
+    Returns {"people": [{"person_id", "session_id", "exercise", "status", "issue",
+    "issues", "reps", "roi"}, ...]}; person_id stays the same for the same athlete
+    across this session_id's frames, and each person is recorded (state, /events,
+    Firestore) as session "{session_id}-p{person_id}".
+    """
+    t_start = time.perf_counter()
+    metrics.FRAMES.inc()
+
+    if not multi_person.MULTI_PERSON:
+        return {"ok": False, "msg": "Multi-person mode is off (MULTI_PERSON=1)"}
+    if not valid_session_id(session_id):
+        return {"ok": False, "msg": "Invalid session_id"}
+    if startup["model"] != "ok":
+        return warming_response()
+
+    with metrics.STAGE_SECONDS.time("upload"):
+        data = await file.read()
+    try:
+        out = await executor.run(multi_person.run_people_frame, data)
+    except (InferenceBusy, PosePoolExhausted):
+        metrics.BUSY_REJECTIONS.inc()
+        return busy_response()
+    if out is None:
+        metrics.INVALID_IMAGES.inc()
         return {"ok": False, "msg": "Invalid image"}
+    note_first_inference()
+
+    timings = out["timings"]
+    metrics.observe_timings(timings)
+    landmarks, feats = out["landmarks"], out["features"]
+    if not len(landmarks):
+        metrics.NO_LANDMARKS.inc()
+
+    tracker = person_trackers.get(session_id)
+    if tracker is None:
+        tracker = person_trackers[session_id] = multi_person.PersonTracker()
+    ids = tracker.update(landmarks, time.time())
+
+    def finish_people():
+        people = []
+        for k, person_id in enumerate(ids):
+            sub_id = multi_person.person_session(session_id, person_id)
+            result = {name: column[k] for name, column in out["verdicts"].items()}
+            result["roi"] = roi_from_landmarks(landmarks[k])
+            result["features"] = feats[k]
+            result["landmarks"] = landmarks[k]
+            log_landmarks(sub_id, result)
+            finish_frame(sub_id, user_id, result)
+            people.append({"person_id": person_id, "session_id": sub_id, **result})
+        return people
+
+    people = await store_call(finish_people)
+
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - t_start)
+    response = {"ok": True, "count": len(people), "people": people}
+    if x_debug_timings in ("1", "true", "yes"):
+        response["timings"] = timings
+    return response
+
+# -------------------- Landmark-only endpoint: pose already ran on the client --------------------
+@app.post("/process-landmarks")
+async def process_landmarks(request: Request, session_id: str = DEFAULT_SESSION, user_id: str = None):
+    """
+    Body: JSON {"landmarks": [[x, y, z, visibility] x 33], "session_id", "user_id"}
+    or application/octet-stream with 33*4 little-endian float32 (ids as query params).
+    Only classification, form check, tracking and persistence run here.
+    """
+    t_start = time.perf_counter()
+    metrics.FRAMES.inc()
+
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > landmark_input.LANDMARK_MAX_BYTES:
+        return payload_too_large()
+    body = b""
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > landmark_input.LANDMARK_MAX_BYTES:
+            return payload_too_large()
 
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    try:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            obj = json.loads(body)
+            if isinstance(obj, dict):
+                session_id = obj.get("session_id", session_id)
+                user_id = obj.get("user_id", user_id)
+            arr = landmark_input.parse_json(obj)
+        else:
+            arr = landmark_input.parse_binary(body)
+    except ValueError as e:  # includes json.JSONDecodeError
+        metrics.INVALID_LANDMARKS.inc()
+        return {"ok": False, "msg": f"Invalid landmarks: {e}"}
+    except RecursionError:  # e.g. b"[" * 5000 + b"]" * 5000, well under the size limit
+        metrics.INVALID_LANDMARKS.inc()
+        return {"ok": False, "msg": "Invalid landmarks: JSON nested too deeply"}
+
+    if not isinstance(session_id, str) or not valid_session_id(session_id):
+        return {"ok": False, "msg": "Invalid session_id"}
+    if user_id is not None and not isinstance(user_id, str):
+        return {"ok": False, "msg": "Invalid user_id"}
+
+    with metrics.STAGE_SECONDS.time("rules"):
+        result = result_dict(arr, compute_features(arr))
+    log_landmarks(session_id, result)
+    await store_call(finish_frame, session_id, user_id, result)
+
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - t_start)
+    return {"ok": True, **result}
+
+def payload_too_large(limit=None):
+    return JSONResponse(
+        status_code=413,
+        content={"ok": False, "msg": f"Payload over {limit or landmark_input.LANDMARK_MAX_BYTES} bytes"},
+    )
+
+# -------------------- Streaming endpoint: one tracking session per socket --------------------
+@app.websocket("/ws/session")
+async def pose_session(ws: WebSocket, session_id: str = DEFAULT_SESSION, user_id: str = None,
+                       tier: str = None):
+    """
+    Connect as /ws/session?session_id=...&user_id=... (both optional).
+    Client sends each frame as a binary JPEG message; server answers every
+    processed frame with the same JSON as /process-frame. The Pose graph runs
+    in tracking mode (static_image_mode=False) like backend_live.py, so after
+    the first detection it follows the person instead of re-detecting.
+
+    Frames that arrive while the previous one is still being inferred are
+    replaced by the newest one (stale frames are dropped, never queued).
+    The model tier (?tier=..., else the session pin / automatic tier) is fixed
+    when the socket opens.
+    """
+    global active_stream_sessions
 
-    # Process pose
-    with mp_pose.Pose(model_complexity=1) as pose:
-        results = pose.process(frame_rgb)
+    await ws.accept()
+    if not valid_session_id(session_id):
+        await ws.close(code=1008, reason="Invalid session_id")
+        return
+    try:
+        tier = tiers.resolve(session_id, tier)
+    except ValueError:
+        await ws.close(code=1008, reason="Invalid tier")
+        return
+    if active_stream_sessions >= MAX_STREAM_SESSIONS:
+        await ws.close(code=1013, reason="Too many streaming sessions")
+        return
+    if startup["model"] != "ok":
+        await ws.close(code=1013, reason="Server warming up")
+        return
 
-    exercise = "Squat"
-    status = "correct"
-    issue = "—"
+    active_stream_sessions += 1
+    latest = {"data": None, "frame": 0, "dropped": 0, "closed": False, "error": None}
+    ready = asyncio.Event()
+
+    async def reader():
+        # Whatever ends the reader (disconnect, text frame, error) must wake the
+        # main loop, or the session slot and its Pose graph are never released
+        try:
+            while True:
+                message = await ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("bytes")
+                if data is None:
+                    latest["error"] = "Frames must be binary messages"
+                    break
+                if latest["data"] is not None:
+                    latest["dropped"] += 1
+                latest["data"] = data
+                latest["frame"] += 1
+                ready.set()
+        except Exception:
+            pass  # socket already gone
+        finally:
+            latest["closed"] = True
+            ready.set()
+
+    reader_task = asyncio.create_task(reader())
 
-    if results.pose_landmarks:
-        lm = results.pose_landmarks.landmark
-        exercise = classify_exercise(lm)
-        status, issue = check_form(exercise, lm)
+    try:
+        pose = await asyncio.to_thread(create_pose, False, tier)
+        try:
+            while True:
+                await ready.wait()
+                ready.clear()
+                if latest["closed"]:
+                    break
+
+                data, frame = latest["data"], latest["frame"]
+                latest["data"] = None
+
+                metrics.FRAMES.inc()
+                gray = await asyncio.to_thread(small_gray, data) if ADAPTIVE_SKIP else None
+                thumb, cached = await store_call(adaptive_check, session_id, gray)
+                if cached is not None:
+                    await store_call(record_result, session_id, user_id, cached)
+                    await ws.send_json({"ok": True, "frame": frame, "dropped": latest["dropped"], **cached})
+                    continue
+
+                result = await asyncio.to_thread(run_tracked_frame, pose, data)
+                if result is None:
+                    metrics.INVALID_IMAGES.inc()
+                    await ws.send_json({"ok": False, "frame": frame, "msg": "Invalid image"})
+                    continue
+                note_first_inference()
+                result["tier"] = tier
+
+                timings = take_timings(result)
+                log_landmarks(session_id, result)
+                # Same bookkeeping as /process-frame: the Firestore writer is
+                # told what changed according to the session store
+                await store_call(finish_frame, session_id, user_id, result)
+                if ADAPTIVE_SKIP:
+                    adaptive.record(session_id, thumb, result, timings)
+
+                await ws.send_json({"ok": True, "frame": frame, "dropped": latest["dropped"], **result})
+        finally:
+            pose.close()
+        if latest["error"] is not None:
+            await ws.close(code=1003, reason=latest["error"])
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # client went away mid-send
+    finally:
+        reader_task.cancel()
+        active_stream_sessions -= 1
+
+# -------------------- State push: dashboards subscribe to a session --------------------
+def sse_message(state):
+    return f"data: {json.dumps(state)}\n\n"
+
+@app.get("/events")
+async def state_events(session_id: str = DEFAULT_SESSION):
+    """
+    Server-Sent Events (EventSource): the session's current state at once,
+    then one message per change of exercise/status/issue/reps, each the same
+    JSON as /status?session_id=... An idle stream gets the current state again
+    every SSE_KEEPALIVE_S seconds (a comment line while the session has none).
+    """
+    if not valid_session_id(session_id):
+        # Not 200, so EventSource gives up instead of reconnecting
+        return JSONResponse(status_code=400, content={"ok": False, "msg": "Invalid session_id"})
+
+    async def stream():
+        sub = state_bus.subscribe(session_id)
+        try:
+            state = await store_call(sessions.get, session_id)
+            if state is not None:
+                yield sse_message(state)
+            while True:
+                try:
+                    state = await sub.get(SSE_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    state = await store_call(sessions.get, session_id)
+                    yield sse_message(state) if state is not None else ": keepalive\n\n"
+                    continue
+                if state is None:
+                    break
+                yield sse_message(state)
+        finally:
+            state_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/ws/state")
+async def state_socket(ws: WebSocket, session_id: str = DEFAULT_SESSION):
+    """Same stream as GET /events, one JSON message per state (nothing to send back)."""
+    await ws.accept()
+    if not valid_session_id(session_id):
+        await ws.close(code=1008, reason="Invalid session_id")
+        return
+
+    sub = state_bus.subscribe(session_id)
 
-    # Log to Firebase (if configured)
-    send_to_firebase(status, exercise, issue)
+    async def watch_disconnect():
+        try:
+            while (await ws.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sub.put(None)
 
-    return {"ok": True, "exercise": exercise, "status": status, "issue": issue}
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        state = await store_call(sessions.get, session_id)
+        if state is not None:
+            await ws.send_json(state)
+        while True:
+            state = await sub.get()
+            if state is None:
+                break
+            await ws.send_json(state)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # client went away mid-send
+    finally:
+        watcher.cancel()
+        state_bus.unsubscribe(sub)
+
+# -------------------- History aggregates --------------------
+@app.get("/history/summary")
+def history_summary(
+    since: float = None,
+    until: float = None,
+    session_id: str = None,
+    exercise: str = None,
+    issue: str = None,
+    group_by: str = "exercise,issue",
+):
+    """
+    Wrong-posture event counts from the aggregate index, e.g.
+    /history/summary?since=<unix s>&group_by=exercise,issue  (most common issues)
+    /history/summary?session_id=abc&group_by=bucket            (events per hour)
+    group_by: comma-separated subset of session, exercise, issue, bucket ("" = total).
+    Time filters select whole HISTORY_BUCKET_S buckets: every bucket overlapping
+    [since, until), including the one `since` falls in.
+    """
+    cols = tuple(c.strip() for c in group_by.split(",") if c.strip())
+    try:
+        rows = history_index.query(since, until, session_id, exercise, issue, cols)
+    except ValueError as e:
+        return {"ok": False, "msg": str(e)}
+    return {"ok": True, "bucket_s": history_index.bucket_s, "group_by": cols, "rows": rows}
+
+# -------------------- Offline video jobs --------------------
+@app.post("/video-jobs")
+async def create_video_job(file: UploadFile = File(...)):
+    """
+    Upload a whole recorded session; poll GET /video-jobs/{job_id} for progress.
+    Uploading the same file again returns the same job (and resumes it if the
+    server was restarted mid-way). Uploads over VIDEO_MAX_BYTES get a 413.
+    Disk writes and the video probe run on threads, off the event loop.
+    """
+    await asyncio.to_thread(os.makedirs, video_jobs.root, exist_ok=True)
+    digest = hashlib.sha1()
+    size = 0
+    tmp = os.path.join(video_jobs.root, f"upload-{os.getpid()}-{time.time_ns()}.tmp")
+    f = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        while True:
+            chunk = await file.read(1 << 20)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > VIDEO_MAX_BYTES:
+                break
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    if size > VIDEO_MAX_BYTES:
+        await asyncio.to_thread(os.remove, tmp)
+        return payload_too_large(VIDEO_MAX_BYTES)
+
+    job_id = job_id_for(digest)
+    await asyncio.to_thread(os.replace, tmp, video_jobs.paths(job_id)[0])
+    # submit() probes the video (and summarizes a finished timeline) on the calling thread
+    return {"ok": True, **await asyncio.to_thread(video_jobs.submit, job_id)}
+
+@app.get("/video-jobs/{job_id}")
+def get_video_job(job_id: str):
+    job = video_jobs.get(job_id)
+    if job is None:
+        return {"ok": False, "msg": "Unknown job", "job_id": job_id}
+    return {"ok": True, **job}
+
+@app.get("/video-jobs/{job_id}/timeline")
+def get_video_timeline(job_id: str):
+    """The columnar per-frame timeline (.npz, see video_job.save_timeline)."""
+    job = video_jobs.get(job_id)
+    if job is None or job["state"] != "done":
+        return {"ok": False, "msg": "Timeline not ready", "job_id": job_id}
+    return FileResponse(video_jobs.paths(job_id)[1], media_type="application/octet-stream",
+                        filename=f"{job_id}.timeline.npz")
+
+startup["import_ms"] = _ms_since(IMPORT_STARTED)
+print(f"✅ control_server imported in {startup['import_ms']:.0f} ms")
@@ -0,0 +1,109 @@
+# fake_firestore.py
+# In-memory stand-in for the firebase_admin Firestore client, for offline runs:
+# - FIRESTORE_FAKE=1 makes control_server use it instead of real Firestore
+# - Supports the calls the backend makes: collection/document/set/add/get/stream/batch
+#   (plus client.document(path), used when draining the spool)
+# - Counts round trips (commits) and document writes so write volume can be checked
+
+import datetime
+import threading
+import uuid
+
+
+def _resolve(data):
+    from firebase_admin import firestore  # only for the SERVER_TIMESTAMP sentinel
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return {k: (now if v is firestore.SERVER_TIMESTAMP else v) for k, v in data.items()}
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._client, f"{self.path}/{name}")
+
+    def set(self, data, merge=False):
+        self._client._commit([(self.path, data, merge)])
+
+    def get(self):
+        with self._client._lock:
+            data = self._client.docs.get(self.path)
+            return FakeSnapshot(self.id, dict(data) if data is not None else None)
+
+
+class FakeCollection:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    def document(self, doc_id=None):
+        return FakeDocument(self._client, f"{self.path}/{doc_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return datetime.datetime.now(datetime.timezone.utc), ref
+
+    def stream(self):
+        prefix = self.path + "/"
+        with self._client._lock:
+            items = [
+                (path, dict(data)) for path, data in self._client.docs.items()
+                if path.startswith(prefix) and "/" not in path[len(prefix):]
+            ]
+        return [FakeSnapshot(path.rsplit("/", 1)[-1], data) for path, data in items]
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref.path, data, merge))
+
+    def commit(self):
+        self._client._commit(self._ops)
+        self._ops = []
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.commits = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def document(self, path):
+        return FakeDocument(self, path)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def _commit(self, ops):
+        with self._lock:
+            self.commits += 1
+            for path, data, merge in ops:
+                self.writes += 1
+                data = _resolve(data)
+                if merge and path in self.docs:
+                    self.docs[path].update(data)
+                else:
+                    self.docs[path] = data
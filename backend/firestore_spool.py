@@ -0,0 +1,97 @@
+# firestore_spool.py
+# Durable outbox between FirestoreWriter and Firestore, so an outage delays
+# writes instead of losing them:
+# - SQLite in WAL mode (FIRESTORE_SPOOL, default firestore_spool.db); one row
+#   per pending document write, kept until Firestore has acknowledged it
+# - Rows are keyed by document path: a newer state for postureLogs/{session}
+#   replaces the pending one, history events get their document id when
+#   spooled, so re-sending a batch after a failure never duplicates anything
+# - Rows left over from a previous run are drained after a restart
+# - Each replacement bumps the row's version and a drained row is only deleted
+#   if its version is unchanged, so a newer state spooled meanwhile (by this
+#   or another worker process sharing the file) is never lost
+# - Only the writer thread touches it; depth/lag are cached for /metrics
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+FIRESTORE_SPOOL = os.getenv("FIRESTORE_SPOOL", "firestore_spool.db")  # ":memory:" = not durable
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ops (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    path    TEXT NOT NULL UNIQUE,
+    kind    TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    created REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class Spool:
+    def __init__(self, path=FIRESTORE_SPOOL):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(ops)")]
+        if "version" not in columns:  # spool written before versions existed
+            self._conn.execute("ALTER TABLE ops ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._lock = threading.Lock()
+        self.depth = 0
+        self.oldest = None  # created time of the oldest pending row
+        self._refresh()
+
+    def _refresh(self):
+        self.depth, self.oldest = self._conn.execute("SELECT COUNT(*), MIN(created) FROM ops").fetchone()
+
+    def put(self, ops, now=None):
+        """ops: [(path, kind, data)] in one transaction; a pending row for the same path is replaced."""
+        now = time.time() if now is None else now
+        rows = [(path, kind, json.dumps(data), now) for path, kind, data in ops]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                # Replacing keeps the row's id and created time, so a busy
+                # session's latest state is not starved by its own updates
+                self._conn.executemany(
+                    "INSERT INTO ops (path, kind, data, created) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET data = excluded.data, version = version + 1",
+                    rows,
+                )
+            self._refresh()
+
+    def peek(self, limit):
+        """Oldest pending rows: [(id, path, kind, data, version)]."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, path, kind, data, version FROM ops ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, path, kind, json.loads(data), version) for row_id, path, kind, data, version in rows]
+
+    def delete(self, rows):
+        """Remove peeked rows that were sent; rows replaced since the peek stay."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "DELETE FROM ops WHERE id = ? AND version = ?", [(row[0], row[4]) for row in rows]
+                )
+            self._refresh()
+
+    def lag(self, now=None):
+        """Seconds the oldest pending write has been waiting (0 when empty)."""
+        if self.oldest is None:
+            return 0.0
+        return max(0.0, (time.time() if now is None else now) - self.oldest)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,210 @@
+# firestore_writer.py
+# Background Firestore writer so the request path never waits on the network:
+# - submit() only records state in memory and returns
+# - Only state transitions count (same idea as last_status in backend_live.py)
+# - Every FIRESTORE_FLUSH_INTERVAL seconds the newest state of each session is
+#   spooled for postureLogs/{session_id} once (intermediate states are coalesced
+#   away), together with the new "wrong" history entries
+# - The spool (firestore_spool.py, SQLite) is drained to Firestore in batched
+#   writes; on failure the rows stay and the next attempt waits with
+#   exponential backoff (FIRESTORE_RETRY_BASE .. FIRESTORE_RETRY_MAX seconds)
+
+import datetime
+import os
+import threading
+import time
+import uuid
+
+from firestore_spool import FIRESTORE_SPOOL, Spool
+from metrics import FIRESTORE_FAILURES, STAGE_SECONDS
+
+from session_store import DEFAULT_SESSION, history_collection, latest_doc
+
+FIRESTORE_FLUSH_INTERVAL = float(os.getenv("FIRESTORE_FLUSH_INTERVAL", "0.5"))
+FIRESTORE_RETRY_BASE = float(os.getenv("FIRESTORE_RETRY_BASE", "1"))
+FIRESTORE_RETRY_MAX = float(os.getenv("FIRESTORE_RETRY_MAX", "60"))
+
+# Firestore caps a batched write at 500 operations
+MAX_BATCH_OPS = 500
+
+
+def _doc(status, exercise, issue, session_id, user_id, t):
+    # Spooled as JSON; "timestamp" is the event time (unix seconds) so a write
+    # delayed by an outage still carries the time the state was seen
+    data = {
+        "status": status,
+        "exercise": exercise,
+        "issue": issue,
+        "sessionId": session_id,
+        "timestamp": t,
+    }
+    if user_id:
+        data["userId"] = user_id
+    return data
+
+def _firestore_data(data):
+    ts = datetime.datetime.fromtimestamp(data["timestamp"], datetime.timezone.utc)
+    return {**data, "timestamp": ts}
+
+
+class FirestoreWriter:
+    def __init__(self, db, interval=FIRESTORE_FLUSH_INTERVAL, spool_path=FIRESTORE_SPOOL):
+        self.db = db
+        self.interval = interval
+        self.spool_path = spool_path
+        self.spool = None  # opened on the first flush with a client
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._last_state = {}      # session_id -> (status, exercise, issue)
+        self._pending_latest = {}  # session_id -> (state, user_id, t)
+        self._pending_history = [] # (session_id, user_id, state, t)
+
+        self._submitted = 0
+        self._transitions = 0
+        self._coalesced = 0
+        self._latest_writes = 0
+        self._history_writes = 0
+        self._commits = 0
+        self._failures = 0
+        self._failures_in_row = 0
+        self._retry_at = 0.0
+
+    def submit(self, status, exercise, issue, session_id=DEFAULT_SESSION, user_id=None, changed=None):
+        # changed: caller's own transition check (shared session store), else ours
+        state = (status, exercise, issue)
+        t = time.time()
+        with self._lock:
+            self._submitted += 1
+            if changed is None:
+                changed = state != self._last_state.get(session_id)
+            self._last_state[session_id] = state
+            if not changed:
+                return
+            self._transitions += 1
+
+            if session_id in self._pending_latest:
+                self._coalesced += 1
+            self._pending_latest[session_id] = (state, user_id, t)
+
+            if status == "wrong":
+                self._pending_history.append((session_id, user_id, state, t))
+
+    def forget(self, session_id):
+        """Drop transition tracking for a session that went idle."""
+        with self._lock:
+            self._last_state.pop(session_id, None)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="firestore-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after one final flush."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Move pending writes to the spool, then drain it (unless backing off)."""
+        with self._lock:
+            latest, self._pending_latest = self._pending_latest, {}
+            history, self._pending_history = self._pending_history, []
+
+        if self.db is None:
+            return
+        if self.spool is None:
+            self.spool = Spool(self.spool_path)
+            if self.spool.depth:
+                print(f"⏳ Firestore spool: {self.spool.depth} write(s) left from a previous run")
+
+        ops = []
+        for session_id, ((status, exercise, issue), user_id, t) in latest.items():
+            ops.append((
+                latest_doc(self.db, session_id).path,
+                "latest",
+                _doc(status, exercise, issue, session_id, user_id, t),
+            ))
+        for session_id, user_id, (status, exercise, issue), t in history:
+            # Id fixed here, so a retried batch overwrites instead of duplicating
+            ops.append((
+                history_collection(self.db, session_id).document(uuid.uuid4().hex[:20]).path,
+                "history",
+                _doc("wrong", exercise, issue, session_id, user_id, t),
+            ))
+        if ops:
+            self.spool.put(ops)
+
+        if time.monotonic() >= self._retry_at:
+            self.drain()
+
+    def drain(self):
+        """Send spooled writes oldest first; stop at the first failed batch."""
+        while self.spool.depth:
+            rows = self.spool.peek(MAX_BATCH_OPS)
+            try:
+                batch = self.db.batch()
+                for _, path, _, data, _ in rows:
+                    batch.set(self.db.document(path), _firestore_data(data), merge=True)
+                with STAGE_SECONDS.time("firestore_write"):
+                    batch.commit()
+            except Exception as e:
+                self._failures += 1
+                self._failures_in_row += 1
+                FIRESTORE_FAILURES.inc()
+                delay = min(FIRESTORE_RETRY_MAX, FIRESTORE_RETRY_BASE * 2 ** (self._failures_in_row - 1))
+                self._retry_at = time.monotonic() + delay
+                print(f"⚠️ Firestore write failed, {self.spool.depth} write(s) spooled, "
+                      f"retrying in {delay:.1f} s:", e)
+                return
+            self.spool.delete(rows)
+            self._commits += 1
+            self._latest_writes += sum(1 for row in rows if row[2] == "latest")
+            self._history_writes += sum(1 for row in rows if row[2] == "history")
+            if self._failures_in_row:
+                print("✅ Firestore reachable again, draining spool")
+            self._failures_in_row = 0
+            self._retry_at = 0.0
+
+    def spool_depth(self):
+        return self.spool.depth if self.spool is not None else 0
+
+    def spool_lag(self):
+        return round(self.spool.lag(), 3) if self.spool is not None else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "interval_s": self.interval,
+                "spool": self.spool_path,
+                "spool_depth": self.spool_depth(),
+                "spool_lag_s": self.spool_lag(),
+                "retry_in_s": round(max(0.0, self._retry_at - time.monotonic()), 1),
+                "submitted": self._submitted,
+                "sessions": len(self._last_state),
+                "transitions": self._transitions,
+                "coalesced": self._coalesced,
+                "pending_history": len(self._pending_history),
+                "latest_writes": self._latest_writes,
+                "history_writes": self._history_writes,
+                "commits": self._commits,
+                "failures": self._failures,
+            }
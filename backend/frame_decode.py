@@ -0,0 +1,126 @@
+# frame_decode.py
+# Cheap frame decoding for the pose pipeline:
+# - The pose model only looks at ~256 px, so big JPEGs are decoded at 1/2, 1/4
+#   or 1/8 scale (cv2.IMREAD_REDUCED_COLOR_*) instead of full resolution
+# - image_size() reads width/height from the JPEG/PNG header without decoding
+# - An optional ROI (normalized x, y, w, h, usually from the previous frame's
+#   landmarks) limits colour conversion and pose inference to the person's crop
+# - Landmarks found in a crop are mapped back to full-frame coordinates, so the
+#   geometry/rules see the same numbers as without an ROI
+# - cv2 is imported on first decode (the server's startup warm-up), not when
+#   this module is imported
+
+import os
+import struct
+
+import numpy as np
+
+# Clients may resize to this before upload; the server never decodes much above it
+PREFERRED_INPUT_SIZE = int(os.getenv("PREFERRED_INPUT_SIZE", "256"))
+
+# Margin added around the landmark bbox when suggesting the next ROI, and the
+# smallest ROI side accepted (normalized units)
+ROI_MARGIN = 0.15
+MIN_ROI_SIDE = 0.05
+
+# JPEG start-of-frame markers (all SOFn except DHT/JPG/DAC)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_size(data):
+    """(width, height, "jpeg"|"png") from the header, or None if unknown."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        w, h = struct.unpack(">II", data[16:24])
+        return w, h, "png"
+
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    i = 2
+    n = len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            h, w = struct.unpack(">HH", data[i + 5:i + 9])
+            return w, h, "jpeg"
+        seg_len = struct.unpack(">H", data[i + 2:i + 4])[0]
+        i += 2 + seg_len
+    return None
+
+def imread_flag(data, preferred=PREFERRED_INPUT_SIZE):
+    """Largest JPEG reduction that keeps the short side >= preferred."""
+    import cv2
+
+    size = image_size(data)
+    if size is None or size[2] != "jpeg":
+        return cv2.IMREAD_COLOR
+
+    short_side = min(size[0], size[1])
+    for factor, flag in (
+        (8, cv2.IMREAD_REDUCED_COLOR_8),
+        (4, cv2.IMREAD_REDUCED_COLOR_4),
+        (2, cv2.IMREAD_REDUCED_COLOR_2),
+    ):
+        if short_side // factor >= preferred:
+            return flag
+    return cv2.IMREAD_COLOR
+
+def parse_roi(text):
+    """
+    "x,y,w,h" (normalized 0..1) -> clipped (x, y, w, h) tuple.
+    None/"" -> None. Raises ValueError for anything malformed.
+    """
+    if not text:
+        return None
+
+    x, y, w, h = (float(v) for v in text.split(","))
+    if not all(np.isfinite((x, y, w, h))):
+        raise ValueError("roi must be finite")
+
+    x0, y0 = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+    x1, y1 = min(max(x + w, 0.0), 1.0), min(max(y + h, 0.0), 1.0)
+    if x1 - x0 < MIN_ROI_SIDE or y1 - y0 < MIN_ROI_SIDE:
+        raise ValueError("roi too small")
+    return x0, y0, x1 - x0, y1 - y0
+
+def decode_frame(data, roi=None):
+    """JPEG/PNG bytes -> RGB frame (reduced + cropped to roi), or None if not an image."""
+    import cv2
+
+    npimg = np.frombuffer(data, np.uint8)
+    frame = cv2.imdecode(npimg, imread_flag(data))
+    if frame is None:
+        return None
+
+    if roi is not None:
+        h, w = frame.shape[:2]
+        x, y, rw, rh = roi
+        frame = frame[int(y * h):int(np.ceil((y + rh) * h)), int(x * w):int(np.ceil((x + rw) * w))]
+
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+def uncrop_landmarks(arr, roi):
+    """(..., 33, 4) landmarks normalized to the roi crop -> full-frame normalized (in place)."""
+    if roi is not None:
+        x, y, w, h = roi
+        arr[..., 0] = x + arr[..., 0] * w
+        arr[..., 1] = y + arr[..., 1] * h
+    return arr
+
+def roi_from_landmarks(arr, min_visibility=0.5):
+    """Suggested ROI [x, y, w, h] for the next frame: landmark bbox + margin."""
+    visible = arr[arr[:, 3] >= min_visibility]
+    if len(visible) < 4:
+        visible = arr
+
+    x0, y0 = visible[:, 0].min(), visible[:, 1].min()
+    x1, y1 = visible[:, 0].max(), visible[:, 1].max()
+    mx, my = (x1 - x0) * ROI_MARGIN, (y1 - y0) * ROI_MARGIN
+    x0, y0 = max(0.0, x0 - mx), max(0.0, y0 - my)
+    x1, y1 = min(1.0, x1 + mx), min(1.0, y1 + my)
+    return [round(float(v), 4) for v in (x0, y0, x1 - x0, y1 - y0)]
@@ -0,0 +1,79 @@
+# geometry.py
+# Shared, vectorized pose geometry:
+# - landmarks_to_array(): 33 MediaPipe landmarks -> one (33, 4) float32 array [x, y, z, visibility]
+# - compute_features(): every joint angle + torso lean in one numpy pass,
+#   for a single pose (33, 4) or a batch (T, 33, 4)
+# The server rules (posture.py) and the live webcam scripts all read this feature vector.
+
+import numpy as np
+
+# MediaPipe Pose landmark indices (same numbering as pose_test.py CONNECTIONS)
+NUM_LANDMARKS = 33
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+# Joint angles as (a, b, c) triplets -> angle ABC in degrees
+_JOINTS = np.array([
+    (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+])
+
+# Landmark heights (normalized y, smaller = higher) the rules compare directly
+_HEIGHTS = np.array([
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST,
+])
+
+# Feature vector layout
+FEATURE_NAMES = (
+    "l_elbow", "r_elbow", "l_knee", "r_knee",
+    "torso_lean",
+    "l_sh_y", "r_sh_y", "l_el_y", "r_el_y", "l_wr_y", "r_wr_y",
+)
+(F_L_ELBOW, F_R_ELBOW, F_L_KNEE, F_R_KNEE,
+ F_TORSO_LEAN,
+ F_L_SH_Y, F_R_SH_Y, F_L_EL_Y, F_R_EL_Y, F_L_WR_Y, F_R_WR_Y) = range(len(FEATURE_NAMES))
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+def landmarks_to_array(lm):
+    """MediaPipe landmark list -> (33, 4) float32 [x, y, z, visibility]."""
+    return np.array(
+        [(p.x, p.y, p.z, getattr(p, "visibility", 1.0)) for p in lm],
+        dtype=np.float32,
+    )
+
+def joint_angles(a, b, c):
+    """Angle ABC in degrees for (..., 2) point arrays (any matching leading shape)."""
+    ba = np.asarray(a, dtype=np.float32) - np.asarray(b, dtype=np.float32)
+    bc = np.asarray(c, dtype=np.float32) - np.asarray(b, dtype=np.float32)
+    cosine = np.sum(ba * bc, axis=-1) / (
+        np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1) + 1e-6
+    )
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+def compute_features(arr):
+    """
+    (33, 4) -> (NUM_FEATURES,) or (T, 33, 4) -> (T, NUM_FEATURES), float32.
+    Index the result with the F_* constants.
+    """
+    xy = np.asarray(arr, dtype=np.float32)[..., :2]
+    out = np.empty(xy.shape[:-2] + (NUM_FEATURES,), dtype=np.float32)
+
+    out[..., F_L_ELBOW:F_R_KNEE + 1] = joint_angles(
+        xy[..., _JOINTS[:, 0], :], xy[..., _JOINTS[:, 1], :], xy[..., _JOINTS[:, 2], :]
+    )
+
+    # Torso lean: angle of mid-shoulder -> mid-hip line vs horizontal (bigger = steeper)
+    mid_sh = (xy[..., LEFT_SHOULDER, :] + xy[..., RIGHT_SHOULDER, :]) / 2
+    mid_hp = (xy[..., LEFT_HIP, :] + xy[..., RIGHT_HIP, :]) / 2
+    d = mid_hp - mid_sh
+    out[..., F_TORSO_LEAN] = np.abs(np.degrees(np.arctan2(d[..., 1], d[..., 0])))
+
+    out[..., F_L_SH_Y:] = xy[..., _HEIGHTS, 1]
+    return out
@@ -0,0 +1,154 @@
+# history_index.py
+# Aggregated history of wrong-posture events, so dashboard questions
+# ("most common issue per exercise this week") read O(buckets) rows instead
+# of scanning every postureHistory document:
+# - record() sees every processed frame and counts the same events that go to
+#   postureHistory: a transition into a "wrong" (exercise, issue) state
+# - Counts per (session, exercise, issue, HISTORY_BUCKET_S time bucket) are
+#   accumulated in memory and upserted into SQLite (HISTORY_INDEX) every
+#   HISTORY_FLUSH_S seconds and before each query
+# - query() filters by time range / session / exercise / issue and groups by
+#   any of those columns
+
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+
+HISTORY_INDEX = os.getenv("HISTORY_INDEX", "history_index.db")  # ":memory:" = not kept across restarts
+HISTORY_BUCKET_S = int(os.getenv("HISTORY_BUCKET_S", "3600"))
+HISTORY_FLUSH_S = float(os.getenv("HISTORY_FLUSH_S", "5"))
+
+HISTORY_EVENTS = metrics.Counter("posture_history_events_total", "Wrong-posture events counted in the history index")
+
+GROUP_COLUMNS = ("session", "exercise", "issue", "bucket")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS counts (
+        session  TEXT NOT NULL,
+        exercise TEXT NOT NULL,
+        issue    TEXT NOT NULL,
+        bucket   INTEGER NOT NULL,  -- bucket start, unix seconds
+        count    INTEGER NOT NULL,
+        PRIMARY KEY (session, exercise, issue, bucket)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS counts_bucket ON counts (bucket)",
+)
+
+
+class HistoryIndex:
+    def __init__(self, path=HISTORY_INDEX, bucket_s=HISTORY_BUCKET_S):
+        self.path = path
+        self.bucket_s = max(1, int(bucket_s))
+        self._lock = threading.Lock()     # in-memory state, taken on the request path
+        self._db_lock = threading.Lock()  # SQLite connection
+        self._last_state = {}  # session_id -> (status, exercise, issue)
+        self._pending = {}     # (session, exercise, issue, bucket) -> count
+        self._conn = None
+        self.flushes = 0
+
+    def _db(self):
+        if self._conn is None:
+            if self.path != ":memory:" and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+        return self._conn
+
+    def bucket(self, t):
+        return int(t // self.bucket_s) * self.bucket_s
+
+    def record(self, session_id, exercise, status, issue, t=None, changed=None):
+        """
+        Count one event if this frame moved the session into a new wrong state.
+        changed: whether the state changed, when the caller knows better than this
+        process does (frames of a session spread over several workers).
+        """
+        state = (status, exercise, issue)
+        with self._lock:
+            if changed is None:
+                changed = self._last_state.get(session_id) != state
+            self._last_state[session_id] = state
+            if not changed:
+                return
+            if status != "wrong":
+                return
+            key = (session_id, exercise, issue, self.bucket(time.time() if t is None else t))
+            self._pending[key] = self._pending.get(key, 0) + 1
+        HISTORY_EVENTS.inc()
+
+    def forget(self, session_id):
+        """Drop transition tracking for a session that went idle (its counts stay)."""
+        with self._lock:
+            self._last_state.pop(session_id, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO counts (session, exercise, issue, bucket, count) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (session, exercise, issue, bucket) DO UPDATE SET count = count + excluded.count",
+                    [(*key, n) for key, n in pending.items()],
+                )
+            self.flushes += 1
+
+    def query(self, since=None, until=None, session_id=None, exercise=None, issue=None,
+              group_by=("exercise", "issue")):
+        """
+        Event counts grouped by group_by (subset of GROUP_COLUMNS), largest first
+        (in time order when grouped by bucket).
+        since/until are unix seconds; every bucket that overlaps [since, until)
+        counts whole, including the one `since` falls in (since=now-3600 with
+        hourly buckets returns the previous and the current hour).
+        """
+        for col in group_by:
+            if col not in GROUP_COLUMNS:
+                raise ValueError(f"cannot group by {col!r} (use {', '.join(GROUP_COLUMNS)})")
+        where, args = [], []
+        if since is not None:
+            where.append("bucket >= ?")
+            args.append(self.bucket(since))
+        if until is not None:
+            where.append("bucket < ?")
+            args.append(until)
+        for col, value in (("session", session_id), ("exercise", exercise), ("issue", issue)):
+            if value is not None:
+                where.append(f"{col} = ?")
+                args.append(value)
+
+        cols = ", ".join(group_by)
+        sql = f"SELECT {cols + ', ' if cols else ''}SUM(count) AS n FROM counts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group_by:
+            sql += f" GROUP BY {cols}"
+        sql += " ORDER BY bucket, n DESC" if "bucket" in group_by else " ORDER BY n DESC"
+
+        self.flush()
+        with self._db_lock:
+            rows = self._db().execute(sql, args).fetchall()
+        return [dict(zip((*group_by, "count"), row)) for row in rows if row[-1]]
+
+    def stats(self):
+        with self._lock:
+            pending = sum(self._pending.values())
+        return {
+            "path": self.path,
+            "bucket_s": self.bucket_s,
+            "pending_events": pending,
+            "events": HISTORY_EVENTS.value,
+            "flushes": self.flushes,
+        }
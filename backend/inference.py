@@ -0,0 +1,266 @@
+# inference.py
+# Runs the CPU-bound decode -> pose -> classify pipeline off the asyncio loop:
+# - INFER_EXECUTOR=thread  : thread pool + warm PosePool (cv2/MediaPipe release the GIL)
+# - INFER_EXECUTOR=process : process pool, one Pose per worker process (uses all cores)
+# - Backpressure: at most INFER_MAX_QUEUE frames in flight, extra ones get InferenceBusy
+# - Every frame names a model tier (pose_pool.MODEL_TIERS); each tier gets its own
+#   Pose instances, built on first use (the default POSE_MODEL_TIER at startup)
+# Results are dicts: {"exercise", "status", "issue", "issues"} plus "roi" (suggested crop
+# for the next frame) and "features" (the raw geometry row, for per-session
+# smoothing) and "landmarks" (the (33, 4) array, for the landmark log) when a
+# person was found, and "timings" ({stage: ms}, measured on
+# the worker; the server turns these into /metrics histograms).
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from frame_decode import decode_frame, roi_from_landmarks, uncrop_landmarks
+from geometry import compute_features, landmarks_to_array
+from pose_pool import POSE_MODEL_TIER, POSE_POOL_SIZE, PosePool, check_tier, create_pose
+from posture import classify_exercise, evaluate_bulk, form_issues
+
+INFER_EXECUTOR = os.getenv("INFER_EXECUTOR", "thread").strip().lower()
+INFER_WORKERS = int(os.getenv("INFER_WORKERS", str(os.cpu_count() or 1)))
+INFER_MAX_QUEUE = int(os.getenv("INFER_MAX_QUEUE", str(2 * INFER_WORKERS)))
+
+
+class InferenceBusy(Exception):
+    """Raised when the executor already has INFER_MAX_QUEUE frames in flight."""
+
+
+NO_POSE_RESULT = {"exercise": "Squat", "status": "correct", "issue": "—", "issues": ()}
+
+
+# -------------------- Frame pipeline helpers --------------------
+def analyze_features(feat):
+    """One geometry feature row -> {"exercise", "status", "issue", "issues"}."""
+    exercise = classify_exercise(feat)
+    issues = form_issues(exercise, feat)
+    return {
+        "exercise": exercise,
+        "status": "wrong" if issues else "correct",
+        "issue": issues[0] if issues else "—",
+        "issues": issues,
+    }
+
+def pose_array(results, roi=None):
+    """Pose results -> full-frame (33, 4) landmark array, or None if no person."""
+    if not results.pose_landmarks:
+        return None
+    return uncrop_landmarks(landmarks_to_array(results.pose_landmarks.landmark), roi)
+
+def result_dict(arr, feat, verdict=None):
+    result = verdict if verdict is not None else analyze_features(feat)
+    result["roi"] = roi_from_landmarks(arr)
+    result["features"] = feat.tolist()
+    result["landmarks"] = arr
+    return result
+
+def analyze_results(results, roi=None):
+    """Pose results -> result dict."""
+    arr = pose_array(results, roi)
+    if arr is None:
+        return dict(NO_POSE_RESULT)
+    return result_dict(arr, compute_features(arr))
+
+# -------------------- Worker side --------------------
+# Thread mode: workers share one PosePool per tier, sized to the thread count
+# or to POSE_POOL_SIZE when set.
+# Process mode: each worker process builds its own Pose per tier (the default
+# tier in _init_process_worker, others on first use).
+_thread_pose_pools = None  # tier -> PosePool, set by InferenceExecutor.start
+_thread_pools_lock = threading.Lock()
+_process_poses = None      # tier -> Pose
+
+def _init_process_worker():
+    global _process_poses
+    _process_poses = {POSE_MODEL_TIER: create_pose(tier=POSE_MODEL_TIER)}
+    _process_poses[POSE_MODEL_TIER].process(np.zeros((256, 256, 3), dtype=np.uint8))
+
+def _warm_process_worker(_):
+    return os.getpid()
+
+def thread_pose_pool(tier, size):
+    with _thread_pools_lock:
+        pool = _thread_pose_pools.get(tier)
+        if pool is None:
+            pool = _thread_pose_pools[tier] = PosePool(size=size, factory=lambda: create_pose(tier=tier))
+        return pool
+
+@contextmanager
+def _worker_pose(tier=POSE_MODEL_TIER):
+    if _process_poses is not None:
+        pose = _process_poses.get(tier)
+        if pose is None:
+            pose = _process_poses[tier] = create_pose(tier=tier)
+        yield pose
+    else:
+        with thread_pose_pool(tier, _thread_pose_pools[POSE_MODEL_TIER].size).acquire() as pose:
+            yield pose
+
+def _ms(t0, t1):
+    return round((t1 - t0) * 1000, 3)
+
+def run_frame(data, roi=None, tier=POSE_MODEL_TIER):
+    """
+    Full per-frame pipeline, executed on a worker.
+    Returns a result dict, or None if data is not an image.
+    """
+    t0 = time.perf_counter()
+    frame_rgb = decode_frame(data, roi)
+    if frame_rgb is None:
+        return None
+
+    with _worker_pose(tier) as pose:
+        t1 = time.perf_counter()
+        results = pose.process(frame_rgb)
+        t2 = time.perf_counter()
+
+    result = analyze_results(results, roi)
+    result["tier"] = tier
+    result["timings"] = {
+        "decode": _ms(t0, t1), "pose": _ms(t1, t2), "rules": _ms(t2, time.perf_counter()),
+    }
+    return result
+
+def run_batch(items):
+    """
+    run_frame over a micro-batch of (data, roi, tier) on one worker: one Pose
+    checkout per tier and one executor round trip (one pickle/IPC hop in
+    process mode) for K frames.
+    """
+    out = [None] * len(items)
+    found, arrays, timings = [], [], [None] * len(items)
+    by_tier = {}
+    for i, (_, _, tier) in enumerate(items):
+        by_tier.setdefault(tier, []).append(i)
+
+    for tier, indices in by_tier.items():
+        with _worker_pose(tier) as pose:
+            for i in indices:
+                data, roi, _ = items[i]
+                t0 = time.perf_counter()
+                frame_rgb = decode_frame(data, roi)
+                if frame_rgb is None:
+                    continue
+                t1 = time.perf_counter()
+                arr = pose_array(pose.process(frame_rgb), roi)
+                timings[i] = {"decode": _ms(t0, t1), "pose": _ms(t1, time.perf_counter()), "rules": 0.0}
+                if arr is None:
+                    out[i] = dict(NO_POSE_RESULT, tier=tier, timings=timings[i])
+                else:
+                    found.append(i)
+                    arrays.append(arr)
+
+    # Geometry + rules for the whole batch in one (K, 33, 4) pass
+    if arrays:
+        t0 = time.perf_counter()
+        feats = compute_features(np.stack(arrays))
+        cols = evaluate_bulk(feats)
+        for k, (i, arr, feat) in enumerate(zip(found, arrays, feats)):
+            verdict = {name: values[k] for name, values in cols.items()}
+            out[i] = result_dict(arr, feat, verdict)
+            out[i]["tier"] = items[i][2]
+        rules_ms = _ms(t0, time.perf_counter()) / len(found)
+        for i in found:
+            timings[i]["rules"] = round(rules_ms, 3)
+            out[i]["timings"] = timings[i]
+    return out
+
+def run_tracked_frame(pose, data):
+    """Same pipeline on a session-owned tracking Pose (runs in a thread, never pickled)."""
+    t0 = time.perf_counter()
+    frame_rgb = decode_frame(data)
+    if frame_rgb is None:
+        return None
+
+    t1 = time.perf_counter()
+    results = pose.process(frame_rgb)
+    t2 = time.perf_counter()
+
+    result = analyze_results(results)
+    result["timings"] = {
+        "decode": _ms(t0, t1), "pose": _ms(t1, t2), "rules": _ms(t2, time.perf_counter()),
+    }
+    return result
+
+# -------------------- Loop side --------------------
+class InferenceExecutor:
+    def __init__(self, mode=INFER_EXECUTOR, workers=INFER_WORKERS, max_queue=INFER_MAX_QUEUE):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"INFER_EXECUTOR must be 'thread' or 'process', got {mode!r}")
+        self.mode = mode
+        self.workers = max(1, int(workers))
+        self.max_queue = max(self.workers, int(max_queue))
+        self.pose_pool = None
+        self._executor = None
+
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def start(self):
+        global _thread_pose_pools
+
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_process_worker
+            )
+            # Spawn every worker now so model loading happens at startup, not on a request
+            pids = set(self._executor.map(_warm_process_worker, range(self.workers * 4)))
+            print(f"✅ Inference process pool ready ({len(pids)} worker(s))")
+        else:
+            _thread_pose_pools = {}
+            self.pose_pool = thread_pose_pool(POSE_MODEL_TIER, POSE_POOL_SIZE or self.workers)
+            self.pose_pool.warm_up()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+            print(f"✅ Inference thread pool ready ({self.workers} worker(s))")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if _thread_pose_pools:
+            for pool in list(_thread_pose_pools.values()):
+                pool.close()
+
+    def _admit(self):
+        if self._in_flight >= self.max_queue:
+            self._rejected += 1
+            raise InferenceBusy(f"{self._in_flight} frames already in flight")
+        self._in_flight += 1
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the executor, subject to the in-flight limit."""
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+
+    async def process(self, data, roi=None, tier=POSE_MODEL_TIER):
+        return await self.run(run_frame, data, roi, check_tier(tier))
+
+    def stats(self):
+        stats = {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+        if self.pose_pool is not None:
+            stats["pose_pool"] = self.pose_pool.stats()
+            stats["pose_pools"] = {tier: pool.stats() for tier, pool in list(_thread_pose_pools.items())}
+        return stats
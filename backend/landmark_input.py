@@ -0,0 +1,56 @@
+# landmark_input.py
+# Parsing/validation for POST /process-landmarks (pose runs on the client,
+# e.g. MediaPipe in the browser; the server only scores):
+# - JSON: {"landmarks": [[x, y, z, visibility], ... 33 rows]} (or flat 132 numbers)
+# - Binary: application/octet-stream, 33*4 little-endian float32 (528 bytes)
+# - Rows may omit visibility (33*3 values); it is then taken as 1.0
+# - Anything else raises ValueError with a message safe to return to the client
+
+import os
+
+import numpy as np
+
+from geometry import NUM_LANDMARKS
+
+LANDMARK_MAX_BYTES = int(os.getenv("LANDMARK_MAX_BYTES", "16384"))
+
+# Normalized image coordinates; MediaPipe reports slightly off-frame points too
+COORD_LIMIT = 2.0
+Z_LIMIT = 10.0
+
+
+def _to_array(values):
+    arr = np.asarray(values, dtype=np.float32)
+    if arr.size == NUM_LANDMARKS * 4:
+        return arr.reshape(NUM_LANDMARKS, 4)
+    if arr.size == NUM_LANDMARKS * 3:
+        out = np.ones((NUM_LANDMARKS, 4), dtype=np.float32)
+        out[:, :3] = arr.reshape(NUM_LANDMARKS, 3)
+        return out
+    raise ValueError(f"expected {NUM_LANDMARKS}x4 or {NUM_LANDMARKS}x3 values, got {arr.size}")
+
+def validate(arr):
+    if not np.isfinite(arr).all():
+        raise ValueError("landmarks must be finite numbers")
+    if np.abs(arr[:, :2]).max() > COORD_LIMIT or np.abs(arr[:, 2]).max() > Z_LIMIT:
+        raise ValueError("landmark coordinates out of range (expected normalized x, y)")
+    if arr[:, 3].min() < 0.0 or arr[:, 3].max() > 1.0:
+        raise ValueError("visibility must be between 0 and 1")
+    return arr
+
+def parse_json(obj):
+    """Decoded JSON body -> validated (33, 4) float32 array."""
+    values = obj.get("landmarks") if isinstance(obj, dict) else obj
+    if not isinstance(values, list):
+        raise ValueError('missing "landmarks" array')
+    try:
+        arr = _to_array(values)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"bad landmarks: {e}") from None
+    return validate(arr)
+
+def parse_binary(body):
+    """Raw little-endian float32 bytes -> validated (33, 4) float32 array."""
+    if len(body) % 4:
+        raise ValueError("binary landmarks must be float32 values")
+    return validate(_to_array(np.frombuffer(body, dtype="<f4")))
@@ -0,0 +1,280 @@
+# landmark_log.py
+# Raw landmarks per session, kept so old sessions can be re-scored when rules
+# change (opt-in, LANDMARK_LOG=1):
+# - One append-only file per session: LANDMARK_LOG_DIR/{session_id}.lmlog, or
+#   {session_id}.{pid}.lmlog per worker process when WEB_CONCURRENCY > 1, so
+#   workers never append to the same file
+# - 16-byte header (magic, value size, landmarks, fields) then fixed-width
+#   records {t: float64 unix seconds, lm: (33, 4) float16|float32}
+#   (272 bytes per frame in float16)
+# - append() only queues the record; a background thread does the file I/O,
+#   so request handlers never wait on the disk (a full queue drops records)
+# - At most LANDMARK_LOG_MAX_OPEN files are open at once (least recently
+#   written closed first, reopened in append mode when needed), and the logs
+#   in LANDMARK_LOG_DIR are kept under LANDMARK_LOG_MAX_MB by deleting the
+#   least recently modified files
+# - Replay maps the file with numpy.memmap (no parsing, no copy); a partly
+#   written last record is ignored
+#
+#   python landmark_log.py info landmark_logs/abc.lmlog
+#   python landmark_log.py rescore landmark_logs/*.lmlog     # current form_rules.json
+
+import argparse
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from geometry import NUM_LANDMARKS, compute_features
+from rule_engine import RULES
+
+LANDMARK_LOG = os.getenv("LANDMARK_LOG", "0") == "1"
+LANDMARK_LOG_DIR = os.getenv("LANDMARK_LOG_DIR", "landmark_logs")
+LANDMARK_LOG_DTYPE = os.getenv("LANDMARK_LOG_DTYPE", "float16").strip().lower()  # float16 | float32
+LANDMARK_LOG_MAX_OPEN = int(os.getenv("LANDMARK_LOG_MAX_OPEN", "64"))
+LANDMARK_LOG_MAX_MB = float(os.getenv("LANDMARK_LOG_MAX_MB", "1024"))
+LANDMARK_LOG_QUEUE = int(os.getenv("LANDMARK_LOG_QUEUE", "4096"))
+MULTI_WORKER = int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+
+MAGIC = b"PLMLOG01"
+HEADER = struct.Struct("<8sHHI")  # magic, bytes per value, landmarks, fields per landmark
+FIELDS = 4  # x, y, z, visibility
+RECORDS_PER_BUFFER = 64
+
+
+def record_dtype(value_dtype=LANDMARK_LOG_DTYPE, landmarks=NUM_LANDMARKS):
+    return np.dtype([("t", "<f8"), ("lm", np.dtype(value_dtype).newbyteorder("<"), (landmarks, FIELDS))])
+
+
+# -------------------- Writing --------------------
+class LandmarkLogger:
+    """Appends (t, landmarks) records to one buffered file per session, from its own thread."""
+
+    def __init__(self, root=LANDMARK_LOG_DIR, value_dtype=LANDMARK_LOG_DTYPE, per_process=MULTI_WORKER,
+                 max_open=LANDMARK_LOG_MAX_OPEN, max_mb=LANDMARK_LOG_MAX_MB, queue_size=LANDMARK_LOG_QUEUE):
+        self.root = root
+        self.per_process = per_process
+        self.dtype = record_dtype(value_dtype)
+        self._value_size = np.dtype(value_dtype).itemsize
+        self.max_open = max(1, max_open)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._files = OrderedDict()  # session_id -> open file, least recently written first
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._disk_bytes = None  # size of root, scanned on first write
+        self.records = 0
+        self.dropped = 0
+        self.deleted_files = 0
+
+    def path(self, session_id):
+        if self.per_process:
+            return os.path.join(self.root, f"{session_id}.{os.getpid()}.lmlog")
+        return os.path.join(self.root, f"{session_id}.lmlog")
+
+    # --- called from request handlers (any thread) ---
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="landmark-log", daemon=True)
+                self._thread.start()
+
+    def _send(self, item):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def append(self, session_id, t, landmarks):
+        rec = np.empty((), dtype=self.dtype)
+        rec["t"] = t
+        rec["lm"] = landmarks
+        if not self._send(("append", session_id, rec.tobytes())):
+            self.dropped += 1
+
+    def close(self, session_id):
+        self._send(("close", session_id, None))
+
+    def close_all(self):
+        """Write everything queued so far, close every file and stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(("stop", None, None))
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    # --- writer thread ---
+    def _run(self):
+        while True:
+            op, session_id, data = self._queue.get()
+            try:
+                if op == "append":
+                    self._write(session_id, data)
+                elif op == "close":
+                    f = self._files.pop(session_id, None)
+                    if f is not None:
+                        f.close()
+                else:
+                    for f in self._files.values():
+                        f.close()
+                    self._files.clear()
+                    return
+            except (OSError, ValueError) as e:
+                self.dropped += 1
+                print(f"⚠️ Landmark log for {session_id} failed:", e)
+
+    def _write(self, session_id, data):
+        if self._disk_bytes is None:
+            self._disk_bytes = self._dir_bytes()
+        f = self._files.get(session_id)
+        if f is None:
+            while len(self._files) >= self.max_open:
+                self._files.popitem(last=False)[1].close()
+            f = self._files[session_id] = self._open(session_id)
+        else:
+            self._files.move_to_end(session_id)
+        f.write(data)
+        self.records += 1
+        self._disk_bytes += len(data)
+        if self._disk_bytes > self.max_bytes:
+            self._prune()
+
+    def _open(self, session_id):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(session_id)
+        # Buffer holds whole records, so every flush appends complete ones
+        f = open(path, "ab", buffering=self.dtype.itemsize * RECORDS_PER_BUFFER)
+        if f.tell() == 0:
+            f.write(HEADER.pack(MAGIC, self._value_size, NUM_LANDMARKS, FIELDS))
+            f.flush()
+            self._disk_bytes += HEADER.size
+        else:
+            header = read_header(path)
+            if header["value_size"] != self._value_size:
+                f.close()
+                raise ValueError(f"{path} stores {header['value_size'] * 8}-bit values")
+        return f
+
+    def _log_files(self):
+        try:
+            names = [n for n in os.listdir(self.root) if n.endswith(".lmlog")]
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.root, n) for n in names]
+
+    def _dir_bytes(self):
+        return sum(os.path.getsize(p) for p in self._log_files())
+
+    def _prune(self):
+        """Delete the least recently modified logs until the directory is at 90% of the cap."""
+        for f in self._files.values():
+            f.flush()
+        open_paths = {os.path.abspath(f.name): sid for sid, f in self._files.items()}
+        total = self._dir_bytes()
+        for path in sorted(self._log_files(), key=os.path.getmtime):
+            if total <= self.max_bytes * 0.9:
+                break
+            sid = open_paths.get(os.path.abspath(path))
+            if sid is not None:
+                self._files.pop(sid).close()
+            total -= os.path.getsize(path)
+            os.remove(path)
+            self.deleted_files += 1
+        self._disk_bytes = total
+
+    def stats(self):
+        return {
+            "dir": self.root,
+            "open_files": len(self._files),
+            "queued": self._queue.qsize(),
+            "records": self.records,
+            "dropped": self.dropped,
+            "disk_mb": round((self._disk_bytes or 0) / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "deleted_files": self.deleted_files,
+        }
+
+# -------------------- Replay --------------------
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path}: truncated header")
+    magic, value_size, landmarks, fields = HEADER.unpack(raw)
+    if magic != MAGIC or value_size not in (2, 4) or fields != FIELDS:
+        raise ValueError(f"{path}: not a landmark log")
+    return {"value_size": value_size, "landmarks": landmarks}
+
+def open_log(path):
+    """Memory-mapped structured array of records (fields "t" and "lm")."""
+    header = read_header(path)
+    dtype = record_dtype("float16" if header["value_size"] == 2 else "float32", header["landmarks"])
+    n = (os.path.getsize(path) - HEADER.size) // dtype.itemsize
+    if n <= 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(n,))
+
+def rescore(paths, chunk=65536):
+    """
+    Re-run the current rules over logged landmarks, chunk by chunk.
+    Returns frame counts per exercise and per violated rule.
+    """
+    rules = RULES.current()
+    ex_counts = np.zeros(len(rules.exercises), dtype=np.int64)
+    rule_counts = np.zeros(len(rules.rules), dtype=np.int64)
+    frames = 0
+    for path in paths:
+        records = open_log(path)
+        for i in range(0, len(records), chunk):
+            lm = records["lm"][i:i + chunk].astype(np.float32)
+            labels, violated = rules.evaluate(compute_features(lm))
+            ex_counts += np.bincount(labels, minlength=len(rules.exercises))
+            rule_counts += violated.sum(axis=0)
+            frames += len(lm)
+    return {
+        "frames": frames,
+        "exercise_frames": {name: int(n) for name, n in zip(rules.exercises, ex_counts) if n},
+        "rule_frames": {r["id"]: int(n) for r, n in zip(rules.rules, rule_counts) if n},
+    }
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect / re-score landmark logs")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("info", help="record count and time range")
+    p.add_argument("paths", nargs="+")
+    p = sub.add_parser("rescore", help="run the current form rules over the logs")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--chunk", type=int, default=65536)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.cmd == "info":
+            for path in args.paths:
+                records = open_log(path)
+                t = records["t"]
+                span = float(t[-1] - t[0]) if len(t) else 0.0
+                print(f"{path}: {len(records)} frames, {records.dtype['lm'].base}, {span:.1f} s")
+            return 0
+
+        t0 = time.perf_counter()
+        report = rescore(args.paths, args.chunk)
+        elapsed = time.perf_counter() - t0
+        report["fps"] = round(report["frames"] / elapsed) if elapsed else None
+        print(json.dumps(report, indent=2))
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+# live_engine.py
+# Local webcam / video-file pose loop shared by backend_live.py,
+# backend_live_stoppable.py and pose_test.py:
+# - capture and inference run on their own threads, output (overlay, imshow,
+#   Firestore) on the calling thread (HighGUI wants the main thread)
+# - the stages are joined by one-slot "latest frame" queues: a stage that
+#   falls behind gets the newest frame, stale ones are dropped and counted
+#   (lossless=True blocks instead, to process every frame of a video file)
+# - one stop Event for everything: ESC, Ctrl+C, end of video, stop(), or an
+#   optional stop file checked twice a second by a watcher thread
+# - Firestore goes through the background FirestoreWriter (transition-only,
+#   batched), so a slow network never stalls the camera
+#
+#   python live_engine.py                                   # webcam 0, knee check, window
+#   python live_engine.py --source clip.mp4 --headless --lossless --analysis rules
+#   python live_engine.py --backend tasks --tier lite --analysis none   # pose_landmarker_lite.task
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+
+from geometry import F_R_KNEE, compute_features, landmarks_to_array
+from pose_pool import MODEL_TIERS, POSE_MODEL_TIER, TASK_MODELS
+from session_store import DEFAULT_SESSION
+
+# Skeleton drawn on the preview (MediaPipe Pose landmark indices)
+CONNECTIONS = [
+    (11, 12), (11, 13), (13, 15), (12, 14), (14, 16),  # arms
+    (11, 23), (12, 24), (23, 24),                      # torso
+    (23, 25), (25, 27), (24, 26), (26, 28),            # legs
+    (27, 31), (28, 32),                                 # feet
+    (0, 1), (0, 4), (1, 2), (2, 3), (4, 5), (5, 6),     # face (light)
+]
+MIN_DRAW_VISIBILITY = 0.4
+STOP_FILE_POLL_S = 0.5
+
+
+# -------------------- Latest-frame queue --------------------
+class LatestSlot:
+    """Single-item queue: put() replaces an unread item (counted as dropped)."""
+
+    def __init__(self, lossless=False):
+        self.lossless = lossless
+        self.dropped = 0
+        self._item = None
+        self._full = False
+        self._cond = threading.Condition()
+
+    def put(self, item, stop):
+        with self._cond:
+            if self._full:
+                if self.lossless:
+                    while self._full and not stop.is_set():
+                        self._cond.wait(0.1)
+                else:
+                    self.dropped += 1
+            self._item, self._full = item, True
+            self._cond.notify_all()
+
+    def get(self, stop, timeout=0.1):
+        """Next item, or None once `stop` is set and nothing is left."""
+        with self._cond:
+            while not self._full:
+                if stop.is_set():
+                    return None
+                self._cond.wait(timeout)
+            item, self._item, self._full = self._item, None, False
+            self._cond.notify_all()
+            return item
+
+# -------------------- Pose backends --------------------
+class TasksPose:
+    """mediapipe.tasks PoseLandmarker (VIDEO mode) behind the solutions-style process()."""
+
+    def __init__(self, model_path):
+        import mediapipe as mp
+        from mediapipe.tasks import python
+        from mediapipe.tasks.python import vision
+
+        self._mp = mp
+        options = vision.PoseLandmarkerOptions(
+            base_options=python.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+        )
+        self._detector = vision.PoseLandmarker.create_from_options(options)
+        self._last_ts = -1
+
+    def process(self, rgb, timestamp_ms):
+        ts = max(int(timestamp_ms), self._last_ts + 1)  # VIDEO mode needs increasing timestamps
+        self._last_ts = ts
+        image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=rgb)
+        result = self._detector.detect_for_video(image, ts)
+        if not result.pose_landmarks:
+            return SimpleNamespace(pose_landmarks=None)
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=result.pose_landmarks[0]))
+
+    def close(self):
+        self._detector.close()
+
+
+class SolutionsPose:
+    """mp.solutions Pose in tracking mode (what backend_live.py used)."""
+
+    def __init__(self, tier=POSE_MODEL_TIER):
+        from pose_pool import create_pose
+        self._pose = create_pose(False, tier)
+
+    def process(self, rgb, timestamp_ms):
+        return self._pose.process(rgb)
+
+    def close(self):
+        self._pose.close()
+
+# -------------------- Analysis --------------------
+def knee_check(feat):
+    """
+    The original squat demo rule: right knee angle only. The issue text names
+    the limit, not the measured angle, so it stays the same from frame to
+    frame and the writer only sees a transition when the verdict changes.
+    """
+    knee_angle = feat[F_R_KNEE]
+    if knee_angle < 70:
+        return "wrong", "Squat", "Knee too bent (angle < 70)"
+    if knee_angle > 160:
+        return "wrong", "Squat", "Leg too straight (angle > 160)"
+    return "correct", "Squat", "—"
+
+def rules_check(feat):
+    """Same exercise classification + form rules as the server."""
+    from posture import check_form, classify_exercise
+
+    exercise = classify_exercise(feat)
+    status, issue = check_form(exercise, feat)
+    return status, exercise, issue
+
+ANALYSES = {"knee": knee_check, "rules": rules_check, "none": None}
+
+# -------------------- Engine --------------------
+class LiveEngine:
+    def __init__(self, source=0, pose_factory=SolutionsPose, analysis=knee_check, writer=None,
+                 session_id=DEFAULT_SESSION, display=True, lossless=False, stop_file=None,
+                 window="AI Gym Backend (ESC to quit)", on_result=None):
+        self.source = source
+        self.pose_factory = pose_factory
+        self.analysis = analysis
+        self.writer = writer
+        self.session_id = session_id
+        self.display = display
+        self.stop_file = stop_file
+        self.window = window
+        self.on_result = on_result
+
+        self.stop_event = threading.Event()
+        self._frames = LatestSlot(lossless)
+        self._results = LatestSlot(lossless)
+        self._threads = []
+        self._error = None
+        self.counts = {"captured": 0, "inferred": 0, "shown": 0, "with_pose": 0}
+
+    def stop(self):
+        self.stop_event.set()
+
+    # --- stage threads ---
+    def _capture(self, cap, fps):
+        is_file = not isinstance(self.source, int)
+        t0 = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                idx = self.counts["captured"]
+                ts_ms = idx * 1000.0 / fps if is_file else (time.perf_counter() - t0) * 1000.0
+                self.counts["captured"] += 1
+                self._frames.put((idx, ts_ms, frame), self.stop_event)
+        finally:
+            self._capture_done.set()
+
+    def _infer(self):
+        try:
+            pose = self.pose_factory()
+        except Exception as e:
+            self._error = e
+            self.stop_event.set()
+            self._infer_done.set()
+            return
+        try:
+            while True:
+                item = self._frames.get(self._capture_done)
+                if item is None or self.stop_event.is_set():
+                    break
+                idx, ts_ms, frame = item
+                results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), ts_ms)
+                lm = results.pose_landmarks.landmark if results.pose_landmarks else None
+                verdict = None
+                if lm is not None and self.analysis is not None:
+                    verdict = self.analysis(compute_features(landmarks_to_array(lm)))
+                self.counts["inferred"] += 1
+                self._results.put((idx, frame, lm, verdict), self.stop_event)
+        finally:
+            pose.close()
+            self._infer_done.set()
+
+    def _watch_stop_file(self):
+        while not self.stop_event.wait(STOP_FILE_POLL_S):
+            if os.path.exists(self.stop_file):
+                print("🛑 Stop requested. Closing backend...")
+                self.stop_event.set()
+
+    # --- output (calling thread) ---
+    def _draw(self, frame, lm, verdict):
+        if lm is not None:
+            h, w = frame.shape[:2]
+            pts = [(int(p.x * w), int(p.y * h)) if getattr(p, "visibility", 1.0) >= MIN_DRAW_VISIBILITY else None
+                   for p in lm]
+            for a, b in CONNECTIONS:
+                if pts[a] is not None and pts[b] is not None:
+                    cv2.line(frame, pts[a], pts[b], (255, 255, 255), 2)
+            for p in pts:
+                if p is not None:
+                    cv2.circle(frame, p, 4, (0, 255, 0), -1)
+        if verdict is not None:
+            status, _, issue = verdict
+            cv2.putText(frame, f"Status: {status}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1,
+                        (0, 255, 0) if status == "correct" else (0, 0, 255), 2)
+            cv2.putText(frame, f"Issue: {issue}", (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        elif lm is not None:
+            cv2.putText(frame, "POSE DETECTED", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+    def _output(self):
+        while True:
+            item = self._results.get(self._infer_done)
+            if item is None or self.stop_event.is_set():
+                break
+            idx, frame, lm, verdict = item
+            self.counts["shown"] += 1
+            if lm is not None:
+                self.counts["with_pose"] += 1
+
+            # No person: same default the old loops reported
+            status, exercise, issue = verdict if verdict is not None else ("correct", "Squat", "—")
+            if self.writer is not None and self.analysis is not None:
+                self.writer.submit(status, exercise, issue, self.session_id)
+            if self.on_result is not None:
+                self.on_result(idx, lm, verdict)
+
+            if self.display:
+                self._draw(frame, lm, verdict)
+                cv2.imshow(self.window, frame)
+                if cv2.waitKey(1) & 0xFF == 27:  # ESC
+                    self.stop_event.set()
+
+    def run(self):
+        """Blocks until stopped or the source ends; returns stats."""
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            print(f"❌ Cannot open source {self.source!r}")
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+        if self.stop_file and os.path.exists(self.stop_file):
+            os.remove(self.stop_file)  # leftover from the previous run
+
+        self._capture_done = threading.Event()
+        self._infer_done = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture, args=(cap, fps), name="live-capture", daemon=True),
+            threading.Thread(target=self._infer, name="live-infer", daemon=True),
+        ]
+        if self.stop_file:
+            self._threads.append(threading.Thread(target=self._watch_stop_file, name="live-stopfile", daemon=True))
+
+        t0 = time.perf_counter()
+        for t in self._threads:
+            t.start()
+        try:
+            self._output()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            for t in self._threads:
+                t.join(timeout=5)
+            cap.release()
+            if self.display:
+                cv2.destroyAllWindows()
+            if self.writer is not None:
+                self.writer.flush()
+
+        if self._error is not None:
+            print("❌ Pose backend failed:", self._error)
+        elapsed = time.perf_counter() - t0
+        return {
+            **self.counts,
+            "dropped_before_infer": self._frames.dropped,
+            "dropped_before_output": self._results.dropped,
+            "seconds": round(elapsed, 2),
+            "fps": round(self.counts["shown"] / elapsed, 1) if elapsed else None,
+        }
+
+# -------------------- Firestore --------------------
+def make_writer(key_path):
+    """FirestoreWriter on the local service account key (or FIRESTORE_FAKE=1), or None."""
+    from firestore_writer import FirestoreWriter
+
+    if os.getenv("FIRESTORE_FAKE", "0") == "1":
+        from fake_firestore import FakeFirestore
+        return FirestoreWriter(FakeFirestore())
+    if not key_path or not os.path.exists(key_path):
+        print(f"⚠️ Firebase disabled: {key_path} not found")
+        return None
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(key_path))
+    return FirestoreWriter(firestore.client())
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live pose loop (webcam or video file)")
+    parser.add_argument("--source", default="0", help="camera index or video file")
+    parser.add_argument("--backend", choices=("solutions", "tasks"), default="solutions")
+    parser.add_argument("--tier", choices=tuple(MODEL_TIERS), default=POSE_MODEL_TIER,
+                        help="model_complexity (solutions) or pose_landmarker_<tier>.task (tasks)")
+    parser.add_argument("--model", help="model file for --backend tasks (overrides --tier)")
+    parser.add_argument("--analysis", choices=tuple(ANALYSES), default="knee")
+    parser.add_argument("--session-id", default=os.getenv("POSTURE_SESSION_ID", DEFAULT_SESSION))
+    parser.add_argument("--firebase-key", default="serviceAccountKey.json")
+    parser.add_argument("--no-firebase", action="store_true")
+    parser.add_argument("--headless", action="store_true", help="no window (tests, servers)")
+    parser.add_argument("--lossless", action="store_true", help="process every frame instead of the latest")
+    parser.add_argument("--stop-file", help="stop when this file appears")
+    parser.add_argument("--window", default="AI Gym Backend (ESC to quit)")
+    args = parser.parse_args(argv)
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    if args.backend == "tasks":
+        def pose_factory():
+            return TasksPose(args.model or TASK_MODELS[args.tier])
+    else:
+        def pose_factory():
+            return SolutionsPose(args.tier)
+
+    analysis = ANALYSES[args.analysis]
+    writer = None if args.no_firebase or analysis is None else make_writer(args.firebase_key)
+    if writer is not None:
+        writer.start()
+
+    engine = LiveEngine(source, pose_factory, analysis, writer, args.session_id,
+                        display=not args.headless, lossless=args.lossless,
+                        stop_file=args.stop_file, window=args.window)
+    signal.signal(signal.SIGTERM, lambda *_: engine.stop())
+    try:
+        stats = engine.run()
+    finally:
+        if writer is not None:
+            writer.stop()
+    if stats is None:
+        return 1
+    print("✅ Stopped:", stats)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# metrics.py
+# Tiny Prometheus-format metrics (no extra dependency):
+# - Counter / Gauge / Histogram, each guarded by its own lock
+# - render() produces the text exposition format served on GET /metrics
+# - Pipeline stage timings are measured where the work runs (possibly in a
+#   worker process), shipped back with the result, and observed here
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; pose inference is usually 10-100 ms, Firestore round trips 50-500 ms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry = []
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self._value}",
+        ]
+
+
+class Gauge:
+    """Value read from a callback at scrape time (queue depths, pool usage...)."""
+
+    def __init__(self, name, help_text, fn=None):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        _registry.append(self)
+
+    def render(self):
+        value = self.fn() if self.fn is not None else 0
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {value}",
+        ]
+
+
+class Histogram:
+    def __init__(self, name, help_text, label=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label value -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, seconds, label_value=None):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def time(self, label_value=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, label_value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items(), key=lambda kv: str(kv[0]))
+            for label_value, series in items:
+                base = [(self.label, label_value)] if self.label else []
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_fmt_labels(base + [('le', bound)])} {count}")
+                count = series[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_fmt_labels(base + [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_fmt_labels(base)} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{_fmt_labels(base)} {count}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# -------------------- Pipeline metrics --------------------
+STAGE_SECONDS = Histogram(
+    "posture_stage_seconds", "Time spent per pipeline stage", label="stage"
+)
+REQUEST_SECONDS = Histogram(
+    "posture_request_seconds", "End-to-end /process-frame handler time"
+)
+FRAMES = Counter("posture_frames_total", "Frames received")
+INVALID_IMAGES = Counter("posture_invalid_images_total", "Uploads that were not decodable images")
+INVALID_LANDMARKS = Counter("posture_invalid_landmarks_total", "Landmark uploads that failed validation")
+NO_LANDMARKS = Counter("posture_no_landmark_frames_total", "Frames where no person was detected")
+BUSY_REJECTIONS = Counter("posture_busy_rejections_total", "Frames rejected with 503 (queue full)")
+FIRESTORE_FAILURES = Counter("posture_firestore_failures_total", "Failed Firestore batched writes")
+
+def observe_timings(timings_ms):
+    """Record a {stage: milliseconds} dict coming back from a worker."""
+    for stage, ms in timings_ms.items():
+        STAGE_SECONDS.observe(ms / 1000.0, stage)
@@ -0,0 +1,110 @@
+# model_tier.py
+# Which pose model tier (lite / full / heavy, pose_pool.MODEL_TIERS) a frame runs on:
+# - Per request ("tier" form field / query param) > per session preference
+#   (POST /sessions/{id}/tier) > the automatic tier
+# - Automatic tier (AUTO_TIER=1): starts at POSE_MODEL_TIER, steps one tier
+#   lighter when p95 request latency over the last TIER_WINDOW computed frames
+#   is above LATENCY_BUDGET_MS, and one tier heavier (never above
+#   POSE_MODEL_TIER) when p95 is under TIER_HEADROOM x budget; at most one
+#   step per TIER_COOLDOWN_S
+
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+from pose_pool import MODEL_TIERS, POSE_MODEL_TIER, check_tier
+
+AUTO_TIER = os.getenv("AUTO_TIER", "1") == "1"
+LATENCY_BUDGET_MS = float(os.getenv("LATENCY_BUDGET_MS", "150"))
+TIER_WINDOW = int(os.getenv("TIER_WINDOW", "200"))
+TIER_MIN_SAMPLES = int(os.getenv("TIER_MIN_SAMPLES", "50"))
+TIER_HEADROOM = float(os.getenv("TIER_HEADROOM", "0.5"))
+TIER_COOLDOWN_S = float(os.getenv("TIER_COOLDOWN_S", "10"))
+
+TIER_ORDER = tuple(sorted(MODEL_TIERS, key=MODEL_TIERS.get))  # lightest first
+
+TIER_SWITCHES = metrics.Counter("posture_model_tier_switches_total", "Automatic model tier changes")
+
+
+class TierPolicy:
+    def __init__(self, max_tier=POSE_MODEL_TIER, budget_ms=LATENCY_BUDGET_MS, window=TIER_WINDOW,
+                 min_samples=TIER_MIN_SAMPLES, headroom=TIER_HEADROOM, cooldown=TIER_COOLDOWN_S,
+                 auto=AUTO_TIER):
+        self.max_tier = check_tier(max_tier)
+        self.current = self.max_tier
+        self.budget_ms = budget_ms
+        self.min_samples = max(1, min(min_samples, window))
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.auto = auto
+        self._samples = deque(maxlen=window)
+        self._changed_at = time.monotonic()
+        self._prefs = {}  # session_id -> tier
+        self._lock = threading.Lock()
+
+    def resolve(self, session_id, requested=None):
+        """Tier for one frame; raises ValueError for an unknown requested tier."""
+        if requested and requested != "auto":
+            return check_tier(requested)
+        return self._prefs.get(session_id, self.current)
+
+    def set_session(self, session_id, tier):
+        """Pin a session to a tier ("auto" or None: follow the automatic tier)."""
+        with self._lock:
+            if tier in (None, "auto"):
+                self._prefs.pop(session_id, None)
+            else:
+                self._prefs[session_id] = check_tier(tier)
+
+    def session_tier(self, session_id):
+        return self._prefs.get(session_id, "auto")
+
+    def forget(self, session_id):
+        with self._lock:
+            self._prefs.pop(session_id, None)
+
+    def observe(self, tier, latency_ms):
+        """Latency of one frame that ran pose; only frames on the automatic tier count."""
+        if not self.auto or tier != self.current:
+            return
+        with self._lock:
+            self._samples.append(latency_ms)
+            if len(self._samples) < self.min_samples:
+                return
+            now = time.monotonic()
+            if now - self._changed_at < self.cooldown:
+                return
+            p95 = float(np.percentile(self._samples, 95))
+            idx = TIER_ORDER.index(self.current)
+            if p95 > self.budget_ms and idx > 0:
+                new = TIER_ORDER[idx - 1]
+            elif p95 < self.budget_ms * self.headroom and idx < TIER_ORDER.index(self.max_tier):
+                new = TIER_ORDER[idx + 1]
+            else:
+                return
+            old, self.current = self.current, new
+            self._samples.clear()
+            self._changed_at = now
+        TIER_SWITCHES.inc()
+        print(f"⚠️ Model tier {old} -> {new} (p95 {p95:.0f} ms, budget {self.budget_ms:.0f} ms)")
+
+    def p95(self):
+        with self._lock:
+            samples = list(self._samples)
+        return round(float(np.percentile(samples, 95)), 1) if samples else None
+
+    def stats(self):
+        return {
+            "auto": self.auto,
+            "current": self.current,
+            "max_tier": self.max_tier,
+            "budget_ms": self.budget_ms,
+            "p95_ms": self.p95(),
+            "samples": len(self._samples),
+            "switches": TIER_SWITCHES.value,
+            "pinned_sessions": len(self._prefs),
+        }
@@ -0,0 +1,193 @@
+# multi_person.py
+# Several athletes in one frame (shared gym camera), for POST /process-people:
+# - MediaPipe Tasks PoseLandmarker with num_poses=MULTI_NUM_POSES (IMAGE mode,
+#   MULTI_POSE_MODEL .task file, default: the POSE_MODEL_TIER one), pooled per
+#   worker like pose_pool.py
+# - Geometry + exercise/form rules for every detected person in one
+#   (P, 33, 4) pass (posture.evaluate_bulk)
+# - PersonTracker keeps identities across a camera session's frames: greedy
+#   matching on bounding-box IoU, falling back to mean landmark distance
+#   (P x T matrices, no per-landmark Python loops)
+# - The server scores each tracked person as sub-session "{session_id}-p{id}",
+#   so smoothing, reps, /status, /events and Firestore all work per person
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from frame_decode import decode_frame
+from geometry import NUM_LANDMARKS, compute_features
+from inference import INFER_WORKERS
+from pose_pool import POSE_MODEL_TIER, TASK_MODELS, PosePool
+from posture import evaluate_bulk
+
+MULTI_PERSON = os.getenv("MULTI_PERSON", "0") == "1"
+MULTI_POSE_MODEL = os.getenv("MULTI_POSE_MODEL", TASK_MODELS[POSE_MODEL_TIER])
+MULTI_NUM_POSES = int(os.getenv("MULTI_NUM_POSES", "4"))
+
+# Identity matching (normalized image coordinates)
+TRACK_MIN_IOU = float(os.getenv("TRACK_MIN_IOU", "0.3"))
+TRACK_MAX_DIST = float(os.getenv("TRACK_MAX_DIST", "0.08"))
+TRACK_MAX_AGE_S = float(os.getenv("TRACK_MAX_AGE_S", "2"))
+
+
+def person_session(session_id, person_id):
+    return f"{session_id}-p{person_id}"
+
+
+# -------------------- Detection (worker side) --------------------
+class MultiPose:
+    """PoseLandmarker (IMAGE mode, num_poses people) behind a pool-friendly process()."""
+
+    def __init__(self, model_path=MULTI_POSE_MODEL, num_poses=MULTI_NUM_POSES):
+        import mediapipe as mp
+        from mediapipe.tasks import python
+        from mediapipe.tasks.python import vision
+
+        self._mp = mp
+        options = vision.PoseLandmarkerOptions(
+            base_options=python.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.IMAGE,
+            num_poses=num_poses,
+        )
+        self._detector = vision.PoseLandmarker.create_from_options(options)
+
+    def process(self, rgb):
+        """RGB frame -> (P, 33, 4) float32 landmarks, one row per person found."""
+        image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb))
+        people = self._detector.detect(image).pose_landmarks
+        out = np.empty((len(people), NUM_LANDMARKS, 4), dtype=np.float32)
+        for i, lm in enumerate(people):
+            out[i] = [(p.x, p.y, p.z, 1.0 if p.visibility is None else p.visibility) for p in lm]
+        return out
+
+    def close(self):
+        self._detector.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _landmarker_pool():
+    # Built on first use in whichever worker (thread pool or process) runs it
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PosePool(size=INFER_WORKERS, factory=MultiPose)
+        return _pool
+
+def warm_up():
+    _landmarker_pool().warm_up()
+
+def _ms(t0, t1):
+    return round((t1 - t0) * 1000, 3)
+
+def run_people_frame(data):
+    """
+    Decode -> multi-person pose -> rules for everyone, executed on a worker.
+    Returns {"landmarks": (P, 33, 4), "features": (P, F), "verdicts": columns,
+    "timings"}, or None if data is not an image.
+    """
+    t0 = time.perf_counter()
+    frame_rgb = decode_frame(data)
+    if frame_rgb is None:
+        return None
+
+    with _landmarker_pool().acquire() as landmarker:
+        t1 = time.perf_counter()
+        people = landmarker.process(frame_rgb)
+        t2 = time.perf_counter()
+
+    feats = compute_features(people)
+    verdicts = evaluate_bulk(feats) if len(people) else {}
+    return {
+        "landmarks": people,
+        "features": feats,
+        "verdicts": verdicts,
+        "timings": {"decode": _ms(t0, t1), "pose": _ms(t1, t2), "rules": _ms(t2, time.perf_counter())},
+    }
+
+# -------------------- Identity tracking (server side) --------------------
+def bboxes(people, min_visibility=0.5):
+    """(P, 33, 4) -> (P, 4) [x0, y0, x1, y1] over visible landmarks (all of them if < 4 are)."""
+    vis = people[..., 3] >= min_visibility
+    vis[vis.sum(axis=1) < 4] = True
+    x, y = people[..., 0], people[..., 1]
+    return np.stack([
+        np.where(vis, x, np.inf).min(axis=1), np.where(vis, y, np.inf).min(axis=1),
+        np.where(vis, x, -np.inf).max(axis=1), np.where(vis, y, -np.inf).max(axis=1),
+    ], axis=1)
+
+def iou_matrix(a, b):
+    """(N, 4) x (M, 4) boxes -> (N, M) intersection over union."""
+    w = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    h = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = w * h
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class PersonTracker:
+    """Stable small-integer ids for the people of one camera session."""
+
+    def __init__(self, min_iou=TRACK_MIN_IOU, max_dist=TRACK_MAX_DIST, max_age=TRACK_MAX_AGE_S):
+        self.min_iou = min_iou
+        self.max_dist = max_dist
+        self.max_age = max_age
+        self._ids = np.empty(0, dtype=np.int64)
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._points = np.empty((0, NUM_LANDMARKS, 2), dtype=np.float32)
+        self._seen = np.empty(0, dtype=np.float64)
+        self._next_id = 1
+        self.last_seen = 0.0
+
+    def update(self, people, t):
+        """Match (P, 33, 4) detections to the known tracks; returns one id per detection."""
+        self.last_seen = t
+        live = t - self._seen <= self.max_age
+        self._ids, self._boxes, self._points, self._seen = (
+            self._ids[live], self._boxes[live], self._points[live], self._seen[live]
+        )
+
+        boxes = bboxes(people)
+        points = people[..., :2]
+        assigned = np.full(len(people), -1, dtype=np.int64)  # detection -> track index
+
+        if len(people) and len(self._ids):
+            iou = iou_matrix(boxes, self._boxes)
+            dist = np.abs(points[:, None] - self._points[None]).mean(axis=(2, 3))
+            ok = (iou >= self.min_iou) | (dist <= self.max_dist)
+            cost = np.where(ok, (1.0 - iou) + dist, np.inf)
+            used = np.zeros(len(self._ids), dtype=bool)
+            # Greedy: best pair first; P and T are a handful of people
+            for flat in np.argsort(cost, axis=None):
+                d, k = divmod(int(flat), len(self._ids))
+                if not np.isfinite(cost[d, k]):
+                    break
+                if assigned[d] < 0 and not used[k]:
+                    assigned[d] = k
+                    used[k] = True
+
+        matched = assigned >= 0
+        idx = assigned[matched]
+        self._boxes[idx] = boxes[matched]
+        self._points[idx] = points[matched]
+        self._seen[idx] = t
+
+        ids = np.where(matched, self._ids[np.maximum(assigned, 0)] if len(self._ids) else 0, 0)
+        new = ~matched
+        if new.any():
+            new_ids = np.arange(self._next_id, self._next_id + int(new.sum()))
+            self._next_id += len(new_ids)
+            ids[new] = new_ids
+            self._ids = np.concatenate([self._ids, new_ids])
+            self._boxes = np.concatenate([self._boxes, boxes[new]])
+            self._points = np.concatenate([self._points, points[new]])
+            self._seen = np.concatenate([self._seen, np.full(len(new_ids), t)])
+        return ids.tolist()
+
+    def __len__(self):
+        return len(self._ids)
@@ -0,0 +1,159 @@
+# pose_pool.py
+# Bounded pool of long-lived MediaPipe Pose instances for the FastAPI server:
+# - Building a Pose graph costs more than running it, so build a few once
+# - Each request checks one instance out, uses it, and hands it back
+# - warm_up() builds every instance at startup and runs a blank frame through it
+# - stats() reports utilisation so the pool can be sized vs uvicorn workers
+# - create_pose() takes a model tier: lite / full / heavy (model_complexity 0 / 1 / 2)
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Pose instances per tier in thread mode; 0 = one per inference thread
+# (INFER_WORKERS). Fewer saves memory, and busy threads then wait for one.
+POSE_POOL_SIZE = int(os.getenv("POSE_POOL_SIZE", "0"))
+POSE_POOL_TIMEOUT = float(os.getenv("POSE_POOL_TIMEOUT", "5"))
+
+# Pose model tiers, lightest first: model_complexity for mp.solutions Pose,
+# and the matching PoseLandmarker model file for the Tasks API
+MODEL_TIERS = {"lite": 0, "full": 1, "heavy": 2}
+TASK_MODELS = {tier: f"pose_landmarker_{tier}.task" for tier in MODEL_TIERS}
+POSE_MODEL_TIER = os.getenv("POSE_MODEL_TIER", "full").strip().lower()
+
+
+class PosePoolExhausted(Exception):
+    """Raised when no Pose instance became free within the checkout timeout."""
+
+
+_mp_pose = None
+
+def _pose_solution():
+    # mediapipe is the slowest import in the server, so load it on first use
+    # (the startup warm-up thread), not when this module is imported
+    global _mp_pose
+    if _mp_pose is None:
+        t0 = time.perf_counter()
+        import mediapipe as mp
+        _mp_pose = mp.solutions.pose
+        print(f"✅ MediaPipe loaded in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return _mp_pose
+
+def check_tier(tier):
+    if tier not in MODEL_TIERS:
+        raise ValueError(f"model tier must be one of {', '.join(MODEL_TIERS)}, got {tier!r}")
+    return tier
+
+def create_pose(static_image_mode=True, tier=POSE_MODEL_TIER):
+    # static_image_mode=True: pooled instances are shared by unrelated uploads,
+    # so they must not carry tracking state from one client's frame to the next.
+    # Streaming sessions own their instance and pass False to get tracking mode.
+    return _pose_solution().Pose(
+        static_image_mode=static_image_mode, model_complexity=MODEL_TIERS[check_tier(tier)]
+    )
+
+
+class PosePool:
+    def __init__(self, size, factory=create_pose, timeout=POSE_POOL_TIMEOUT):
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._factory = factory
+        # LIFO: the most recently used instance is the one with warm caches
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+
+    def _try_create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def warm_up(self):
+        """Build every instance up front and push one blank frame through each."""
+        blank = np.zeros((256, 256, 3), dtype=np.uint8)
+        while True:
+            pose = self._try_create()
+            if pose is None:
+                break
+            pose.process(blank)
+            self._idle.put(pose)
+        print(f"✅ Pose pool warmed up ({self._created} instance(s))")
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        pose = self._try_create()
+        if pose is not None:
+            return pose
+
+        t0 = time.perf_counter()
+        try:
+            pose = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PosePoolExhausted(f"no Pose instance free after {self.timeout}s")
+        with self._lock:
+            self._waits += 1
+            self._wait_seconds += time.perf_counter() - t0
+        return pose
+
+    @contextmanager
+    def acquire(self):
+        pose = self._checkout()
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        try:
+            yield pose
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(pose)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "utilisation": round(self._in_use / self.size, 3),
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "avg_wait_ms": round(1000 * self._wait_seconds / self._waits, 2) if self._waits else 0.0,
+                "timeouts": self._timeouts,
+            }
+
+    def close(self):
+        while True:
+            try:
+                pose = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            pose.close()
+            with self._lock:
+                self._created -= 1
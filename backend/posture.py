@@ -0,0 +1,50 @@
+# posture.py
+# Rule-based exercise classification + form checks on the shared pose feature
+# vector (geometry.compute_features). Kept free of server/Firebase side effects
+# so inference workers (threads or separate processes) can import it cheaply.
+# The thresholds live in form_rules.json (compiled by rule_engine.py).
+
+import numpy as np
+
+from rule_engine import RULES
+
+# -------------------- Exercise classification --------------------
+def classify_exercise(feat):
+    """
+    Rule-based exercise guess (front camera works best).
+    feat: one row of geometry.compute_features().
+    Returns one of: "Squat", "Deadlift", "Bicep Curl", "Shoulder Press"
+    """
+    rules = RULES.current()
+    return rules.exercises[rules.classify(feat)[0]]
+
+# -------------------- Form checks --------------------
+def form_issues(exercise, feat):
+    """Every violated form rule for `exercise`, most important first."""
+    rules = RULES.current()
+    label = rules.label_index(exercise)
+    return rules.issues(rules.violations(feat, [label])[0])
+
+def check_form(exercise, feat):
+    """(status, issue) where issue is the first violated rule."""
+    issues = form_issues(exercise, feat)
+    if issues:
+        return "wrong", issues[0]
+    return "correct", "—"
+
+# -------------------- Bulk scoring --------------------
+def evaluate_bulk(feats):
+    """
+    (N, NUM_FEATURES) features -> columns {"exercise", "status", "issue", "issues"}
+    scored in one vectorized pass (recorded sessions, micro-batches).
+    """
+    rules = RULES.current()
+    labels, violated = rules.evaluate(feats)
+    names = np.asarray(rules.exercises, dtype=object)[labels]
+    issues = [rules.issues(row) for row in violated]
+    return {
+        "exercise": names.tolist(),
+        "status": ["wrong" if i else "correct" for i in issues],
+        "issue": [i[0] if i else "—" for i in issues],
+        "issues": issues,
+    }
@@ -0,0 +1,89 @@
+# result_cache.py
+# LRU + TTL cache of pose results in front of the inference executor (opt-in, RESULT_CACHE=1):
+# - Key: the session, a 64-bit difference hash (dHash) of the frame computed
+#   from a 1/8-scale grayscale decode (cheap), the requested ROI and model tier.
+#   A dHash only tells near-identical pictures apart, so a hit never crosses
+#   sessions: another athlete's similar frame must not get this one's verdict
+# - Identical / near-identical uploads (paused camera, client retries, the same
+#   image re-sent) skip decode + pose and get the cached result
+# - Hits/misses/evictions are Prometheus counters
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+RESULT_CACHE = os.getenv("RESULT_CACHE", "0") == "1"
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "30"))
+
+CACHE_HITS = metrics.Counter("posture_result_cache_hits_total", "Frames answered from the result cache")
+CACHE_MISSES = metrics.Counter("posture_result_cache_misses_total", "Frames that missed the result cache")
+CACHE_EVICTIONS = metrics.Counter(
+    "posture_result_cache_evictions_total", "Cache entries dropped (LRU size limit or TTL)"
+)
+
+
+def small_gray(data):
+    """JPEG/PNG bytes -> grayscale image decoded at 1/8 scale, or None."""
+    import cv2  # first use is the startup warm-up, not the server import
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+
+def dhash(gray):
+    """64-bit difference hash: is each pixel of a 9x8 thumbnail brighter than its left neighbour."""
+    import cv2
+    tiny = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (tiny[:, 1:] > tiny[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class ResultCache:
+    def __init__(self, max_size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(session_id, gray, roi=None, tier=None):
+        return session_id, dhash(gray), roi, tier
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                CACHE_EVICTIONS.inc()
+                entry = None
+            if entry is None:
+                CACHE_MISSES.inc()
+                return None
+            self._entries.move_to_end(key)
+        CACHE_HITS.inc()
+        return dict(entry[1])
+
+    def put(self, key, result):
+        """Store a worker result (its "timings" are per-call and are not kept)."""
+        value = {k: v for k, v in result.items() if k != "timings"}
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.inc()
+
+    def stats(self):
+        return {
+            "enabled": RESULT_CACHE,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl,
+            "hits": CACHE_HITS.value,
+            "misses": CACHE_MISSES.value,
+            "evictions": CACHE_EVICTIONS.value,
+        }
@@ -0,0 +1,228 @@
+# rule_engine.py
+# Declarative exercise / form rules (form_rules.json) compiled to numpy:
+# - Each "when" is a small expression over geometry.FEATURE_NAMES, e.g.
+#   "min(l_knee, r_knee) > 165" or "l_wr_y < l_sh_y - 0.03 or r_wr_y < r_sh_y - 0.03"
+# - Expressions are parsed once (ast, whitelisted nodes only) and compiled into
+#   functions over a (N, NUM_FEATURES) array, so one call scores N frames
+# - Every violated rule is reported, in file order (first = primary issue)
+# - The file is re-read when its mtime changes (checked at most every
+#   FORM_RULES_RELOAD_S seconds); a broken edit keeps the previous rules.
+#   A rule set is only used after every expression has run once on a zero
+#   feature row, so a file that loads but cannot score never reaches a request
+
+import ast
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from geometry import FEATURE_NAMES, NUM_FEATURES
+
+FORM_RULES_PATH = os.getenv(
+    "FORM_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "form_rules.json")
+)
+FORM_RULES_RELOAD_S = float(os.getenv("FORM_RULES_RELOAD_S", "2"))
+
+_FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+_BIN_OPS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+_CMP_OPS = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.Eq: "==", ast.NotEq: "!="}
+_CALLS = {"min": "np.minimum", "max": "np.maximum"}
+
+
+class RuleError(ValueError):
+    """Raised for a rules file that does not parse or compile."""
+
+
+# -------------------- Expression compiler --------------------
+def _emit(node, expr):
+    if isinstance(node, ast.Name):
+        if node.id not in _FEATURE_INDEX:
+            raise RuleError(f"unknown feature {node.id!r} in {expr!r}")
+        return f"F[:, {_FEATURE_INDEX[node.id]}]"
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        if not math.isfinite(node.value):  # repr() would be "inf"/"nan", undefined names
+            raise RuleError(f"constant {node.value!r} is not finite in {expr!r}")
+        return repr(float(node.value))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        return f"({_emit(node.left, expr)} {_BIN_OPS[type(node.op)]} {_emit(node.right, expr)})"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return f"(-{_emit(node.operand, expr)})"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        # not ~: bitwise on a float or a plain Python bool (constant rule)
+        return f"np.logical_not({_emit(node.operand, expr)})"
+    if isinstance(node, ast.BoolOp):
+        joiner = " & " if isinstance(node.op, ast.And) else " | "
+        return "(" + joiner.join(_emit(v, expr) for v in node.values) + ")"
+    if isinstance(node, ast.Compare) and all(type(op) in _CMP_OPS for op in node.ops):
+        # a < b < c -> (a < b) & (b < c)
+        terms = [_emit(node.left, expr)] + [_emit(c, expr) for c in node.comparators]
+        parts = [f"({a} {_CMP_OPS[type(op)]} {b})" for a, op, b in zip(terms, node.ops, terms[1:])]
+        return "(" + " & ".join(parts) + ")"
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        args = [_emit(a, expr) for a in node.args]
+        if node.func.id == "abs" and len(args) == 1:
+            return f"np.abs({args[0]})"
+        if node.func.id in _CALLS and len(args) >= 2:
+            out = args[0]
+            for a in args[1:]:
+                out = f"{_CALLS[node.func.id]}({out}, {a})"
+            return out
+    raise RuleError(f"unsupported syntax {ast.dump(node)[:60]!r} in {expr!r}")
+
+def compile_expr(expr):
+    """Rule expression -> fn(F: (N, NUM_FEATURES) array) -> (N,) bool array."""
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise RuleError(f"cannot parse {expr!r}: {e.msg}") from None
+    body = _emit(tree.body, expr)
+    if not any(isinstance(n, ast.Name) and n.id in _FEATURE_INDEX for n in ast.walk(tree)):
+        body = f"np.broadcast_to({body}, (F.shape[0],))"  # constant rule
+    src = f"lambda F: {body}"
+    return eval(compile(src, "<form_rules>", "eval"), {"np": np, "__builtins__": {}})
+
+# -------------------- Compiled rule set --------------------
+class RuleSet:
+    def __init__(self, spec):
+        classification = spec.get("classification", [])
+        default = spec.get("default_exercise", "Squat")
+        form = spec.get("form", {})
+
+        names = [c["exercise"] for c in classification] + [default] + list(form)
+        self.exercises = tuple(dict.fromkeys(names))
+        self._index = {name: i for i, name in enumerate(self.exercises)}
+        self.default = self._index[default]
+        self._classifier_specs = classification
+        self._classifiers = [(self._index[c["exercise"]], compile_expr(c["when"])) for c in classification]
+
+        # Flat rule list in file order; columns of the violation matrix
+        self.rules = []
+        self._rule_fns = []
+        self._groups = {}  # exercise index -> rule column indices
+        for exercise, rules in form.items():
+            for n, rule in enumerate(rules):
+                col = len(self.rules)
+                self.rules.append({
+                    "id": rule.get("id", f"{exercise}_{n}"),
+                    "exercise": exercise,
+                    "issue": rule["issue"],
+                    "when": rule["when"],
+                })
+                self._rule_fns.append(compile_expr(rule["when"]))
+                self._groups.setdefault(self._index[exercise], []).append(col)
+
+    @staticmethod
+    def _as_matrix(feats):
+        F = np.asarray(feats, dtype=np.float32)
+        F = F[None] if F.ndim == 1 else F
+        if F.ndim != 2 or F.shape[1] != NUM_FEATURES:
+            raise ValueError(f"expected (N, {NUM_FEATURES}) features, got {F.shape}")
+        return F
+
+    def label_index(self, exercise):
+        return self._index.get(exercise, -1)
+
+    def classify(self, feats):
+        """(N, NUM_FEATURES) -> (N,) exercise indices; first matching rule wins."""
+        F = self._as_matrix(feats)
+        labels = np.full(F.shape[0], -1, dtype=np.int16)
+        for idx, fn in self._classifiers:
+            open_ = labels < 0
+            if not open_.any():
+                break
+            labels[open_ & fn(F)] = idx
+        labels[labels < 0] = self.default
+        return labels
+
+    def violations(self, feats, labels):
+        """(N, len(rules)) bool: rule j violated on row i (only rules of that row's exercise)."""
+        F = self._as_matrix(feats)
+        labels = np.asarray(labels)
+        V = np.zeros((F.shape[0], len(self.rules)), dtype=bool)
+        for idx in (labels[:1] if labels.size == 1 else np.unique(labels)):
+            cols = self._groups.get(int(idx))
+            if not cols:
+                continue
+            rows = labels == idx
+            sub = F[rows] if not rows.all() else F
+            for col in cols:
+                V[rows, col] = self._rule_fns[col](sub)
+        return V
+
+    def evaluate(self, feats):
+        """Bulk scoring: (N,) exercise indices and the (N, R) violation matrix."""
+        F = self._as_matrix(feats)
+        labels = self.classify(F)
+        return labels, self.violations(F, labels)
+
+    def issues(self, violated_row):
+        return [self.rules[j]["issue"] for j in np.flatnonzero(violated_row)]
+
+    def validate(self):
+        """Run every expression on a zero feature row; RuleError unless each gives one bool."""
+        F = np.zeros((1, NUM_FEATURES), dtype=np.float32)
+        whens = [c["when"] for c in self._classifier_specs] + [r["when"] for r in self.rules]
+        for when, fn in zip(whens, [fn for _, fn in self._classifiers] + self._rule_fns):
+            try:
+                out = np.asarray(fn(F))
+            except Exception as e:
+                raise RuleError(f"{when!r} fails on a feature row: {e!r}") from None
+            if out.dtype != bool or out.shape != (1,):
+                raise RuleError(f"{when!r} is not a true/false condition")
+        return self
+
+# -------------------- Hot-reloading holder --------------------
+def load_rules(path=FORM_RULES_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuleError(f"cannot read {path}: {e}") from None
+    try:
+        rules = RuleSet(spec)
+    except RuleError:
+        raise
+    except Exception as e:  # wrong shapes anywhere in the file (e.g. "form": [])
+        raise RuleError(f"malformed rule in {path}: {e!r}") from None
+    return rules.validate()
+
+
+class RuleEngine:
+    def __init__(self, path=FORM_RULES_PATH, reload_interval=FORM_RULES_RELOAD_S):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._mtime = os.path.getmtime(path)
+        self._rules = load_rules(path)
+        self._checked = time.monotonic()
+
+    def current(self):
+        """The active RuleSet, re-read first if the file changed on disk."""
+        if self.reload_interval > 0 and time.monotonic() - self._checked >= self.reload_interval:
+            self._maybe_reload()
+        return self._rules
+
+    def _maybe_reload(self):
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            try:
+                self._rules = load_rules(self.path)
+            except RuleError as e:
+                print(f"⚠️ Keeping previous form rules: {e}")
+                return
+            self.reloads += 1
+            print(f"✅ Reloaded form rules from {self.path} ({len(self._rules.rules)} rules)")
+
+
+RULES = RuleEngine()
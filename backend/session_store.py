@@ -0,0 +1,248 @@
+# session_store.py
+# Per-session posture state:
+# - Session/user ids travel with every frame (default session "latest" keeps the
+#   old single-document layout the dashboard listens to)
+# - Firestore layout per session:
+#     postureLogs/{session_id}                 latest state
+#     postureLogs/{session_id}/history/{auto}  wrong events
+#   (the default session keeps using the top-level postureHistory collection)
+# - SessionStore keeps the latest state so /status can answer for a session
+#   without reading Firestore, plus each session's temporal tracker
+#   (smoothing, exercise hysteresis, rep counts; tracking.py)
+# - Where that state lives (SESSION_STORE):
+#     memory  this process only: one uvicorn worker, or sticky routing
+#     sqlite  a SQLite file (SESSION_STORE_URL, default session_store.db)
+#             shared by every worker on one machine; also the local stand-in
+#             for Redis in tests and benchmarks
+#     redis   Redis at SESSION_STORE_URL (redis://host:6379/0, needs
+#             `pip install redis`), shared by workers on any number of instances
+#   With sqlite/redis a frame may land on any worker: the tracker is loaded
+#   before and saved after each frame, as JSON with a SESSION_TTL expiry.
+#   Frames of one session are expected one at a time (a camera client waits
+#   for each response); two in flight at once on different workers would
+#   race and the last save wins.
+#   Still per process, so they need sticky routing (session affinity at the
+#   load balancer) when several workers serve one deployment: tier pins
+#   (POST /sessions/{id}/tier; or send "tier" with each frame), adaptive frame
+#   skipping, multi-person identities and /ws/session graphs (one connection,
+#   one worker anyway). Video jobs and the Firestore spool are shared files
+#   that are safe to use from several workers on one machine.
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from tracking import SessionTracker
+
+DEFAULT_SESSION = "latest"
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").strip().lower()  # memory | sqlite | redis
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "")
+
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+def valid_session_id(value):
+    """Firestore-safe id: letters, digits, '_' or '-', at most 128 chars."""
+    return bool(value) and _SESSION_ID_RE.match(value) is not None
+
+def latest_doc(db, session_id=DEFAULT_SESSION):
+    return db.collection("postureLogs").document(session_id)
+
+def history_collection(db, session_id=DEFAULT_SESSION):
+    if session_id == DEFAULT_SESSION:
+        return db.collection("postureHistory")
+    return latest_doc(db, session_id).collection("history")
+
+
+# -------------------- Shared key/value backends --------------------
+class SqliteKV:
+    """String keys -> string values with an expiry, in a SQLite file (WAL) shared across processes."""
+
+    kind = "sqlite"
+
+    def __init__(self, path="session_store.db"):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL) "
+            "WITHOUT ROWID"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)", (key, value, time.time() + ttl)
+            )
+
+    def delete(self, *keys):
+        with self._lock:
+            self._conn.executemany("DELETE FROM kv WHERE key = ?", [(k,) for k in keys])
+
+    def purge(self):
+        """Drop expired keys (Redis does this by itself)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE expires <= ?", (time.time(),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisKV:
+    """Same interface on top of a Redis (or Redis-protocol) server."""
+
+    kind = "redis"
+
+    def __init__(self, url="redis://localhost:6379/0"):
+        import redis  # optional dependency, only for SESSION_STORE=redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key):
+        return self._redis.get(key)
+
+    def set(self, key, value, ttl):
+        self._redis.set(key, value, px=max(1, math.ceil(ttl * 1000)))
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*keys)
+
+    def purge(self):
+        pass
+
+    def close(self):
+        self._redis.close()
+
+
+def open_kv(kind=SESSION_STORE, url=SESSION_STORE_URL):
+    """Backend for SESSION_STORE, or None for in-process memory."""
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        return SqliteKV(url or "session_store.db")
+    if kind == "redis":
+        return RedisKV(url or "redis://localhost:6379/0")
+    raise ValueError(f"SESSION_STORE must be memory, sqlite or redis, got {kind!r}")
+
+
+class SessionStore:
+    def __init__(self, ttl=SESSION_TTL, kv=None):
+        self.ttl = ttl
+        self.kv = kv  # None: everything stays in this process
+        self._lock = threading.Lock()
+        self._sessions = {}  # with a kv: the sessions this process has seen, for evict_idle()
+        self._trackers = {}
+
+    @property
+    def backend(self):
+        return "memory" if self.kv is None else self.kv.kind
+
+    def _load(self, key):
+        raw = self.kv.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def tracker(self, session_id):
+        """The session's tracker; with a kv a fresh copy, so only for reading."""
+        if self.kv is not None:
+            return SessionTracker.from_state(self._load(f"tracker:{session_id}"))
+        with self._lock:
+            tracker = self._trackers.get(session_id)
+            if tracker is None:
+                tracker = self._trackers[session_id] = SessionTracker()
+            return tracker
+
+    def track(self, session_id, feat, t):
+        """Advance the session's tracker by one feature row (SessionTracker.update)."""
+        tracker = self.tracker(session_id)
+        result = tracker.update(feat, t)
+        if self.kv is not None:
+            self.kv.set(f"tracker:{session_id}", json.dumps(tracker.to_state()), self.ttl)
+        return result
+
+    def update(self, session_id, user_id, exercise, status, issue, reps=None):
+        """Record a frame's verdict; returns the previous (status, exercise, issue), None if new."""
+        now = time.time()
+        if self.kv is not None:
+            entry = self._load(f"session:{session_id}")
+            previous = _verdict(entry)
+            entry = _apply(entry, session_id, now, user_id, exercise, status, issue, reps)
+            self.kv.set(f"session:{session_id}", json.dumps(entry), self.ttl)
+            with self._lock:
+                self._sessions[session_id] = entry
+            return previous
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            previous = _verdict(entry)
+            self._sessions[session_id] = _apply(entry, session_id, now, user_id, exercise, status, issue, reps)
+        return previous
+
+    def get(self, session_id):
+        if self.kv is not None:
+            return self._load(f"session:{session_id}")
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return dict(entry) if entry is not None else None
+
+    def evict_idle(self):
+        """
+        Drop sessions with no frame for SESSION_TTL seconds; returns their ids.
+        With a kv only this process's view goes (the shared keys expire by themselves).
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            stale = [sid for sid, e in self._sessions.items() if e["updated_at"] < cutoff]
+            for sid in stale:
+                del self._sessions[sid]
+                self._trackers.pop(sid, None)
+        if self.kv is not None:
+            self.kv.purge()
+        return stale
+
+    def close(self):
+        if self.kv is not None:
+            self.kv.close()
+
+    def stats(self):
+        return {"backend": self.backend, "local_sessions": len(self), "ttl_s": self.ttl}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def _verdict(entry):
+    return None if entry is None else (entry["status"], entry["exercise"], entry["issue"])
+
+def _apply(entry, session_id, now, user_id, exercise, status, issue, reps):
+    if entry is None:
+        entry = {"session_id": session_id, "frames": 0, "started_at": now}
+    entry.update(
+        user_id=user_id,
+        exercise=exercise,
+        status=status,
+        issue=issue,
+        updated_at=now,
+    )
+    if reps is not None:
+        entry["reps"] = reps
+    entry["frames"] += 1
+    return entry
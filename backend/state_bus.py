@@ -0,0 +1,115 @@
+# state_bus.py
+# In-process pub/sub of per-session posture state, so dashboards get pushed
+# updates straight from the server instead of server -> Firestore -> browser:
+# - publish() is called for every processed frame; only changes of
+#   (exercise, status, issue, reps) go out to subscribers
+# - Each subscriber (one SSE stream or WebSocket) has its own bounded asyncio
+#   queue; a slow client loses its oldest pending states, never blocks a frame
+# - publish() may be called from the event loop or any worker thread
+
+import asyncio
+import os
+import threading
+
+import metrics
+
+STATE_QUEUE_SIZE = int(os.getenv("STATE_QUEUE_SIZE", "16"))
+
+PUBLISHED = metrics.Counter("posture_state_events_total", "Session state changes published")
+DROPPED = metrics.Counter(
+    "posture_state_events_dropped_total", "Queued state events dropped for slow subscribers"
+)
+
+STATE_FIELDS = ("exercise", "status", "issue", "reps")
+
+
+class Subscription:
+    def __init__(self, session_id, loop, size=STATE_QUEUE_SIZE):
+        self.session_id = session_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max(1, size))
+
+    def _put(self, state):
+        if self.queue.full():
+            self.queue.get_nowait()
+            DROPPED.inc()
+        self.queue.put_nowait(state)
+
+    def put(self, state):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(state)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._put, state)
+
+    async def get(self, timeout=None):
+        """Next state dict, None once the bus is closed; raises TimeoutError after timeout."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class StateBus:
+    def __init__(self, queue_size=STATE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subs = {}  # session_id -> set of Subscription
+        self._last = {}  # session_id -> last published state key
+
+    def subscribe(self, session_id):
+        """Must be called from the event loop that will read the subscription."""
+        sub = Subscription(session_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subs.setdefault(session_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.session_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.session_id]
+
+    def publish(self, session_id, state):
+        """Fan a session's state out to its subscribers; returns False if nothing changed."""
+        key = tuple(state.get(f) for f in STATE_FIELDS)
+        with self._lock:
+            if self._last.get(session_id) == key:
+                return False
+            self._last[session_id] = key
+            subs = list(self._subs.get(session_id, ()))
+        PUBLISHED.inc()
+        for sub in subs:
+            sub.put(state)
+        return True
+
+    def forget(self, session_id):
+        """Drop change tracking for a session that went idle."""
+        with self._lock:
+            self._last.pop(session_id, None)
+
+    def close(self):
+        """End every open stream (each subscriber receives None)."""
+        with self._lock:
+            subs = [sub for group in self._subs.values() for sub in group]
+        for sub in subs:
+            sub.put(None)
+
+    def sessions(self):
+        """Ids of the sessions with at least one open stream."""
+        with self._lock:
+            return list(self._subs)
+
+    def subscribers(self):
+        with self._lock:
+            return sum(len(group) for group in self._subs.values())
+
+    def stats(self):
+        return {
+            "subscribers": self.subscribers(),
+            "published": PUBLISHED.value,
+            "dropped": DROPPED.value,
+            "queue_size": self.queue_size,
+        }
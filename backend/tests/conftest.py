@@ -0,0 +1,84 @@
+# Shared pytest setup for the backend modules (flat layout: import them by name)
+#   cd backend && pip install -r requirements-dev.txt && python -m pytest -q
+# - Server settings that would touch Firebase or write files next to the code
+#   are pointed at in-memory stand-ins before control_server is imported
+# - FakePose replaces the MediaPipe graph (pose_pool._mp_pose), so server
+#   tests exercise the request plumbing without loading a model
+
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+for name, value in {
+    "FIRESTORE_FAKE": "1",
+    "FIRESTORE_SPOOL": ":memory:",
+    "HISTORY_INDEX": ":memory:",
+    "LANDMARK_LOG": "0",
+    "SESSION_STORE": "memory",
+    "INFER_WORKERS": "1",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+# -------------------- Pose model stand-in --------------------
+class FakePose:
+    """Same calls as mp.solutions.pose.Pose; a black frame has nobody in it."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+
+    def process(self, frame_rgb):
+        brightness = int(frame_rgb.mean())
+        if brightness == 0:
+            return types.SimpleNamespace(pose_landmarks=None)
+        points = np.random.default_rng(brightness).random((33, 4))
+        landmark = [types.SimpleNamespace(x=x, y=y, z=z, visibility=v) for x, y, z, v in points.tolist()]
+        return types.SimpleNamespace(pose_landmarks=types.SimpleNamespace(landmark=landmark))
+
+    def reset(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def jpeg():
+    """jpeg(brightness, size) -> bytes of a flat grey JPEG (0 = nobody in frame for FakePose)."""
+    import cv2
+
+    def encode(brightness=100, size=64):
+        return cv2.imencode(".jpg", np.full((size, size, 3), brightness, np.uint8))[1].tobytes()
+
+    return encode
+
+
+@pytest.fixture
+def fake_pose(monkeypatch):
+    import pose_pool
+
+    monkeypatch.setattr(pose_pool, "_mp_pose", types.SimpleNamespace(Pose=FakePose))
+
+
+@pytest.fixture
+def client(fake_pose):
+    """TestClient on the real app, ready (warm-up finished) before the test starts."""
+    from starlette.testclient import TestClient
+
+    import control_server
+
+    with TestClient(control_server.app) as test_client:
+        deadline = time.monotonic() + 10
+        while test_client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, "server never became ready"
+            time.sleep(0.02)
+        yield test_client
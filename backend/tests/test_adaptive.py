@@ -0,0 +1,95 @@
+# adaptive: still-frame reuse and load-based decimation
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import control_server
+from adaptive import ADAPTIVE_MAX_SKIPS, AdaptiveScheduler
+from batcher import MicroBatcher
+from session_store import DEFAULT_SESSION
+
+RESULT = {"exercise": "Squat", "status": "correct", "issue": "—"}
+
+
+def thumb(value):
+    return np.full((24, 32), value, dtype=np.float32)
+
+def scheduler(load=0.0):
+    return AdaptiveScheduler(lambda: load)
+
+
+def test_still_frame_reuses_the_last_result():
+    sched = scheduler()
+    assert sched.check("s1", thumb(10)) == (None, None)  # nothing to reuse yet
+    sched.record("s1", thumb(10), RESULT)
+    assert sched.check("s1", thumb(10.5)) == (RESULT, "still")
+    assert sched.check("s1", thumb(60)) == (None, None)  # moved
+
+def test_reuse_stops_after_max_skips():
+    sched = scheduler()
+    sched.record("s1", thumb(10), RESULT)
+    reasons = [sched.check("s1", thumb(10))[1] for _ in range(ADAPTIVE_MAX_SKIPS + 1)]
+    assert reasons == ["still"] * ADAPTIVE_MAX_SKIPS + [None]
+
+def test_default_session_is_never_skipped():
+    sched = scheduler(load=5.0)
+    sched.record(DEFAULT_SESSION, thumb(10), RESULT)
+    assert sched.check(DEFAULT_SESSION, thumb(10)) == (None, None)
+
+@pytest.mark.parametrize("load, every", [(0.0, 1), (0.74, 1), (0.8, 2), (0.9, 4), (1.0, 8), (3.0, 8)])
+def test_decimation_steps(load, every):
+    assert scheduler(load).decimation() == every
+
+def test_decimation_skips_all_but_every_nth_frame():
+    sched = scheduler(load=0.9)
+    sched.record("s1", thumb(10), RESULT)
+    reasons = [sched.check("s1", thumb(10 + 50 * (i % 2)))[1] for i in range(8)]
+    assert reasons.count("load") == 6
+
+
+class BlockedExecutor:
+    """Executor whose batches only finish when `release` is set."""
+
+    workers = 1
+    max_queue = 2
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def run(self, fn, items):
+        await self.release.wait()
+        return [dict(RESULT) for _ in items]
+
+
+def test_saturated_batcher_drives_decimation(monkeypatch):
+    async def scenario():
+        executor = BlockedExecutor()
+        batcher = MicroBatcher(executor, max_size=2, max_wait_ms=0)
+        batcher.start()
+        monkeypatch.setattr(control_server, "batcher", batcher)
+        sched = AdaptiveScheduler(control_server.inference_load)
+        steps = [sched.decimation()]
+
+        # Capacity is max_queue * max_size = 4 frames; one batch of 2 is stuck
+        # in the executor (whose own in-flight count never passes 1)
+        frames = [asyncio.create_task(batcher.submit(b"frame")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        steps.append(sched.decimation())
+        frames.append(asyncio.create_task(batcher.submit(b"frame")))
+        await asyncio.sleep(0.05)
+        steps.append(sched.decimation())
+
+        executor.release.set()
+        await asyncio.gather(*frames)
+        steps.append(sched.decimation())
+        await batcher.stop()
+        return steps
+
+    assert asyncio.run(scenario()) == [1, 2, 8, 1]
+
+def test_unbatched_load_is_executor_occupancy(monkeypatch):
+    monkeypatch.setattr(control_server, "batcher", None)
+    monkeypatch.setattr(control_server.executor, "_in_flight", 3)
+    assert control_server.inference_load() == 3 / control_server.executor.max_queue
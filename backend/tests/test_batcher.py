@@ -0,0 +1,112 @@
+# MicroBatcher: grouping frames into executor calls, fan-out and backpressure
+
+import asyncio
+
+import pytest
+
+from batcher import MicroBatcher
+from inference import InferenceBusy, InferenceExecutor, run_frame
+
+VERDICT = ("exercise", "status", "issue", "issues", "features")
+
+
+class StubExecutor:
+    """Records each batch; finishes it when `release` is set (or raises `error`)."""
+
+    workers = 1
+    max_queue = 2
+
+    def __init__(self, error=None):
+        self.release = asyncio.Event()
+        self.error = error
+        self.batches = []
+
+    async def run(self, fn, items):
+        self.batches.append([data for data, _, _ in items])
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return [{"frame": data} for data, _, _ in items]
+
+
+def test_batch_results_match_single_frames(fake_pose, jpeg):
+    executor = InferenceExecutor("thread", workers=1, max_queue=2)
+    executor.start()
+    frames = [jpeg(50), jpeg(0), b"not an image", jpeg(120)]
+
+    async def main():
+        batcher = MicroBatcher(executor, max_size=4, max_wait_ms=200)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(f) for f in frames)), batcher.stats()
+        finally:
+            await batcher.stop()
+
+    try:
+        results, stats = asyncio.run(main())
+        singles = [run_frame(f) for f in frames]
+    finally:
+        executor.shutdown()
+
+    for batched, single in zip(results, singles):
+        if single is None:
+            assert batched is None
+        else:
+            assert {k: batched.get(k) for k in VERDICT} == {k: single.get(k) for k in VERDICT}
+    assert (stats["batches"], stats["frames"], stats["batch_sizes"]) == (1, 4, {"4": 1})
+    assert stats["pending"] == 0
+
+
+def test_frames_ride_along_while_workers_are_busy():
+    async def main():
+        executor = StubExecutor()
+        batcher = MicroBatcher(executor, max_size=3, max_wait_ms=0)
+        batcher.start()
+        first = asyncio.create_task(batcher.submit(b"a"))
+        await asyncio.sleep(0.01)  # batch ["a"] holds the only worker slot
+        rest = [asyncio.create_task(batcher.submit(f)) for f in (b"b", b"c", b"d", b"e")]
+        await asyncio.sleep(0.01)
+        executor.release.set()
+        results = await asyncio.gather(first, *rest)
+        await batcher.stop()
+        return executor.batches, results
+
+    batches, results = asyncio.run(main())
+    assert batches[0] == [b"a"]
+    assert sorted(len(b) for b in batches[1:]) == [1, 3]  # waiting frames fill the next batch
+    assert [r["frame"] for r in results] == [b"a", b"b", b"c", b"d", b"e"]
+
+
+def test_executor_errors_reach_every_frame_in_the_batch():
+    async def main():
+        executor = StubExecutor(error=InferenceBusy("full"))
+        executor.release.set()
+        batcher = MicroBatcher(executor, max_size=2, max_wait_ms=50)
+        batcher.start()
+        results = await asyncio.gather(batcher.submit(b"a"), batcher.submit(b"b"), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    assert [type(r) for r in asyncio.run(main())] == [InferenceBusy, InferenceBusy]
+
+
+def test_full_queue_refuses_new_frames():
+    async def main():
+        executor = StubExecutor()
+        batcher = MicroBatcher(executor, max_size=1, max_wait_ms=0)
+        batcher.start()
+        # One frame in the executor, one held by the collector waiting for a slot,
+        # then capacity() = max_queue * max_size = 2 more fill the queue
+        held = []
+        for f in (b"a", b"b", b"c", b"d"):
+            held.append(asyncio.create_task(batcher.submit(f)))
+            await asyncio.sleep(0.01)
+        with pytest.raises(InferenceBusy):
+            await batcher.submit(b"e")
+        executor.release.set()
+        await asyncio.gather(*held)
+        await batcher.stop()
+        return batcher.stats()
+
+    stats = asyncio.run(main())
+    assert (stats["frames"], stats["pending"]) == (4, 0)
@@ -0,0 +1,55 @@
+# GET /events: the SSE stream dashboards follow (stream generator driven directly)
+
+import asyncio
+import json
+
+import control_server
+
+
+async def read_messages(session_id, n, on_open=None, timeout=2):
+    response = await control_server.state_events(session_id)
+    stream = response.body_iterator
+    messages = []
+    try:
+        for i in range(n):
+            if i == 1 and on_open is not None:
+                on_open()
+            messages.append(await asyncio.wait_for(stream.__anext__(), timeout))
+    finally:
+        await stream.aclose()
+    return messages
+
+def data(message):
+    assert message.startswith("data: "), message
+    return json.loads(message[len("data: "):])
+
+def record(session_id, status, issue):
+    control_server.sessions.update(session_id, None, "Squat", status, issue)
+    control_server.publish_state(session_id)
+
+
+def test_current_state_then_changes():
+    record("sse1", "correct", "—")
+    messages = asyncio.run(read_messages("sse1", 2, on_open=lambda: record("sse1", "wrong", "Too deep")))
+    assert [data(m)["status"] for m in messages] == ["correct", "wrong"]
+
+def test_idle_stream_re_sends_the_state(monkeypatch):
+    # The dashboard treats silence as "server gone", so steady state must keep arriving
+    monkeypatch.setattr(control_server, "SSE_KEEPALIVE_S", 0.05)
+    record("sse2", "wrong", "Too deep")
+    messages = asyncio.run(read_messages("sse2", 3))
+    assert [data(m)["issue"] for m in messages] == ["Too deep"] * 3
+
+def test_session_without_state_only_gets_keepalives(monkeypatch):
+    monkeypatch.setattr(control_server, "SSE_KEEPALIVE_S", 0.05)
+    assert asyncio.run(read_messages("sse-none", 2)) == [": keepalive\n\n"] * 2
+
+def test_subscription_ends_with_the_stream():
+    before = control_server.state_bus.subscribers()
+    record("sse3", "correct", "—")
+    asyncio.run(read_messages("sse3", 1))
+    assert control_server.state_bus.subscribers() == before
+
+def test_invalid_session_id_is_a_400():
+    response = asyncio.run(control_server.state_events("bad/id"))
+    assert response.status_code == 400
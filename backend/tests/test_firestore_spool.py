@@ -0,0 +1,76 @@
+# firestore_spool: durable outbox between FirestoreWriter and Firestore
+
+import sqlite3
+
+from firestore_spool import Spool
+
+
+def test_put_peek_delete_oldest_first():
+    spool = Spool(":memory:")
+    spool.put([("postureLogs/a", "latest", {"n": 1}), ("postureLogs/a/history/x", "history", {"n": 2})], now=100)
+    spool.put([("postureLogs/b", "latest", {"n": 3})], now=101)
+    assert spool.depth == 3
+    assert spool.lag(now=110) == 10
+
+    rows = spool.peek(2)
+    assert [(path, data) for _, path, _, data, _ in rows] == [
+        ("postureLogs/a", {"n": 1}), ("postureLogs/a/history/x", {"n": 2}),
+    ]
+    spool.delete(rows)
+    assert spool.depth == 1
+    assert [row[1] for row in spool.peek(10)] == ["postureLogs/b"]
+    assert spool.lag(now=110) == 9
+
+    spool.delete(spool.peek(10))
+    assert spool.depth == 0 and spool.lag() == 0.0
+
+def test_newer_state_replaces_pending_row_in_place():
+    spool = Spool(":memory:")
+    spool.put([("postureLogs/a", "latest", {"status": "wrong"})], now=100)
+    spool.put([("postureLogs/b", "latest", {"status": "wrong"})], now=101)
+    spool.put([("postureLogs/a", "latest", {"status": "correct"})], now=102)
+
+    rows = spool.peek(10)
+    assert spool.depth == 2
+    # Keeps its place in line (and its created time), with the new data
+    assert [(row[1], row[3]["status"]) for row in rows] == [("postureLogs/a", "correct"), ("postureLogs/b", "wrong")]
+    assert spool.lag(now=110) == 10
+
+def test_row_replaced_while_sending_is_not_deleted():
+    spool = Spool(":memory:")
+    spool.put([("postureLogs/a", "latest", {"status": "wrong"})])
+    sent = spool.peek(10)
+    spool.put([("postureLogs/a", "latest", {"status": "correct"})])  # lands mid-commit
+
+    spool.delete(sent)
+    rows = spool.peek(10)
+    assert [row[3]["status"] for row in rows] == ["correct"]
+    spool.delete(rows)
+    assert spool.depth == 0
+
+def test_pending_rows_survive_a_restart(tmp_path):
+    path = str(tmp_path / "spool.db")
+    spool = Spool(path)
+    spool.put([("postureLogs/a", "latest", {"n": 1})])
+    spool.close()
+
+    spool = Spool(path)
+    assert spool.depth == 1
+    assert spool.peek(1)[0][3] == {"n": 1}
+
+def test_spool_from_before_versions_is_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE ops (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT NOT NULL UNIQUE, "
+        "kind TEXT NOT NULL, data TEXT NOT NULL, created REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO ops (path, kind, data, created) VALUES ('postureLogs/a', 'latest', '{}', 1)")
+    conn.commit()
+    conn.close()
+
+    spool = Spool(path)
+    rows = spool.peek(10)
+    assert rows[0][4] == 0
+    spool.delete(rows)
+    assert spool.depth == 0
@@ -0,0 +1,124 @@
+# firestore_writer: transition filtering, coalescing and retries (against FakeFirestore)
+
+import firestore_writer
+from fake_firestore import FakeFirestore
+from firestore_writer import FirestoreWriter
+
+
+class FlakyFirestore(FakeFirestore):
+    """FakeFirestore whose batch commits fail while `down` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    def batch(self):
+        batch = super().batch()
+        commit = batch.commit
+
+        def flaky_commit():
+            if self.down:
+                raise ConnectionError("firestore unreachable")
+            commit()
+
+        batch.commit = flaky_commit
+        return batch
+
+
+def make_writer(db=None):
+    return FirestoreWriter(db if db is not None else FakeFirestore(), interval=60, spool_path=":memory:")
+
+def history(db, prefix):
+    return sorted(
+        (doc["exercise"], doc["issue"]) for path, doc in db.docs.items()
+        if path.startswith(prefix) and "/" not in path[len(prefix):]
+    )
+
+
+def test_only_transitions_are_written():
+    writer = make_writer()
+    for _ in range(5):
+        writer.submit("correct", "Squat", "—", "s1")
+    writer.submit("wrong", "Squat", "Too deep", "s1")
+    writer.submit("wrong", "Squat", "Too deep", "s1")
+
+    stats = writer.stats()
+    assert stats["submitted"] == 7
+    assert stats["transitions"] == 2
+    assert stats["pending_history"] == 1
+
+def test_burst_is_coalesced_to_one_latest_write_per_session():
+    db = FakeFirestore()
+    writer = make_writer(db)
+    writer.submit("wrong", "Squat", "Too deep", "s1", "u1")
+    writer.submit("correct", "Squat", "—", "s1", "u1")
+    writer.submit("wrong", "Deadlift", "Not hinging (too upright)", "s1", "u1")
+    writer.submit("wrong", "Squat", "Too deep", "s2")
+    writer.flush()
+
+    assert db.commits == 1
+    latest = db.docs["postureLogs/s1"]
+    assert (latest["status"], latest["exercise"], latest["userId"]) == ("wrong", "Deadlift", "u1")
+    assert db.docs["postureLogs/s2"]["issue"] == "Too deep"
+    # Every wrong event is still kept in the session's history
+    assert history(db, "postureLogs/s1/history/") == [
+        ("Deadlift", "Not hinging (too upright)"), ("Squat", "Too deep"),
+    ]
+    stats = writer.stats()
+    assert (stats["coalesced"], stats["latest_writes"], stats["history_writes"]) == (2, 2, 3)
+
+def test_default_session_keeps_the_top_level_history():
+    db = FakeFirestore()
+    writer = make_writer(db)
+    writer.submit("wrong", "Squat", "Too deep")
+    writer.flush()
+    assert db.docs["postureLogs/latest"]["status"] == "wrong"
+    assert history(db, "postureHistory/") == [("Squat", "Too deep")]
+
+def test_caller_decides_what_changed():
+    writer = make_writer()
+    writer.submit("wrong", "Squat", "Too deep", "s1", changed=False)  # another worker wrote it
+    assert writer.stats()["transitions"] == 0
+    writer.submit("wrong", "Squat", "Too deep", "s1", changed=True)
+    assert writer.stats()["transitions"] == 1
+
+def test_forget_makes_the_next_state_a_transition():
+    writer = make_writer()
+    writer.submit("correct", "Squat", "—", "s1")
+    writer.forget("s1")
+    writer.submit("correct", "Squat", "—", "s1")
+    assert writer.stats()["transitions"] == 2
+
+def test_failed_writes_stay_spooled_until_firestore_is_back(monkeypatch):
+    monkeypatch.setattr(firestore_writer, "FIRESTORE_RETRY_BASE", 0.0)
+    db = FlakyFirestore()
+    writer = make_writer(db)
+
+    db.down = True
+    writer.submit("wrong", "Squat", "Too deep", "s1")
+    writer.flush()
+    writer.submit("correct", "Squat", "—", "s1")
+    writer.flush()
+    assert writer.spool_depth() == 2  # latest (replaced in place) + one history entry
+    assert writer.stats()["failures"] == 2
+    assert db.docs == {}
+
+    db.down = False
+    writer.flush()
+    assert writer.spool_depth() == 0
+    assert db.docs["postureLogs/s1"]["status"] == "correct"
+    assert history(db, "postureLogs/s1/history/") == [("Squat", "Too deep")]
+
+def test_background_thread_flushes_on_stop():
+    db = FakeFirestore()
+    writer = make_writer(db)
+    writer.start()
+    writer.submit("wrong", "Squat", "Too deep", "s1")
+    writer.stop()
+    assert db.docs["postureLogs/s1"]["status"] == "wrong"
+
+def test_nothing_is_spooled_without_a_client():
+    writer = FirestoreWriter(None, spool_path=":memory:")
+    writer.submit("wrong", "Squat", "Too deep", "s1")
+    writer.flush()
+    assert writer.spool_depth() == 0
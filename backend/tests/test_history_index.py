@@ -0,0 +1,29 @@
+# history_index: transition counting and time-range semantics
+
+from history_index import HistoryIndex
+
+
+def make_index():
+    index = HistoryIndex(":memory:", bucket_s=3600)
+    for t in (3600 + 10, 7200 + 10, 10800 + 10):
+        index.record("s1", "Squat", "wrong", "Too deep", t=t)
+        index.record("s1", "Squat", "correct", "—", t=t + 1)
+    return index
+
+def test_counts_transitions_into_wrong_only():
+    index = HistoryIndex(":memory:", bucket_s=3600)
+    for status in ("wrong", "wrong", "correct", "wrong"):
+        index.record("s1", "Squat", status, "Too deep" if status == "wrong" else "—", t=100)
+    assert index.query(group_by=()) == [{"count": 2}]
+
+def test_since_includes_the_bucket_it_falls_in():
+    index = make_index()
+    rows = index.query(since=7200 + 1800, group_by=("bucket",))
+    assert [r["bucket"] for r in rows] == [7200, 10800]
+
+def test_until_excludes_buckets_starting_at_or_after_it():
+    index = make_index()
+    rows = index.query(since=0, until=10800, group_by=("bucket",))
+    assert [r["bucket"] for r in rows] == [3600, 7200]
+    rows = index.query(since=0, until=10800 + 1, group_by=("bucket",))
+    assert [r["bucket"] for r in rows] == [3600, 7200, 10800]
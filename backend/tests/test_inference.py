@@ -0,0 +1,66 @@
+# InferenceExecutor: the frame pipeline on a worker and the in-flight limit
+
+import asyncio
+import threading
+
+import pytest
+
+import inference
+from inference import InferenceBusy, InferenceExecutor
+
+
+@pytest.fixture
+def executor(fake_pose):
+    executor = InferenceExecutor("thread", workers=2, max_queue=3)
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+def test_run_frame(executor, jpeg):
+    async def main():
+        return await asyncio.gather(
+            executor.process(jpeg(100)), executor.process(jpeg(0)), executor.process(b"not an image")
+        )
+
+    found, nobody, garbage = asyncio.run(main())
+    assert len(found["features"]) and found["landmarks"].shape == (33, 4)
+    assert set(found["timings"]) == {"decode", "pose", "rules"}
+    assert {k: nobody[k] for k in inference.NO_POSE_RESULT} == inference.NO_POSE_RESULT
+    assert garbage is None
+    assert executor.stats()["completed"] == 3
+
+
+def test_frames_over_max_queue_are_rejected(executor):
+    release = threading.Event()
+
+    async def main():
+        held = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(executor.max_queue)]
+        await asyncio.sleep(0)  # let every held call get admitted
+        assert executor.stats()["in_flight"] == 3
+        with pytest.raises(InferenceBusy):
+            await executor.run(release.wait)
+
+        release.set()
+        await asyncio.gather(*held)
+        return await executor.run(lambda: "admitted again")
+
+    assert asyncio.run(main()) == "admitted again"
+    stats = executor.stats()
+    assert (stats["in_flight"], stats["completed"], stats["rejected"]) == (0, 4, 1)
+
+
+def test_process_frame_answers_503_when_busy(client, jpeg, monkeypatch):
+    import control_server
+
+    async def busy(*args):
+        raise InferenceBusy("full")
+
+    monkeypatch.setattr(control_server, "batcher", None)
+    monkeypatch.setattr(control_server.executor, "process", busy)
+    response = client.post(
+        "/process-frame", files={"file": ("frame.jpg", jpeg(77), "image/jpeg")}, data={"session_id": "busy-1"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json() == {"ok": False, "msg": "Server busy, retry shortly"}
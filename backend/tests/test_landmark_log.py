@@ -0,0 +1,88 @@
+# Landmark logs: background writer, file rotation/pruning and memmap replay
+
+import os
+
+import numpy as np
+import pytest
+
+import landmark_log
+from landmark_log import HEADER, LandmarkLogger, open_log, rescore
+
+
+def landmarks(seed):
+    return np.random.default_rng(seed).uniform(0.1, 0.9, (33, 4)).astype(np.float32)
+
+
+def test_records_round_trip(tmp_path):
+    logger = LandmarkLogger(root=str(tmp_path), per_process=False)
+    for i in range(5):
+        logger.append("s1", 1000.0 + i, landmarks(i))
+    logger.append("s2", 2000.0, landmarks(9))
+    logger.close_all()
+
+    records = open_log(logger.path("s1"))
+    assert records["t"].tolist() == [1000.0, 1001.0, 1002.0, 1003.0, 1004.0]
+    assert records["lm"].dtype.base == np.float16
+    assert np.allclose(records["lm"][3], landmarks(3), atol=1e-3)
+    assert len(open_log(logger.path("s2"))) == 1
+    assert logger.stats()["records"] == 6 and logger.stats()["dropped"] == 0
+
+def test_reopened_file_is_appended_to(tmp_path):
+    for t in (1.0, 2.0):
+        logger = LandmarkLogger(root=str(tmp_path), per_process=False)
+        logger.append("s1", t, landmarks(0))
+        logger.close_all()
+    assert open_log(str(tmp_path / "s1.lmlog"))["t"].tolist() == [1.0, 2.0]
+
+    # A float32 logger must not append to a float16 file
+    logger = LandmarkLogger(root=str(tmp_path), value_dtype="float32", per_process=False)
+    logger.append("s1", 3.0, landmarks(0))
+    logger.close_all()
+    assert logger.dropped == 1
+    assert len(open_log(str(tmp_path / "s1.lmlog"))) == 2
+
+def test_partly_written_record_is_ignored(tmp_path):
+    logger = LandmarkLogger(root=str(tmp_path), per_process=False)
+    logger.append("s1", 1.0, landmarks(0))
+    logger.close_all()
+    with open(logger.path("s1"), "ab") as f:
+        f.write(b"\0" * 100)
+    assert len(open_log(logger.path("s1"))) == 1
+
+def test_open_files_are_capped(tmp_path):
+    logger = LandmarkLogger(root=str(tmp_path), per_process=False, max_open=2)
+    for i in range(12):
+        logger.append(f"s{i % 4}", float(i), landmarks(i))
+    logger.close_all()
+    assert [len(open_log(logger.path(f"s{k}"))) for k in range(4)] == [3, 3, 3, 3]
+
+def test_directory_is_kept_under_max_mb(tmp_path):
+    record = landmark_log.record_dtype().itemsize
+    max_mb = (HEADER.size + 10 * record) * 3 / (1024 * 1024)  # room for three 10-frame logs
+    logger = LandmarkLogger(root=str(tmp_path), per_process=False, max_mb=max_mb)
+    for k in range(5):
+        for i in range(10):
+            logger.append(f"s{k}", float(i), landmarks(i))
+    logger.close_all()
+
+    left = sorted(os.listdir(tmp_path))
+    assert logger.deleted_files >= 2
+    assert sum(os.path.getsize(tmp_path / n) for n in left) <= logger.max_bytes
+
+def test_rescore_and_cli(tmp_path, capsys):
+    logger = LandmarkLogger(root=str(tmp_path), per_process=False)
+    for i in range(7):
+        logger.append("s1", float(i), landmarks(i))
+    logger.close_all()
+
+    report = rescore([logger.path("s1")], chunk=3)
+    assert report["frames"] == 7
+    assert sum(report["exercise_frames"].values()) == 7
+
+    bad = tmp_path / "bad.lmlog"
+    bad.write_bytes(b"x" * HEADER.size)
+    assert landmark_log.main(["info", logger.path("s1")]) == 0
+    assert "7 frames" in capsys.readouterr().out
+    assert landmark_log.main(["info", str(bad)]) == 1
+    with pytest.raises(ValueError):
+        open_log(str(bad))
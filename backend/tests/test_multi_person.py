@@ -0,0 +1,90 @@
+# Multi-person frames: identity tracking and POST /process-people
+
+import numpy as np
+import pytest
+
+import multi_person
+from multi_person import PersonTracker, bboxes, iou_matrix
+from pose_pool import PosePool
+
+
+def person(x, y, size=0.2, seed=0):
+    """(33, 4) landmarks spread over a size x size box at (x, y), all visible."""
+    points = np.random.default_rng(seed).random((33, 4)).astype(np.float32)
+    points[:, :2] = points[:, :2] * size + (x, y)
+    points[:, 3] = 1.0
+    return points
+
+
+def test_bboxes_skip_invisible_landmarks():
+    p = person(0.1, 0.1)
+    p[0, :2] = (0.9, 0.9)
+    p[0, 3] = 0.1  # far away but not visible: not part of the box
+    box = bboxes(p[None])[0]
+    assert box[2] <= 0.3 and box[3] <= 0.3
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 1, 1], [2, 2, 3, 3]], np.float32)
+    b = np.array([[0, 0, 1, 1], [0.5, 0, 1.5, 1]], np.float32)
+    assert np.allclose(iou_matrix(a, b), [[1, 1 / 3], [0, 0]], atol=1e-6)
+
+def test_ids_follow_people_across_frames():
+    tracker = PersonTracker()
+    left, right = person(0.1, 0.3, seed=1), person(0.6, 0.3, seed=2)
+    assert tracker.update(np.stack([left, right]), 0.0) == [1, 2]
+
+    # Order of detections flips and both drift a little: ids stay with the person
+    moved = [p + np.array([0.02, 0.01, 0, 0], np.float32) for p in (right, left)]
+    assert tracker.update(np.stack(moved), 0.1) == [2, 1]
+
+    # A newcomer gets a fresh id; nobody in frame keeps the tracks alive for a while
+    assert tracker.update(np.stack([*moved, person(0.35, 0.7, seed=3)]), 0.2) == [2, 1, 3]
+    assert tracker.update(np.empty((0, 33, 4), np.float32), 0.3) == []
+    assert len(tracker) == 3
+
+def test_stale_tracks_are_dropped():
+    tracker = PersonTracker(max_age=1.0)
+    tracker.update(person(0.1, 0.3)[None], 0.0)
+    assert tracker.update(person(0.1, 0.3)[None], 5.0) == [2]
+    assert len(tracker) == 1
+
+
+class FakeLandmarker:
+    """Two athletes, reported in the opposite order on every other frame."""
+
+    def __init__(self):
+        self.people = np.stack([person(0.1, 0.3, seed=1), person(0.6, 0.3, seed=2)])
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        return self.people[::-1].copy() if self.calls % 2 == 0 else self.people.copy()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def people_client(client, monkeypatch):
+    monkeypatch.setattr(multi_person, "MULTI_PERSON", True)
+    monkeypatch.setattr(multi_person, "_pool", PosePool(size=1, factory=FakeLandmarker))
+    return client
+
+
+def post_people(client, data, **form):
+    return client.post("/process-people", files={"file": ("frame.jpg", data, "image/jpeg")}, data=form).json()
+
+
+def test_process_people_scores_each_person(people_client, jpeg):
+    first = post_people(people_client, jpeg(), session_id="gym1")
+    second = post_people(people_client, jpeg(), session_id="gym1")
+    assert first["ok"] and first["count"] == 2
+    assert [p["session_id"] for p in first["people"]] == ["gym1-p1", "gym1-p2"]
+    assert [p["person_id"] for p in second["people"]] == [2, 1]  # same athletes, swapped order
+
+    for sub_id in ("gym1-p1", "gym1-p2"):
+        assert people_client.get(f"/status?session_id={sub_id}").json()["frames"] == 2
+    assert post_people(people_client, b"not an image", session_id="gym1") == {"ok": False, "msg": "Invalid image"}
+
+def test_process_people_is_off_by_default(client, jpeg):
+    assert post_people(client, jpeg())["msg"].startswith("Multi-person mode is off")
@@ -0,0 +1,105 @@
+# pose_pool: bounded pool of warm Pose instances, and how the thread executor sizes it
+
+import threading
+import time
+
+import pytest
+
+import inference
+from pose_pool import PosePool, PosePoolExhausted
+
+
+class Model:
+    """Stands in for a Pose graph: only process() and close() are used by the pool."""
+
+    def __init__(self):
+        self.closed = False
+
+    def process(self, frame):
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+def test_warm_up_builds_every_instance_once():
+    built = []
+    pool = PosePool(3, factory=lambda: built.append(Model()) or built[-1])
+    pool.warm_up()
+    assert len(built) == 3
+    with pool.acquire():
+        pass
+    assert len(built) == 3
+    assert pool.stats()["idle"] == 3
+
+def test_concurrent_checkouts_never_exceed_the_size():
+    pool = PosePool(2, factory=Model, timeout=5)
+    active, peak, lock = set(), [0], threading.Lock()
+
+    def work():
+        for _ in range(20):
+            with pool.acquire() as pose:
+                with lock:
+                    assert pose not in active  # one request per instance at a time
+                    active.add(pose)
+                    peak[0] = max(peak[0], len(active))
+                time.sleep(0.001)
+                with lock:
+                    active.remove(pose)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats()
+    assert peak[0] == 2
+    assert (stats["created"], stats["in_use"], stats["idle"], stats["checkouts"]) == (2, 0, 2, 120)
+    assert stats["waits"] > 0
+
+def test_checkout_times_out_when_every_instance_is_busy():
+    pool = PosePool(1, factory=Model, timeout=0.05)
+    with pool.acquire():
+        with pytest.raises(PosePoolExhausted):
+            with pool.acquire():
+                pass
+    assert pool.stats()["timeouts"] == 1
+    with pool.acquire():  # released instance is usable again
+        pass
+
+def test_failed_build_does_not_use_up_a_slot():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("model file missing")
+        return Model()
+
+    pool = PosePool(1, factory=flaky)
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+    with pool.acquire() as pose:
+        assert isinstance(pose, Model)
+
+def test_close_releases_idle_instances():
+    poses = []
+    pool = PosePool(2, factory=lambda: poses.append(Model()) or poses[-1])
+    pool.warm_up()
+    pool.close()
+    assert all(p.closed for p in poses)
+    assert pool.stats()["created"] == 0
+
+
+@pytest.mark.parametrize("pool_size, workers, expected", [(0, 3, 3), (1, 3, 1), (4, 2, 4)])
+def test_thread_executor_honors_pose_pool_size(fake_pose, monkeypatch, pool_size, workers, expected):
+    monkeypatch.setattr(inference, "POSE_POOL_SIZE", pool_size)
+    executor = inference.InferenceExecutor("thread", workers, 2 * workers)
+    executor.start()
+    try:
+        stats = executor.stats()["pose_pool"]
+        assert (stats["size"], stats["created"]) == (expected, expected)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,40 @@
+# /process-frame: per-session bookkeeping on the real app (FakePose instead of the model)
+
+import pytest
+
+VERDICT = ("exercise", "status", "issue")
+
+
+def post_frame(client, data, **form):
+    reply = client.post("/process-frame", files={"file": ("frame.jpg", data, "image/jpeg")}, data=form).json()
+    assert reply["ok"], reply
+    return reply
+
+def verdict(reply):
+    return tuple(reply[k] for k in VERDICT)
+
+
+def test_clients_on_the_default_session_do_not_share_tracking(client, jpeg):
+    a, b = jpeg(62), jpeg(90)
+    # A fresh explicit session answers its first frame exactly like a lone client
+    alone_a = verdict(post_frame(client, a, session_id="alone-a"))
+    alone_b = verdict(post_frame(client, b, session_id="alone-b"))
+    assert alone_a[0] != alone_b[0]
+
+    for _ in range(5):
+        reply_a, reply_b = post_frame(client, a), post_frame(client, b)
+        assert (verdict(reply_a), verdict(reply_b)) == (alone_a, alone_b)
+        assert "reps" not in reply_a and "reps" not in reply_b
+
+def test_explicit_sessions_are_tracked(client, jpeg):
+    replies = [post_frame(client, jpeg(62), session_id="tracked") for _ in range(3)]
+    assert all("reps" in r for r in replies)
+    # Another exercise for fewer than EXERCISE_SWITCH_FRAMES frames is debounced
+    assert verdict(post_frame(client, jpeg(90), session_id="tracked"))[0] == replies[-1]["exercise"]
+
+@pytest.mark.parametrize("session_id", ["bad/id", "x" * 200])
+def test_invalid_session_ids_are_refused(client, jpeg, session_id):
+    reply = client.post(
+        "/process-frame", files={"file": ("frame.jpg", jpeg(62), "image/jpeg")}, data={"session_id": session_id}
+    ).json()
+    assert reply["ok"] is False
@@ -0,0 +1,58 @@
+# /process-landmarks: client-side pose, server-side scoring and validation
+
+import json
+
+import numpy as np
+import pytest
+
+import landmark_input
+
+LANDMARKS = np.random.default_rng(0).uniform(0.1, 0.9, (33, 4)).astype(np.float32)
+
+
+def post_json(client, body):
+    return client.post("/process-landmarks", content=body, headers={"content-type": "application/json"}).json()
+
+
+def test_json_and_binary_bodies_score_the_same(client):
+    as_json = post_json(client, json.dumps({"landmarks": LANDMARKS.tolist(), "session_id": "lm1"}))
+    as_binary = client.post(
+        "/process-landmarks?session_id=lm2", content=LANDMARKS.astype("<f4").tobytes(),
+        headers={"content-type": "application/octet-stream"},
+    ).json()
+    assert as_json["ok"] and as_binary["ok"]
+    assert {k: as_json[k] for k in ("exercise", "status", "issue")} == {
+        k: as_binary[k] for k in ("exercise", "status", "issue")
+    }
+    assert client.get("/status?session_id=lm1").json()["frames"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    b"{ not json",
+    b'{"landmarks": "nope"}',
+    b'{"landmarks": [[0.5, 0.5]]}',
+    b"[" * 5000 + b"]" * 5000,          # nests past the recursion limit, far under the size cap
+    b'{"landmarks": ' + b"[" * 40 + b"]" * 40 + b"}",
+], ids=["syntax", "not-a-list", "wrong-shape", "nested-too-deep", "nested-40"])
+def test_malformed_json_is_a_validation_error(client, body):
+    assert len(body) <= landmark_input.LANDMARK_MAX_BYTES
+    reply = post_json(client, body)
+    assert reply["ok"] is False
+    assert reply["msg"].startswith("Invalid landmarks")
+
+
+def test_out_of_range_values_are_rejected(client):
+    bad = LANDMARKS.copy()
+    bad[0, 0] = 50
+    reply = client.post(
+        "/process-landmarks", content=bad.astype("<f4").tobytes(), headers={"content-type": "application/octet-stream"}
+    ).json()
+    assert reply == {"ok": False, "msg": "Invalid landmarks: landmark coordinates out of range (expected normalized x, y)"}
+
+
+def test_oversized_body_is_a_413(client):
+    response = client.post(
+        "/process-landmarks", content=b" " * (landmark_input.LANDMARK_MAX_BYTES + 1),
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 413
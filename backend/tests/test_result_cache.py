@@ -0,0 +1,58 @@
+# result_cache: near-duplicate frames per session, LRU + TTL
+
+import numpy as np
+
+from result_cache import ResultCache, dhash, small_gray
+
+
+def gray(seed):
+    return np.random.default_rng(seed).integers(0, 256, (30, 40), dtype=np.uint8)
+
+def test_dhash_ignores_small_changes_only():
+    frame = gray(0)
+    brighter = np.clip(frame.astype(np.int16) + 3, 0, 255).astype(np.uint8)
+    assert dhash(brighter) == dhash(frame)
+    assert dhash(gray(1)) != dhash(frame)
+
+def test_small_gray_decodes_at_one_eighth(jpeg):
+    assert small_gray(jpeg(size=128)).shape == (16, 16)
+    assert small_gray(b"not an image") is None
+
+def test_key_is_scoped_to_session_roi_and_tier():
+    frame = gray(0)
+    keys = {
+        ResultCache.key("a", frame),
+        ResultCache.key("b", frame),
+        ResultCache.key("a", frame, roi=(0.1, 0.1, 0.5, 0.5)),
+        ResultCache.key("a", frame, tier="lite"),
+    }
+    assert len(keys) == 4
+    assert ResultCache.key("a", frame) == ResultCache.key("a", frame.copy())
+
+def test_hit_returns_a_copy_without_timings():
+    cache = ResultCache(max_size=4, ttl=60)
+    key = ResultCache.key("a", gray(0))
+    assert cache.get(key) is None
+    cache.put(key, {"status": "wrong", "timings": {"pose": 12.0}})
+
+    hit = cache.get(key)
+    assert hit == {"status": "wrong"}
+    hit["status"] = "changed"
+    assert cache.get(key) == {"status": "wrong"}
+
+def test_least_recently_used_entry_goes_first():
+    cache = ResultCache(max_size=2, ttl=60)
+    a, b, c = (ResultCache.key("s", gray(i)) for i in range(3))
+    cache.put(a, {"n": "a"})
+    cache.put(b, {"n": "b"})
+    cache.get(a)
+    cache.put(c, {"n": "c"})
+    assert cache.get(b) is None
+    assert cache.get(a) == {"n": "a"} and cache.get(c) == {"n": "c"}
+
+def test_expired_entries_miss():
+    cache = ResultCache(max_size=2, ttl=-1)
+    key = ResultCache.key("s", gray(0))
+    cache.put(key, {"n": 1})
+    assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,193 @@
+# form_rules.json + rule_engine vs the hand-written if/elif checks they replaced
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from geometry import (
+    F_L_EL_Y, F_L_ELBOW, F_L_KNEE, F_L_SH_Y, F_L_WR_Y,
+    F_R_EL_Y, F_R_ELBOW, F_R_KNEE, F_R_SH_Y, F_R_WR_Y,
+    F_TORSO_LEAN, FEATURE_NAMES, NUM_FEATURES,
+)
+from posture import check_form, classify_exercise, evaluate_bulk
+from rule_engine import RuleEngine, RuleError, RuleSet, compile_expr, load_rules
+
+
+# -------------------- Reference: posture.py before form_rules.json --------------------
+def legacy_classify(feat):
+    l_elbow, r_elbow = feat[F_L_ELBOW], feat[F_R_ELBOW]
+    l_knee, r_knee = feat[F_L_KNEE], feat[F_R_KNEE]
+    l_sh_y, r_sh_y = feat[F_L_SH_Y], feat[F_R_SH_Y]
+    l_wr_y, r_wr_y = feat[F_L_WR_Y], feat[F_R_WR_Y]
+
+    if (l_wr_y < l_sh_y - 0.03) or (r_wr_y < r_sh_y - 0.03):
+        return "Shoulder Press"
+    elbow_flexed = (l_elbow < 110) or (r_elbow < 110)
+    wrists_not_overhead = (l_wr_y > l_sh_y - 0.01) and (r_wr_y > r_sh_y - 0.01)
+    if elbow_flexed and wrists_not_overhead:
+        return "Bicep Curl"
+    if (l_knee > 140) and (r_knee > 140) and feat[F_TORSO_LEAN] > 25:
+        return "Deadlift"
+    return "Squat"
+
+def legacy_check_form(exercise, feat):
+    l_knee, r_knee = feat[F_L_KNEE], feat[F_R_KNEE]
+    l_elbow, r_elbow = feat[F_L_ELBOW], feat[F_R_ELBOW]
+    l_sh_y, r_sh_y = feat[F_L_SH_Y], feat[F_R_SH_Y]
+    l_el_y, r_el_y = feat[F_L_EL_Y], feat[F_R_EL_Y]
+    l_wr_y, r_wr_y = feat[F_L_WR_Y], feat[F_R_WR_Y]
+    torso_lean = feat[F_TORSO_LEAN]
+
+    status, issue = "correct", "—"
+    if exercise == "Squat":
+        if min(l_knee, r_knee) > 165:
+            status, issue = "wrong", "Not squatting (legs too straight)"
+        elif min(l_knee, r_knee) < 65:
+            status, issue = "wrong", "Too deep / knee overbend"
+        elif torso_lean > 55:
+            status, issue = "wrong", "Back leaning too much"
+    elif exercise == "Deadlift":
+        if min(l_knee, r_knee) < 120:
+            status, issue = "wrong", "Knees bending too much (looks like squat)"
+        elif torso_lean < 20:
+            status, issue = "wrong", "Not hinging (too upright)"
+        elif torso_lean > 70:
+            status, issue = "wrong", "Back angle too aggressive (risk)"
+    elif exercise == "Bicep Curl":
+        if (l_el_y < l_sh_y + 0.05) or (r_el_y < r_sh_y + 0.05):
+            status, issue = "wrong", "Elbow lifted too high (cheating)"
+        if (l_wr_y < l_sh_y - 0.03) or (r_wr_y < r_sh_y - 0.03):
+            status, issue = "wrong", "Wrist too high (not curl form)"
+        if max(l_elbow, r_elbow) > 175:
+            status, issue = "wrong", "Arms too straight (no curl)"
+    elif exercise == "Shoulder Press":
+        if not ((l_wr_y < l_sh_y - 0.03) or (r_wr_y < r_sh_y - 0.03)):
+            status, issue = "wrong", "Press not overhead enough"
+        if torso_lean > 60:
+            status, issue = "wrong", "Leaning too much while pressing"
+    return status, issue
+
+
+def random_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    F = np.empty((n, NUM_FEATURES), dtype=np.float32)
+    F[:, [F_L_ELBOW, F_R_ELBOW, F_L_KNEE, F_R_KNEE]] = rng.uniform(30, 180, (n, 4))
+    F[:, F_TORSO_LEAN] = rng.uniform(0, 90, n)
+    sh = rng.uniform(0.3, 0.5, (n, 2))
+    F[:, [F_L_SH_Y, F_R_SH_Y]] = sh
+    F[:, [F_L_EL_Y, F_R_EL_Y]] = sh + rng.uniform(-0.1, 0.2, (n, 2))
+    F[:, [F_L_WR_Y, F_R_WR_Y]] = sh + rng.uniform(-0.2, 0.3, (n, 2))
+    return F
+
+
+# -------------------- form_rules.json == legacy chains --------------------
+FEATS = random_features(5000)
+
+def test_classification_matches_legacy():
+    got = [classify_exercise(row) for row in FEATS]
+    want = [legacy_classify(row) for row in FEATS]
+    assert got == want
+    assert len(set(want)) == 4  # every branch exercised
+
+@pytest.mark.parametrize("exercise", ["Squat", "Deadlift", "Bicep Curl", "Shoulder Press"])
+def test_form_checks_match_legacy(exercise):
+    got = [check_form(exercise, row) for row in FEATS]
+    want = [legacy_check_form(exercise, row) for row in FEATS]
+    assert got == want
+    assert {s for s, _ in want} == {"correct", "wrong"}
+
+def test_bulk_matches_single_frame():
+    bulk = evaluate_bulk(FEATS)
+    exercises = [legacy_classify(row) for row in FEATS]
+    assert bulk["exercise"] == exercises
+    assert list(zip(bulk["status"], bulk["issue"])) == [
+        legacy_check_form(ex, row) for ex, row in zip(exercises, FEATS)
+    ]
+
+
+# -------------------- Expression compiler --------------------
+def one_row(**values):
+    row = np.zeros((1, NUM_FEATURES), dtype=np.float32)
+    for name, value in values.items():
+        row[0, FEATURE_NAMES.index(name)] = value
+    return row
+
+def test_not_is_logical():
+    assert compile_expr("not l_knee > 90")(one_row(l_knee=100)).tolist() == [False]
+    assert compile_expr("not l_knee > 90")(one_row(l_knee=80)).tolist() == [True]
+    # on a number (truthiness) and on a constant, where ~ gave -1 / -2
+    assert compile_expr("not l_knee")(one_row(l_knee=0)).tolist() == [True]
+    assert compile_expr("not 1 > 2")(np.zeros((3, NUM_FEATURES))).tolist() == [True] * 3
+
+def test_chained_comparison_and_calls():
+    fn = compile_expr("60 < min(l_knee, r_knee) <= 90 and abs(torso_lean - 10) < 5")
+    assert fn(one_row(l_knee=80, r_knee=120, torso_lean=12)).tolist() == [True]
+    assert fn(one_row(l_knee=50, r_knee=120, torso_lean=12)).tolist() == [False]
+
+@pytest.mark.parametrize("expr", ["l_knee >", "unknown > 1", "__import__('os')", "l_knee ** 2 > 1", "'a' < 'b'"])
+def test_rejects_unsupported(expr):
+    with pytest.raises(RuleError):
+        compile_expr(expr)
+
+def test_all_violations_in_file_order():
+    rules = RuleSet({
+        "classification": [],
+        "form": {"Squat": [
+            {"id": "a", "when": "l_knee > 100", "issue": "A"},
+            {"id": "b", "when": "torso_lean > 10", "issue": "B"},
+        ]},
+    })
+    labels, violated = rules.evaluate(one_row(l_knee=120, torso_lean=20))
+    assert rules.exercises[labels[0]] == "Squat"
+    assert rules.issues(violated[0]) == ["A", "B"]
+
+
+# -------------------- Loading / hot reload --------------------
+GOOD = {"classification": [], "form": {"Squat": [{"id": "deep", "when": "l_knee < 65", "issue": "Too deep"}]}}
+
+def write_rules(path, spec, mtime):
+    path.write_text(spec if isinstance(spec, str) else json.dumps(spec), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+def test_non_finite_constants_are_rejected():
+    for expr in ("l_knee > 1e999", "l_knee > -1e999"):
+        with pytest.raises(RuleError, match="not finite"):
+            compile_expr(expr)
+
+@pytest.mark.parametrize("spec", [
+    {"form": []},                                                        # wrong container
+    ["not", "an", "object"],
+    {"form": {"Squat": [{"when": "l_knee < 65"}]}},                      # no issue
+    {"form": {"Squat": [{"when": "l_knee > 1e999", "issue": "x"}]}},     # inf constant
+    {"form": {"Squat": [{"when": "min(l_knee, r_knee)", "issue": "x"}]}},  # a number, not a condition
+    {"classification": [{"exercise": "Squat", "when": "1"}]},
+    "{ not json",
+])
+def test_broken_files_raise_rule_error(tmp_path, spec):
+    path = tmp_path / "rules.json"
+    write_rules(path, spec, 1000)
+    with pytest.raises(RuleError):
+        load_rules(str(path))
+
+@pytest.mark.parametrize("broken", [
+    {"form": []},
+    {"form": {"Squat": [{"when": "l_knee > 1e999", "issue": "x"}]}},
+    {"form": {"Squat": [{"when": "l_knee + 1", "issue": "x"}]}},
+])
+def test_reload_keeps_the_last_good_rules(tmp_path, broken):
+    path = tmp_path / "rules.json"
+    write_rules(path, GOOD, 1000)
+    engine = RuleEngine(str(path), reload_interval=1e-9)
+    before = engine.current()
+
+    write_rules(path, broken, 2000)
+    rules = engine.current()
+    assert rules is before and engine.reloads == 0
+    labels, violated = rules.evaluate(one_row(l_knee=50))
+    assert rules.issues(violated[0]) == ["Too deep"]
+
+    fixed = {"form": {"Squat": [{"id": "deep", "when": "l_knee < 70", "issue": "Deeper"}]}}
+    write_rules(path, fixed, 3000)
+    assert engine.current().rules[0]["issue"] == "Deeper" and engine.reloads == 1
@@ -0,0 +1,101 @@
+# session_store: the same SessionStore behaviour on every SESSION_STORE backend
+# (redis only when SESSION_STORE_TEST_REDIS=redis://... points at a server)
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from session_store import SessionStore, SqliteKV, open_kv, valid_session_id
+
+REDIS_URL = os.getenv("SESSION_STORE_TEST_REDIS", "")
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def kv_factory(request, tmp_path):
+    """Opens the backend; each call is another "worker" on the same shared store."""
+    opened = []
+
+    def factory():
+        if request.param == "memory":
+            return None
+        if request.param == "redis":
+            if not REDIS_URL:
+                pytest.skip("set SESSION_STORE_TEST_REDIS to test the redis backend")
+            pytest.importorskip("redis")
+        kv = open_kv(request.param, str(tmp_path / "sessions.db") if request.param == "sqlite" else REDIS_URL)
+        opened.append(kv)
+        return kv
+
+    factory.kind = request.param
+    yield factory
+    if request.param == "redis" and opened:
+        opened[0]._redis.flushdb()
+    for kv in opened:
+        kv.close()
+
+
+def test_update_returns_the_previous_verdict(kv_factory):
+    store = SessionStore(ttl=60, kv=kv_factory())
+    assert store.backend == kv_factory.kind
+    assert store.update("s1", "u1", "Squat", "correct", "—") is None
+    assert store.update("s1", "u1", "Squat", "wrong", "Too deep", reps=2) == ("correct", "Squat", "—")
+
+    state = store.get("s1")
+    assert (state["status"], state["issue"], state["frames"], state["reps"], state["user_id"]) == (
+        "wrong", "Too deep", 2, 2, "u1",
+    )
+    assert store.get("other") is None
+
+def test_shared_backends_are_seen_by_every_worker(kv_factory):
+    if kv_factory.kind == "memory":
+        pytest.skip("memory is per process by design")
+    first, second = SessionStore(ttl=60, kv=kv_factory()), SessionStore(ttl=60, kv=kv_factory())
+    first.update("s1", None, "Squat", "wrong", "Too deep")
+    assert second.update("s1", None, "Squat", "wrong", "Too deep") == ("wrong", "Squat", "Too deep")
+    assert first.get("s1")["frames"] == 2
+
+def test_tracker_state_follows_the_session(kv_factory):
+    row = np.array([170, 170, 120, 120, 10, 0.3, 0.3, 0.45, 0.45, 0.6, 0.6], dtype=np.float32)
+    first, second = SessionStore(ttl=60, kv=kv_factory()), SessionStore(ttl=60, kv=kv_factory())
+    other = second if kv_factory.kind != "memory" else first
+
+    for i, knee in enumerate((170, 90, 170)):
+        row[2:4] = knee
+        store = first if i % 2 == 0 else other
+        result = store.track("s1", row, i / 30)
+    assert result["exercise"] == "Squat"
+    assert other.tracker("s1").reps.counts["Squat"] == first.tracker("s1").reps.counts["Squat"]
+    assert len(first.tracker("s2").history) == 0
+
+def test_idle_sessions_are_evicted(kv_factory):
+    store = SessionStore(ttl=0.2, kv=kv_factory())
+    store.update("old", None, "Squat", "correct", "—")
+    time.sleep(0.3)
+    store.update("new", None, "Squat", "correct", "—")
+
+    assert store.evict_idle() == ["old"]
+    assert len(store) == 1
+    assert store.get("old") is None
+    assert store.get("new")["frames"] == 1
+
+
+def test_sqlite_keys_expire(tmp_path):
+    kv = SqliteKV(str(tmp_path / "kv.db"))
+    kv.set("a", "1", ttl=60)
+    kv.set("b", "2", ttl=0.05)
+    time.sleep(0.1)
+    assert (kv.get("a"), kv.get("b")) == ("1", None)
+    kv.purge()
+    assert kv._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0] == 1
+    kv.delete("a")
+    assert kv.get("a") is None
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        open_kv("postgres")
+
+@pytest.mark.parametrize("value, ok", [("abc-1_2", True), ("", False), ("a/b", False), ("x" * 129, False)])
+def test_session_ids_are_firestore_safe(value, ok):
+    assert valid_session_id(value) is ok
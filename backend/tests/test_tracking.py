@@ -0,0 +1,101 @@
+# tracking: smoothing, exercise hysteresis, rep counting and tracker state round trips
+
+import json
+
+import numpy as np
+
+from geometry import F_L_KNEE, F_R_KNEE, FEATURE_NAMES
+from tracking import EmaFilter, LabelHysteresis, NoFilter, OneEuroFilter, RepCounter, SessionTracker
+
+
+def pose(knee=120.0, torso_lean=10.0, elbow=170.0):
+    """Feature row: arms down, so knee angle / torso lean decide the exercise."""
+    values = {
+        "l_elbow": elbow, "r_elbow": elbow, "l_knee": knee, "r_knee": knee, "torso_lean": torso_lean,
+        "l_sh_y": 0.3, "r_sh_y": 0.3, "l_el_y": 0.45, "r_el_y": 0.45, "l_wr_y": 0.6, "r_wr_y": 0.6,
+    }
+    return np.array([values[name] for name in FEATURE_NAMES], dtype=np.float32)
+
+SQUAT = pose(knee=120, torso_lean=10)
+DEADLIFT = pose(knee=170, torso_lean=40)
+
+
+# -------------------- Label hysteresis --------------------
+def test_first_label_is_taken_at_once():
+    labels = LabelHysteresis(switch_frames=3)
+    assert labels.update("Squat") == "Squat"
+
+def test_flicker_shorter_than_switch_frames_is_ignored():
+    labels = LabelHysteresis(switch_frames=3)
+    seen = [labels.update(x) for x in ["Squat", "Deadlift", "Deadlift", "Squat", "Deadlift", "Squat"]]
+    assert seen == ["Squat"] * 6
+
+def test_switches_after_enough_frames_in_a_row():
+    labels = LabelHysteresis(switch_frames=3)
+    seen = [labels.update(x) for x in ["Squat", "Deadlift", "Deadlift", "Deadlift", "Squat"]]
+    assert seen == ["Squat", "Squat", "Squat", "Deadlift", "Deadlift"]
+
+def test_streak_restarts_when_the_candidate_changes():
+    labels = LabelHysteresis(switch_frames=2)
+    seen = [labels.update(x) for x in ["Squat", "Deadlift", "Bicep Curl", "Bicep Curl"]]
+    assert seen == ["Squat", "Squat", "Squat", "Bicep Curl"]
+
+
+# -------------------- Reps --------------------
+def test_squat_reps_need_a_full_down_and_up():
+    reps = RepCounter()
+    counts = [reps.update("Squat", pose(knee=k)) for k in (170, 90, 150, 95, 170, 120, 170)]
+    # 150 is not high enough to finish the rep, 120 is not low enough to start one
+    assert counts == [0, 0, 0, 0, 1, 1, 1]
+
+def test_reps_keep_counting_when_the_label_flickers():
+    reps = RepCounter()
+    reps.update("Squat", pose(knee=90))
+    assert reps.update("Deadlift", pose(knee=170)) == 0
+    assert reps.counts["Squat"] == 1
+
+
+# -------------------- Filters --------------------
+def test_one_euro_damps_jitter_on_a_still_pose():
+    rng = np.random.default_rng(0)
+    noisy = np.tile(SQUAT, (60, 1))
+    noisy[:, F_L_KNEE] += rng.normal(0, 3, 60).astype(np.float32)
+    smooth = OneEuroFilter()
+    out = np.array([smooth(row, i / 30) for i, row in enumerate(noisy)])
+    assert out[10:, F_L_KNEE].std() < 0.7 * noisy[10:, F_L_KNEE].std()
+
+def test_filters_pass_the_first_row_through():
+    for smooth in (OneEuroFilter(), EmaFilter(0.5), NoFilter()):
+        np.testing.assert_array_equal(smooth(SQUAT, 0.0), SQUAT)
+
+
+# -------------------- Session tracker --------------------
+def test_single_misclassified_frame_does_not_change_the_verdict():
+    tracker = SessionTracker()
+    tracker.filter = NoFilter()
+    results = [tracker.update(row, i / 30) for i, row in enumerate([SQUAT] * 5 + [DEADLIFT] + [SQUAT] * 5)]
+    assert {r["exercise"] for r in results} == {"Squat"}
+
+def test_state_round_trip_continues_exactly():
+    # One noisy squat rep; the copy restored mid-rep must finish it identically
+    rng = np.random.default_rng(1)
+    rows = [pose(knee=k) for k in np.linspace(170, 80, 20).tolist() + np.linspace(80, 170, 20).tolist()]
+    for row in rows:
+        row[[F_L_KNEE, F_R_KNEE]] += rng.normal(0, 2, 2).astype(np.float32)
+
+    straight = SessionTracker()
+    for i, row in enumerate(rows[:25]):
+        straight.update(row, i / 30)
+    restored = SessionTracker.from_state(json.loads(json.dumps(straight.to_state())))
+
+    for i, row in enumerate(rows[25:], start=25):
+        a, b = straight.update(row, i / 30), restored.update(row, i / 30)
+        assert a == b
+    assert straight.reps.counts["Squat"] == 1
+    assert len(restored.history) == len(straight.history)
+    np.testing.assert_array_equal(restored.history[-1][1], straight.history[-1][1])
+
+def test_empty_state_is_a_fresh_tracker():
+    tracker = SessionTracker.from_state(None)
+    assert tracker.update(SQUAT, 0.0)["exercise"] == "Squat"
+    assert tracker.update(SQUAT, 0.1)["reps"] == 0
@@ -0,0 +1,94 @@
+# Offline video jobs: segment analysis/stitching and the POST /video-jobs upload
+
+import hashlib
+import os
+import time
+
+import numpy as np
+import pytest
+
+import video_job
+
+
+def write_video(path, brightness, fps=30, size=64):
+    """MJPG .avi, one flat grey frame per brightness value (0 = nobody in frame)."""
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (size, size))
+    for b in brightness:
+        writer.write(np.full((size, size, 3), b, np.uint8))
+    writer.release()
+    return path
+
+
+def test_plan_segments():
+    assert video_job.plan_segments(0) == [(0, None)]
+    assert video_job.plan_segments(10, 4) == [(0, 4), (4, 8), (8, 10)]
+
+
+def test_segments_stitch_into_one_timeline(tmp_path, fake_pose):
+    brightness = [0 if i % 3 == 0 else 100 for i in range(10)]
+    video = write_video(str(tmp_path / "clip.avi"), brightness)
+    n_frames, fps = video_job.video_info(video)
+    assert (n_frames, fps) == (10, 30)
+
+    parts = []
+    for start, end in video_job.plan_segments(n_frames, 4):
+        parts.append(video_job.part_path(str(tmp_path), start, end))
+        kept, _ = video_job.analyze_segment(video, start, end, parts[-1], fps, warmup=2)
+        assert kept == end - start  # warm-up frames are not kept
+
+    cols = video_job.stitch(parts)
+    assert cols["frame"].tolist() == list(range(10))
+    exercise, issues, reps, has_pose = video_job.score_timeline(cols["t_ms"], cols["features"])
+    assert has_pose.tolist() == [b > 0 for b in brightness]
+
+    output = str(tmp_path / "clip.timeline.npz")
+    video_job.save_timeline(output, cols["t_ms"], cols["frame"], cols["features"], exercise, issues, reps, has_pose)
+    summary = video_job.summarize(video_job.load_timeline(output), fps)
+    assert summary["frames"] == 10
+    assert summary["frames_with_pose"] == 6
+    assert sum(summary["exercise_frames"].values()) == 6
+
+
+def test_unreadable_video_is_an_error(tmp_path):
+    path = tmp_path / "junk.video"
+    path.write_bytes(b"not a video")
+    with pytest.raises(ValueError):
+        video_job.video_info(str(path))
+
+
+@pytest.fixture
+def jobs(client, tmp_path, monkeypatch):
+    import control_server
+
+    monkeypatch.setattr(control_server, "video_jobs", video_job.VideoJobs(root=str(tmp_path), workers=1))
+    monkeypatch.setattr(control_server, "VIDEO_MAX_BYTES", 1000)
+    return control_server.video_jobs
+
+
+def upload(client, data):
+    return client.post("/video-jobs", files={"file": ("clip.avi", data, "video/x-msvideo")})
+
+
+def test_upload_is_saved_under_its_digest(client, jobs):
+    data = b"x" * 1000
+    reply = upload(client, data).json()
+    job_id = hashlib.sha1(data).hexdigest()[:16]
+    assert reply["ok"] and reply["job_id"] == job_id
+    assert os.path.getsize(jobs.paths(job_id)[0]) == 1000
+    assert upload(client, data).json()["job_id"] == job_id  # same file -> same job
+
+    # Not a real video: the background run fails, and says so
+    deadline = time.monotonic() + 10
+    while (job := client.get(f"/video-jobs/{job_id}").json())["state"] != "failed":
+        assert time.monotonic() < deadline, job
+        time.sleep(0.02)
+    assert "cannot open video" in job["error"]
+
+
+def test_oversized_upload_is_a_413_and_leaves_nothing_behind(client, jobs):
+    response = upload(client, b"x" * 1001)
+    assert response.status_code == 413
+    assert response.json() == {"ok": False, "msg": "Payload over 1000 bytes"}
+    assert os.listdir(jobs.root) == []
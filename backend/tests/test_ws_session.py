@@ -0,0 +1,96 @@
+# /ws/session: one streaming session per socket, from accept to the released slot
+
+import time
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import control_server
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition never became true"
+        time.sleep(0.01)
+
+def slots_released():
+    return control_server.active_stream_sessions == 0
+
+
+def test_frames_are_answered_and_recorded(client, jpeg):
+    with client.websocket_connect("/ws/session?session_id=ws1&user_id=u1") as ws:
+        for n in (1, 2, 3):
+            ws.send_bytes(jpeg(100))
+            reply = ws.receive_json()
+            assert (reply["ok"], reply["frame"]) == (True, n)
+            assert {"exercise", "status", "issue"} <= set(reply)
+        assert control_server.active_stream_sessions == 1
+    wait_for(slots_released)
+
+    state = client.get("/status?session_id=ws1").json()
+    assert (state["frames"], state["user_id"]) == (3, "u1")
+    assert state["exercise"] == reply["exercise"]
+
+def test_state_change_reaches_the_firestore_writer(client, jpeg, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(control_server, "send_to_firebase", lambda *args: submitted.append(args))
+    with client.websocket_connect("/ws/session?session_id=ws2") as ws:
+        for brightness in (100, 100, 0):  # 0: nobody in frame -> default verdict
+            ws.send_bytes(jpeg(brightness))
+            ws.receive_json()
+    wait_for(slots_released)
+    # One submit per frame; the changed flag comes from the session store
+    assert [args[-1] for args in submitted] == [True, False, True]
+    assert all(args[3] == "ws2" for args in submitted)
+
+def test_skipped_frames_are_recorded_too(client, jpeg, monkeypatch):
+    monkeypatch.setattr(control_server, "ADAPTIVE_SKIP", True)
+    with client.websocket_connect("/ws/session?session_id=ws7") as ws:
+        replies = []
+        for _ in range(3):
+            ws.send_bytes(jpeg(100))
+            replies.append(ws.receive_json())
+    wait_for(slots_released)
+    assert [r.get("skipped") for r in replies] == [None, "still", "still"]
+    assert client.get("/status?session_id=ws7").json()["frames"] == 3
+
+def test_undecodable_frame_keeps_the_session_open(client):
+    with client.websocket_connect("/ws/session?session_id=ws3") as ws:
+        ws.send_bytes(b"not a jpeg")
+        assert ws.receive_json() == {"ok": False, "frame": 1, "msg": "Invalid image"}
+    wait_for(slots_released)
+
+def test_text_frame_closes_with_1003_and_frees_the_slot(client, jpeg):
+    with client.websocket_connect("/ws/session?session_id=ws4") as ws:
+        ws.send_bytes(jpeg(100))
+        ws.receive_json()
+        ws.send_text("hello")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1003
+    wait_for(slots_released)
+
+def test_client_disconnect_frees_the_slot(client, jpeg):
+    with client.websocket_connect("/ws/session?session_id=ws5") as ws:
+        ws.send_bytes(jpeg(100))
+    wait_for(slots_released)
+
+@pytest.mark.parametrize("query, code", [
+    ("session_id=bad/id", 1008),
+    ("session_id=ok&tier=huge", 1008),
+])
+def test_bad_parameters_are_refused(client, query, code):
+    with client.websocket_connect(f"/ws/session?{query}") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == code
+    assert slots_released()
+
+def test_sessions_over_the_limit_are_refused(client, monkeypatch):
+    monkeypatch.setattr(control_server, "MAX_STREAM_SESSIONS", 0)
+    with client.websocket_connect("/ws/session?session_id=ws6") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1013
+    assert slots_released()
@@ -0,0 +1,238 @@
+# tracking.py
+# Temporal state per session, on top of the per-frame feature vector:
+# - OneEuroFilter / EmaFilter smooth the feature vector (jitter -> fewer false flips)
+# - LabelHysteresis only switches exercise after it wins several frames in a row
+# - RepCounter is a small per-exercise state machine (down -> up = 1 rep)
+# - SessionTracker ties them together with a ring buffer of recent features
+# - to_state() / from_state() turn a tracker into plain JSON-safe data, so it
+#   can live in a shared session store between frames (session_store.py)
+# The server classifies and checks form on the smoothed features, so a label
+# flicker no longer turns into a state change (and a Firestore write).
+
+import base64
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+from geometry import (
+    F_L_ELBOW, F_L_KNEE, F_L_SH_Y, F_R_ELBOW, F_R_KNEE, F_TORSO_LEAN, NUM_FEATURES,
+)
+from posture import classify_exercise, form_issues
+
+TEMPORAL_TRACKING = os.getenv("TEMPORAL_TRACKING", "1") == "1"
+SMOOTHING = os.getenv("SMOOTHING", "oneeuro").strip().lower()  # oneeuro | ema | off
+EMA_ALPHA = float(os.getenv("EMA_ALPHA", "0.5"))
+EXERCISE_SWITCH_FRAMES = int(os.getenv("EXERCISE_SWITCH_FRAMES", "5"))
+FEATURE_HISTORY = int(os.getenv("FEATURE_HISTORY", "30"))
+
+# One-Euro parameters. Angles move in degrees/s, heights in frame-heights/s,
+# so the speed coefficient (beta) is scaled per feature.
+ONE_EURO_MIN_CUTOFF = 1.5
+ONE_EURO_D_CUTOFF = 1.0
+ONE_EURO_BETA = np.full(NUM_FEATURES, 2.0, dtype=np.float32)
+ONE_EURO_BETA[:F_L_SH_Y] = 0.02  # angle + torso lean features
+
+# Rep state machines: signal(feat) must drop below `enter`, then rise above
+# `exit` to count one rep.
+REP_RULES = {
+    "Squat": (lambda f: min(f[F_L_KNEE], f[F_R_KNEE]), 100.0, 160.0),
+    "Deadlift": (lambda f: f[F_TORSO_LEAN], 45.0, 70.0),
+    "Bicep Curl": (lambda f: min(f[F_L_ELBOW], f[F_R_ELBOW]), 60.0, 150.0),
+    "Shoulder Press": (lambda f: min(f[F_L_ELBOW], f[F_R_ELBOW]), 90.0, 155.0),
+}
+
+
+# -------------------- Filters --------------------
+def _alpha(dt, cutoff):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """Vectorized One-Euro filter: smooth when still, responsive when moving."""
+
+    def __init__(self, min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA, d_cutoff=ONE_EURO_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    def __call__(self, x, t):
+        if self._x is None:
+            self._x, self._dx, self._t = x.copy(), np.zeros_like(x), t
+            return self._x
+
+        dt = max(t - self._t, 1e-3)
+        self._t = t
+
+        a_d = _alpha(dt, self.d_cutoff)
+        self._dx = a_d * (x - self._x) / dt + (1 - a_d) * self._dx
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        tau = 1.0 / (2 * np.pi * cutoff)
+        a = 1.0 / (1.0 + tau / dt)
+        self._x = (a * x + (1 - a) * self._x).astype(np.float32)
+        return self._x
+
+    def to_state(self):
+        if self._x is None:
+            return None
+        return {"x": self._x.tolist(), "dx": self._dx.tolist(), "t": self._t}
+
+    def from_state(self, state):
+        if state:
+            self._x = np.asarray(state["x"], dtype=np.float32)
+            self._dx = np.asarray(state["dx"], dtype=np.float32)
+            self._t = state["t"]
+
+
+class EmaFilter:
+    def __init__(self, alpha=EMA_ALPHA):
+        self.alpha = alpha
+        self._x = None
+
+    def __call__(self, x, t):
+        self._x = x.copy() if self._x is None else self.alpha * x + (1 - self.alpha) * self._x
+        return self._x
+
+    def to_state(self):
+        return None if self._x is None else {"x": self._x.tolist()}
+
+    def from_state(self, state):
+        if state:
+            self._x = np.asarray(state["x"], dtype=np.float32)
+
+
+class NoFilter:
+    def __call__(self, x, t):
+        return x
+
+    def to_state(self):
+        return None
+
+    def from_state(self, state):
+        pass
+
+
+def make_filter(kind=SMOOTHING):
+    if kind == "oneeuro":
+        return OneEuroFilter()
+    if kind == "ema":
+        return EmaFilter()
+    return NoFilter()
+
+# -------------------- Label hysteresis --------------------
+class LabelHysteresis:
+    def __init__(self, switch_frames=EXERCISE_SWITCH_FRAMES):
+        self.switch_frames = max(1, switch_frames)
+        self.label = None
+        self._candidate = None
+        self._streak = 0
+
+    def update(self, label):
+        if self.label is None or label == self.label:
+            self.label = label
+            self._candidate, self._streak = None, 0
+            return self.label
+
+        if label == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate, self._streak = label, 1
+
+        if self._streak >= self.switch_frames:
+            self.label = label
+            self._candidate, self._streak = None, 0
+        return self.label
+
+    def to_state(self):
+        return {"label": self.label, "candidate": self._candidate, "streak": self._streak}
+
+    def from_state(self, state):
+        self.label, self._candidate, self._streak = state["label"], state["candidate"], state["streak"]
+
+# -------------------- Rep counting --------------------
+class RepCounter:
+    """
+    One state machine per exercise, all advanced every frame, so a rep still
+    counts if the label flickers mid-rep (e.g. the top of a squat looks like a
+    deadlift to the single-frame classifier).
+    """
+
+    def __init__(self):
+        self.counts = {name: 0 for name in REP_RULES}
+        self._down = {name: False for name in REP_RULES}
+
+    def update(self, exercise, feat):
+        """Advance every state machine; returns the rep count for `exercise`."""
+        for name, (signal, enter, exit_) in REP_RULES.items():
+            value = signal(feat)
+            if not self._down[name] and value < enter:
+                self._down[name] = True
+            elif self._down[name] and value > exit_:
+                self._down[name] = False
+                self.counts[name] += 1
+        return self.counts.get(exercise, 0)
+
+    def to_state(self):
+        return {"counts": dict(self.counts), "down": dict(self._down)}
+
+    def from_state(self, state):
+        # Only exercises that still have a rule; new rules start at zero
+        for name in REP_RULES:
+            self.counts[name] = int(state["counts"].get(name, 0))
+            self._down[name] = bool(state["down"].get(name, False))
+
+# -------------------- Per-session tracker --------------------
+class SessionTracker:
+    def __init__(self):
+        self.filter = make_filter()
+        self.labels = LabelHysteresis()
+        self.reps = RepCounter()
+        self.history = deque(maxlen=FEATURE_HISTORY)  # (t, smoothed features)
+
+    def update(self, feat, t):
+        """Raw feature row -> result dict from the smoothed, debounced state."""
+        smoothed = self.filter(np.asarray(feat, dtype=np.float32), t)
+        self.history.append((t, smoothed))
+
+        exercise = self.labels.update(classify_exercise(smoothed))
+        issues = form_issues(exercise, smoothed)
+        reps = self.reps.update(exercise, smoothed)
+        return {
+            "exercise": exercise,
+            "status": "wrong" if issues else "correct",
+            "issue": issues[0] if issues else "—",
+            "issues": issues,
+            "reps": reps,
+        }
+
+    def to_state(self):
+        """Everything update() depends on, as JSON-safe dicts/lists."""
+        return {
+            "filter": self.filter.to_state(),
+            "labels": self.labels.to_state(),
+            "reps": self.reps.to_state(),
+            # Features as base64 float32 rows: ~4x smaller and faster than lists of floats
+            "history": {
+                "t": [t for t, _ in self.history],
+                "f": base64.b64encode(np.asarray([f for _, f in self.history], dtype=np.float32)).decode(),
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        tracker = cls()
+        if state:
+            tracker.filter.from_state(state["filter"])
+            tracker.labels.from_state(state["labels"])
+            tracker.reps.from_state(state["reps"])
+            history = state["history"]
+            if history["t"]:
+                rows = np.frombuffer(base64.b64decode(history["f"]), dtype=np.float32)
+                tracker.history.extend(zip(history["t"], rows.reshape(len(history["t"]), -1)))
+        return tracker
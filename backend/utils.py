@@ -1,10 +1,5 @@
-import numpy as np
+from geometry import joint_angles
 
 def angle(a, b, c):
-    # angle ABC in degrees
-    a = np.array(a); b = np.array(b); c = np.array(c)
-    ba = a - b
-    bc = c - b
-    cosine = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
-    cosine = np.clip(cosine, -1.0, 1.0)
-    return np.degrees(np.arccos(cosine))
+    # angle ABC in degrees (kept for old scripts; geometry.py has the vectorized version)
+    return joint_angles(a, b, c)
@@ -0,0 +1,400 @@
+# video_job.py
+# Offline analysis of whole recorded workout videos (same rules as /process-frame):
+#
+#   python video_job.py workout.mp4                      # -> workout.timeline.npz
+#   python video_job.py workout.mp4 -o out.npz --workers 4 --segment-frames 600
+#
+# - The video is cut into segments of VIDEO_SEGMENT_FRAMES frames, processed in
+#   parallel on a process pool; each worker owns one tracking-mode Pose
+#   (static_image_mode=False, like camera_pose.py), reset at every segment
+# - Each segment starts VIDEO_WARMUP_FRAMES early so the tracker has locked on
+#   at the boundary; the warm-up frames are not kept
+# - Finished segments are saved under <output>.parts/; a rerun skips them (resume)
+# - Parts are stitched into one per-frame timeline, scored with the rule engine
+#   (and the session tracker when TEMPORAL_TRACKING=1), and written as a
+#   compressed columnar .npz (see save_timeline for the columns)
+# - VideoJobs runs uploads from POST /video-jobs one at a time in the background;
+#   with several server workers sharing VIDEO_JOB_DIR, a lock file per job
+#   keeps the same upload from running twice, and a worker that did not take
+#   the upload reports the job's status from the files on disk
+
+import argparse
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: one server process, nothing to lock against
+    fcntl = None
+
+import numpy as np
+
+from frame_decode import PREFERRED_INPUT_SIZE
+from geometry import NUM_FEATURES, compute_features
+from inference import NO_POSE_RESULT, pose_array
+from pose_pool import create_pose
+from posture import evaluate_bulk
+from rule_engine import RULES
+from tracking import TEMPORAL_TRACKING, SessionTracker
+
+VIDEO_SEGMENT_FRAMES = int(os.getenv("VIDEO_SEGMENT_FRAMES", "300"))
+VIDEO_WARMUP_FRAMES = int(os.getenv("VIDEO_WARMUP_FRAMES", "15"))
+VIDEO_JOB_WORKERS = int(os.getenv("VIDEO_JOB_WORKERS", str(os.cpu_count() or 1)))
+VIDEO_JOB_DIR = os.getenv("VIDEO_JOB_DIR", "video_jobs")
+VIDEO_MAX_BYTES = int(os.getenv("VIDEO_MAX_BYTES", str(500 << 20)))  # POST /video-jobs upload cap
+VIDEO_MAX_BYTES = int(os.getenv("VIDEO_MAX_BYTES", str(500 << 20)))  # POST /video-jobs upload cap
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+
+
+# -------------------- Worker side --------------------
+_worker_pose = None
+
+def _init_worker():
+    global _worker_pose
+    _worker_pose = create_pose(False)
+
+def _prepare(frame_bgr):
+    """BGR video frame -> RGB, downscaled when it is far above the model input."""
+    import cv2  # not at module level: control_server imports this module at startup
+    h, w = frame_bgr.shape[:2]
+    scale = PREFERRED_INPUT_SIZE / min(h, w)
+    if scale <= 0.5:
+        frame_bgr = cv2.resize(frame_bgr, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+
+def analyze_segment(path, start, end, part_path, fps, warmup=VIDEO_WARMUP_FRAMES):
+    """
+    Frames [start, end) of the video -> part file with the per-frame feature rows.
+    end=None means "until the video ends". Returns (frames kept, seconds).
+    """
+    import cv2
+
+    t0 = time.perf_counter()
+    pose = _worker_pose if _worker_pose is not None else create_pose(False)
+    pose.reset()  # no tracking state from the previous segment
+
+    first = max(0, start - warmup)
+    cap = cv2.VideoCapture(path)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+
+    frames, feats = [], []
+    i = first
+    while end is None or i < end:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        arr = pose_array(pose.process(_prepare(frame)))
+        if i >= start:
+            frames.append(i)
+            feats.append(compute_features(arr) if arr is not None else np.full(NUM_FEATURES, np.nan, np.float32))
+        i += 1
+    cap.release()
+    if pose is not _worker_pose:
+        pose.close()
+
+    frames = np.asarray(frames, dtype=np.int32)
+    features = np.asarray(feats, dtype=np.float32).reshape(-1, NUM_FEATURES)
+    tmp = part_path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, frame=frames, t_ms=(frames * (1000.0 / fps)).astype(np.float32), features=features)
+    os.replace(tmp, part_path)  # a part file only exists once it is complete
+    return len(frames), time.perf_counter() - t0
+
+# -------------------- Planning / stitching --------------------
+def video_info(path):
+    """(frame count, fps); frame count is 0 when the container does not say."""
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"cannot open video {path}")
+    n_frames = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return n_frames, fps
+
+def plan_segments(n_frames, segment_frames=VIDEO_SEGMENT_FRAMES):
+    if n_frames <= 0:
+        return [(0, None)]  # unknown length: one segment to the end
+    step = max(1, segment_frames)
+    return [(s, min(s + step, n_frames)) for s in range(0, n_frames, step)]
+
+def part_path(parts_dir, start, end):
+    return os.path.join(parts_dir, f"seg_{start:08d}_{end if end is not None else 'end'}.npz")
+
+def stitch(paths):
+    cols = {"frame": [], "t_ms": [], "features": []}
+    for path in paths:
+        with np.load(path) as part:
+            for name in cols:
+                cols[name].append(part[name])
+    return {name: np.concatenate(v) if v else np.empty((0,)) for name, v in cols.items()}
+
+def score_timeline(t_ms, features):
+    """
+    Per-frame verdicts for the stitched feature rows: lists of exercise and
+    issues (all violated rules), the reps column and the has_pose mask.
+    """
+    features = features.reshape(-1, NUM_FEATURES)
+    has_pose = ~np.isnan(features).any(axis=1)
+    n = len(features)
+    exercise = [NO_POSE_RESULT["exercise"]] * n
+    issues = [[] for _ in range(n)]
+    reps = np.zeros(n, dtype=np.uint16)
+    found = np.flatnonzero(has_pose)
+
+    if TEMPORAL_TRACKING:
+        # Same per-session smoothing/hysteresis/rep counting as /process-frame
+        tracker = SessionTracker()
+        for i in found:
+            r = tracker.update(features[i], float(t_ms[i]) / 1000.0)
+            exercise[i], issues[i], reps[i] = r["exercise"], r["issues"], r["reps"]
+    elif found.size:
+        cols = evaluate_bulk(features[found])
+        for k, i in enumerate(found):
+            exercise[i], issues[i] = cols["exercise"][k], cols["issues"][k]
+    return exercise, issues, reps, has_pose
+
+def save_timeline(output, t_ms, frames, features, exercise, issues, reps, has_pose):
+    """
+    Columnar timeline, one row per frame:
+      frame (int32), t_ms (float32), has_pose (bool), features (N, 11 float32),
+      exercise (uint8 -> exercise_names), wrong (bool),
+      issue (int16 -> issue_names, 0 = "—", the primary issue),
+      all issues as a ragged column: issue_codes[issue_offsets[i]:issue_offsets[i + 1]],
+      reps (uint16, count for the current exercise)
+    """
+    rules = RULES.current()
+    exercise_names = list(rules.exercises)
+    issue_names = ["—"] + list(dict.fromkeys(r["issue"] for r in rules.rules))
+    ex_code = {name: i for i, name in enumerate(exercise_names)}
+    issue_code = {name: i for i, name in enumerate(issue_names)}
+
+    offsets = np.zeros(len(issues) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(i) for i in issues])
+    codes = np.fromiter((issue_code[i] for row in issues for i in row), dtype=np.int16, count=int(offsets[-1]))
+
+    tmp = output + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(
+            f,
+            frame=frames.astype(np.int32),
+            t_ms=t_ms.astype(np.float32),
+            has_pose=has_pose,
+            features=features.astype(np.float32),
+            exercise=np.fromiter((ex_code[e] for e in exercise), dtype=np.uint8, count=len(exercise)),
+            exercise_names=np.array(exercise_names),
+            wrong=offsets[1:] > offsets[:-1],
+            issue=np.array([issue_code[row[0]] if row else 0 for row in issues], dtype=np.int16),
+            issue_names=np.array(issue_names),
+            issue_codes=codes,
+            issue_offsets=offsets,
+            reps=reps,
+        )
+    os.replace(tmp, output)
+
+def load_timeline(path):
+    """Columnar timeline -> dict of numpy arrays (see save_timeline)."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def summarize(timeline, fps):
+    exercise_names = timeline["exercise_names"].tolist()
+    issue_names = timeline["issue_names"].tolist()
+    has_pose = timeline["has_pose"]
+    ex = timeline["exercise"][has_pose]
+    summary = {
+        "frames": int(len(has_pose)),
+        "frames_with_pose": int(has_pose.sum()),
+        "duration_s": round(len(has_pose) / fps, 2),
+        "exercise_frames": {exercise_names[c]: int(n) for c, n in zip(*np.unique(ex, return_counts=True))},
+        "wrong_frames": int(timeline["wrong"].sum()),
+        "issue_frames": {
+            issue_names[c]: int(n) for c, n in zip(*np.unique(timeline["issue_codes"], return_counts=True))
+        },
+    }
+    # reps column restarts per exercise label; the last value per label is its count
+    reps = {}
+    for code, count in zip(ex, timeline["reps"][has_pose]):
+        reps[exercise_names[code]] = int(count)
+    summary["reps"] = reps
+    return summary
+
+# -------------------- Job --------------------
+def run_video_job(path, output, workers=VIDEO_JOB_WORKERS, segment_frames=VIDEO_SEGMENT_FRAMES, progress=None):
+    """
+    Analyse a whole video into `output` (.npz). Segments already saved under
+    <output>.parts/ by an interrupted run are reused. progress(done, total,
+    frames) is called as segments finish. Returns the summary dict.
+    """
+    n_frames, fps = video_info(path)
+    segments = plan_segments(n_frames, segment_frames)
+    parts_dir = output + ".parts"
+    os.makedirs(parts_dir, exist_ok=True)
+
+    parts = [part_path(parts_dir, s, e) for s, e in segments]
+    todo = [(s, e, p) for (s, e), p in zip(segments, parts) if not os.path.exists(p)]
+    done, frames = len(segments) - len(todo), 0
+    if progress:
+        progress(done, len(segments), frames)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo))), initializer=_init_worker) as pool:
+            futures = [pool.submit(analyze_segment, path, s, e, p, fps) for s, e, p in todo]
+            for fut in as_completed(futures):
+                kept, _ = fut.result()
+                done += 1
+                frames += kept
+                if progress:
+                    progress(done, len(segments), frames)
+
+    cols = stitch(parts)
+    exercise, issues, reps, has_pose = score_timeline(cols["t_ms"], cols["features"])
+    save_timeline(output, cols["t_ms"], cols["frame"], cols["features"].reshape(-1, NUM_FEATURES),
+                  exercise, issues, reps, has_pose)
+    for p in parts:
+        os.remove(p)
+    os.rmdir(parts_dir)
+    return summarize(load_timeline(output), fps)
+
+# -------------------- Background jobs (API) --------------------
+def job_id_for(digest):
+    """Same upload -> same job id, so re-uploading resumes instead of restarting."""
+    return digest.hexdigest()[:16]
+
+def finished(output):
+    # The parts dir is removed only after the timeline has been written
+    return os.path.exists(output) and not os.path.exists(output + ".parts")
+
+@contextmanager
+def job_lock(path):
+    """Exclusive lock on a file, held across processes; the OS drops it if the holder dies."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+class VideoJobs:
+    """Runs uploaded videos one at a time on a background thread."""
+
+    def __init__(self, root=VIDEO_JOB_DIR, workers=VIDEO_JOB_WORKERS):
+        self.root = root
+        self.workers = workers
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def paths(self, job_id):
+        return os.path.join(self.root, f"{job_id}.video"), os.path.join(self.root, f"{job_id}.timeline.npz")
+
+    def _new_job(self, job_id):
+        return {
+            "job_id": job_id, "state": "queued", "segments_done": 0, "segments_total": None,
+            "frames_done": 0, "summary": None, "error": None,
+        }
+
+    def submit(self, job_id):
+        """Queue the video saved at paths(job_id)[0]; returns the job status."""
+        video, output = self.paths(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["state"] in ("queued", "running", "done"):
+                return dict(job)
+            job = self._jobs[job_id] = self._new_job(job_id)
+            if finished(output):
+                job.update(state="done", summary=summarize(load_timeline(output), video_info(video)[1]))
+                return dict(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="video-jobs")
+                self._thread.start()
+        self._queue.put(job_id)
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        return self._from_disk(job_id)
+
+    def _from_disk(self, job_id):
+        """Status of a job uploaded to another worker process (or None if there is no such upload)."""
+        if not _JOB_ID_RE.match(job_id):
+            return None
+        video, output = self.paths(job_id)
+        if not os.path.exists(video):
+            return None
+        job = self._new_job(job_id)
+        if finished(output):
+            job.update(state="done", summary=summarize(load_timeline(output), video_info(video)[1]))
+        elif os.path.isdir(output + ".parts"):
+            parts = [n for n in os.listdir(output + ".parts") if n.endswith(".npz")]
+            job.update(state="running", segments_done=len(parts), frames_done=None)
+        return job
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            job = self._jobs[job_id]
+            video, output = self.paths(job_id)
+
+            def progress(done, total, frames):
+                job.update(segments_done=done, segments_total=total, frames_done=frames)
+
+            job.update(state="running", started=time.time())
+            try:
+                # Another worker may be running (or have finished) the same upload
+                with job_lock(os.path.join(self.root, f"{job_id}.lock")):
+                    if finished(output):
+                        summary = summarize(load_timeline(output), video_info(video)[1])
+                    else:
+                        summary = run_video_job(video, output, self.workers, progress=progress)
+            except Exception as e:
+                print(f"❌ Video job {job_id} failed:", e)
+                job.update(state="failed", error=str(e), finished=time.time())
+            else:
+                job.update(state="done", summary=summary, finished=time.time())
+                print(f"✅ Video job {job_id} done ({summary['frames']} frames)")
+
+    def stats(self):
+        with self._lock:
+            states = [j["state"] for j in self._jobs.values()]
+        return {state: states.count(state) for state in set(states)}
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse a recorded workout video")
+    parser.add_argument("video")
+    parser.add_argument("-o", "--output", help="timeline .npz (default: <video>.timeline.npz)")
+    parser.add_argument("--workers", type=int, default=VIDEO_JOB_WORKERS)
+    parser.add_argument("--segment-frames", type=int, default=VIDEO_SEGMENT_FRAMES)
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.video)[0] + ".timeline.npz"
+    t0 = time.perf_counter()
+
+    def progress(done, total, frames):
+        elapsed = time.perf_counter() - t0
+        print(f"⏳ segment {done}/{total}  {frames} frames  {frames / elapsed if elapsed else 0:.1f} fps")
+
+    try:
+        summary = run_video_job(args.video, output, args.workers, args.segment_frames, progress)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Timeline written to {output}")
+    for key, value in summary.items():
+        print(f"   {key}: {value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,37 @@
 import { useEffect, useRef, useState } from "react";
-import {
-  doc,
-  onSnapshot,
-  setDoc,
-  serverTimestamp,
-  collection,
-  addDoc,
-} from "firebase/firestore";
+import { doc, onSnapshot } from "firebase/firestore";
 import { db } from "./firebase/config";
 
 import PostureCard from "./components/PostureCard";
 import "./App.css";
 
+// Backend base URL; set REACT_APP_API_URL at build time for a deployed server
+const API = (process.env.REACT_APP_API_URL || "http://localhost:8000").replace(
+  /\/+$/,
+  ""
+);
+const SESSION_ID = "latest";
+// Read Firestore while the server has sent nothing for this long. /events
+// re-sends a session's state every SSE_KEEPALIVE_S (5 s), so silence means no
+// state on the server (e.g. the live scripts write to Firestore directly) or
+// a lost connection, not a steady posture.
+const SERVER_QUIET_MS = 10000;
+
 function App() {
-  // ---------- Firebase live posture state ----------
+  // ---------- Live posture state ----------
   const [posture, setPosture] = useState("correct");
   const [issue, setIssue] = useState("—");
   const [exercise, setExercise] = useState("Squat");
 
-  const lastLoggedStatusRef = useRef("");
+  // "server" (pushed by the backend) or "firestore" (fallback listener)
+  const [source, setSource] = useState("server");
+  // false once /events failed without ever answering (no SSE on this backend)
+  const [serverEvents, setServerEvents] = useState(true);
+  const gotServerStateRef = useRef(false);
 
   // ---------- Backend control ----------
   const [backendRunning, setBackendRunning] = useState(false);
   const [backendMsg, setBackendMsg] = useState("");
-  const API = "http://localhost:8000";
 
   const refreshBackendStatus = async () => {
     try {
@@ -61,51 +69,69 @@ function App() {
     }
   };
 
-  // ---------- Firestore realtime listener ----------
+  const applyState = (data) => {
+    const raw = String(data.status ?? data.posture ?? "")
+      .trim()
+      .toLowerCase();
+
+    setPosture(raw === "correct" ? "correct" : "wrong");
+    setIssue(data.issue || "—");
+    setExercise(data.exercise || "Squat");
+  };
+
+  // ---------- Live state pushed by the backend (SSE) ----------
+  // The server also keeps the history of wrong events, so nothing is written
+  // from here. The stream stays open while the Firestore fallback is read,
+  // so the next server message switches back.
   useEffect(() => {
-    const ref = doc(db, "postureLogs", "latest");
-
-    const unsubscribe = onSnapshot(ref, async (snapshot) => {
-      if (!snapshot.exists()) {
-        await setDoc(
-          ref,
-          {
-            status: "correct",
-            exercise: "Squat",
-            issue: "—",
-            timestamp: serverTimestamp(),
-          },
-          { merge: true }
-        );
-        return;
-      }
+    if (!serverEvents) return undefined;
+
+    let quietTimer;
+    const waitForServer = () => {
+      clearTimeout(quietTimer);
+      quietTimer = setTimeout(() => setSource("firestore"), SERVER_QUIET_MS);
+    };
 
-      const data = snapshot.data() || {};
-
-      const raw = String(data.status ?? data.posture ?? "")
-        .trim()
-        .toLowerCase();
-      const normalized = raw === "correct" ? "correct" : "wrong";
-
-      setPosture(normalized);
-      setIssue(data.issue || "—");
-      setExercise(data.exercise || "Squat");
-
-      // Log WRONG posture events (once per transition)
-      if (normalized === "wrong" && lastLoggedStatusRef.current !== "wrong") {
-        await addDoc(collection(db, "postureHistory"), {
-          status: "wrong",
-          exercise: data.exercise || "Squat",
-          issue: data.issue || "—",
-          timestamp: serverTimestamp(),
-        });
+    const events = new EventSource(
+      `${API}/events?session_id=${encodeURIComponent(SESSION_ID)}`
+    );
+    waitForServer();
+    events.onmessage = (e) => {
+      gotServerStateRef.current = true;
+      waitForServer();
+      setSource("server");
+      applyState(JSON.parse(e.data));
+    };
+    events.onerror = () => {
+      // EventSource reconnects by itself; only give up on a backend that
+      // never answered (e.g. an older server without /events)
+      if (!gotServerStateRef.current) {
+        events.close();
+        clearTimeout(quietTimer);
+        setServerEvents(false);
+        setSource("firestore");
       }
+    };
+
+    return () => {
+      clearTimeout(quietTimer);
+      events.close();
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [serverEvents]);
+
+  // ---------- Fallback: Firestore realtime listener (read-only) ----------
+  useEffect(() => {
+    if (source !== "firestore") return undefined;
 
-      lastLoggedStatusRef.current = normalized;
+    const ref = doc(db, "postureLogs", SESSION_ID);
+    const unsubscribe = onSnapshot(ref, (snapshot) => {
+      if (snapshot.exists()) applyState(snapshot.data() || {});
     });
 
     return () => unsubscribe();
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [source]);
 
   // ---------- Check backend status on load ----------
   useEffect(() => {
@@ -168,6 +194,9 @@ function App() {
           <span className="badge">
             Backend: {backendRunning ? "RUNNING" : "OFF"}
           </span>
+          <span className="badge">
+            Live: {source === "server" ? "SERVER" : "FIRESTORE"}
+          </span>
         </div>
       </div>
 
@@ -181,7 +210,7 @@ function App() {
 
           {backendRunning ? (
             <img
-              src="http://localhost:8000/video"
+              src={`${API}/video`}
               alt="AI Camera Stream"
               style={{
                 width: "100%",